@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'authentication.metrics.RequestMetricsMiddleware',
+    'authentication.routers.ReplicaRoutingMiddleware',
+    'authentication.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -82,6 +86,22 @@ DATABASES = {
     }
 }
 
+# Lectures désignées sur des réplicas (voir authentication/routers.py)
+DATABASE_ROUTERS = ['authentication.routers.ReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_MAX_LAG = 5  # secondes de retard au-delà desquelles on lit le primaire
+REPLICA_STICKY_SECONDS = 10  # lectures sur le primaire après une écriture du client
+REPLICA_LAG_CHECK_INTERVAL = 5
+
+# Réplica local facultatif : copie de db.sqlite3 (DB_REPLICA_NAME=replica.sqlite3)
+if os.environ.get('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / os.environ['DB_REPLICA_NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS = ['replica']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -123,6 +143,30 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Durée de cache (s) des médias dont le nom n'est pas une empreinte de contenu
+MEDIA_CACHE_MAX_AGE = 3600
+
+# Préfixe interne nginx pour déléguer l'envoi des médias (X-Accel-Redirect), None = envoi par Django
+MEDIA_ACCEL_REDIRECT_PREFIX = None
+
+# Médias nommés d'après l'empreinte de leur contenu (dédoublonnés, immuables)
+STORAGES = {
+    'default': {
+        'BACKEND': 'authentication.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Nombre de threads générant les déclinaisons d'images (0 = dans la requête)
+IMAGE_DERIVATIVE_WORKERS = 2
+
+# Téléversements par morceaux : taille maximale d'un fichier et d'un morceau (octets)
+CHUNKED_UPLOAD_MAX_SIZE = 50 * 1024 * 1024
+CHUNKED_UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+CHUNKED_UPLOAD_CONTENT_TYPES = ['image/jpeg', 'image/png', 'image/webp', 'image/gif']
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -177,6 +221,53 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10,
 }
 
+# Métriques de l'API (/api/metrics) : jeton de collecte Prometheus (sinon compte
+# administrateur requis) et en-tête Server-Timing sur chaque réponse
+METRICS_TOKEN = None
+METRICS_SERVER_TIMING = False
+
+# Compression des réponses (authentication/compression.py) : codages par ordre de
+# préférence à qualité égale (br et zstd si les paquets brotli et zstandard sont
+# installés), taille minimale (octets) des réponses compressées à la volée
+COMPRESSION_ENCODINGS = ['zstd', 'br', 'gzip']
+COMPRESSION_MIN_SIZE = 1024
+
+# Cache local du processus devant le cache partagé (authentication/caching.py)
+LOCAL_CACHE_MAX_ENTRIES = 1000  # par espace de noms (instantanés, utilisateurs)
+LOCAL_CACHE_SYNC_INTERVAL = 1  # secondes avant de voir l'invalidation d'un autre processus
+
+# Budgets de démarrage en ms (python manage.py startup_profile --check) : worker
+# avec l'URLconf chargée, et commandes ('commands' pour celles sans budget propre)
+STARTUP_BUDGETS = {
+    'asgi': 800,
+    'wsgi': 800,
+    'commands': 600,
+}
+# Modules que les tâches planifiées (commandes sans vérifications système) ne chargent pas
+STARTUP_LAZY_MODULES = [
+    'authentication.views',
+    'authentication.async_views',
+    'authentication.serializers',
+    'rest_framework.views',
+    'rest_framework_simplejwt',
+]
+
+# Listes de l'administration (authentication/paginators.py) : comptage plafonné,
+# estimation PostgreSQL au-delà de ADMIN_COUNT_ESTIMATE_MIN_ROWS lignes
+ADMIN_COUNT_LIMIT = 10_000
+ADMIN_COUNT_ESTIMATE_MIN_ROWS = 100_000
+
+# Quasi-doublons des zones soumises (authentication/geometry.py) : part de la plus
+# petite zone recouverte, ou distance entre centroïdes (km)
+ZONE_DUPLICATE_OVERLAP = 0.8
+ZONE_DUPLICATE_DISTANCE_KM = 1.0
+ZONE_MAX_SPAN_DEGREES = 3.0  # hauteur maximale d'une zone protégée (recherche par index)
+AIRPORT_MAX_RADIUS_KM = 50
+# Contours soumis (authentication/geometry.py, repair_ring) : nombre maximal de sommets
+ZONE_MAX_VERTICES = 100_000
+# Corps JSON d'un contour de ZONE_MAX_VERTICES sommets (défaut Django : 2,5 Mo)
+DATA_UPLOAD_MAX_MEMORY_SIZE = 5 * 1024 * 1024
+
 # JWT Configuration
 from datetime import timedelta
 
@@ -15,9 +15,8 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -25,7 +24,9 @@ from rest_framework_simplejwt.views import (
 )
 from rest_framework.routers import DefaultRouter
 from . import views
-from authentication.views import DroneViewSet, DroneFlightViewSet
+from authentication import async_views
+from authentication.views import DroneViewSet, DroneFlightViewSet, metrics_view
+from authentication.media import serve_media
 
 # for ViewSets
 router = DefaultRouter()
@@ -45,13 +46,21 @@ urlpatterns = [
     path('api/protected/', views.protected_endpoint, name='protected_endpoint'),
     path('api/profile/', views.user_profile, name='user_profile'),
     
+    # Métriques Prometheus
+    path('api/metrics', metrics_view, name='metrics'),
+    
     # Authentication API
     path('api/auth/', include('authentication.urls')),
     
+    # Listes de vols asynchrones (avant les routes du routeur)
+    path('api/flights/', async_views.flight_list, name='droneflight-list'),
+    path('api/flights/recent_flights/', async_views.recent_flights, name='droneflight-recent-flights'),
+    
     # Drone API URLs
     path('api/', include(router.urls)),
 ]
 
-# Configuration pour servir les médias en développement
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Service des médias (développement et production, ou délégation à nginx)
+urlpatterns += [
+    re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
+]
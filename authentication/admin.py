@@ -1,9 +1,14 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from django.utils.html import format_html
+from django.utils import timezone
+from django.utils.html import format_html, format_html_join
+from . import snapshots
+from .geometry import PREVIEW_SIZE
+from .paginators import EstimatedCountPaginator
 from .models import (
-    User, UserProfile, PasswordResetToken, Drone, DroneFlight, 
-    CarouselImage, Airport, NaturalReserve, NationalPark, JWTBlacklistedToken
+    User, UserProfile, PasswordResetToken, Drone, MaintenanceDueDrone, DroneFlight, 
+    FlightDailyRollup, CarouselImage, UploadSession, StoredFile, Airport, NaturalReserve, NationalPark, JWTBlacklistedToken
 )
 
 
@@ -27,6 +32,8 @@ class UserAdmin(BaseUserAdmin):
     list_filter = ('is_staff', 'is_active', 'is_verified', 'created_at')
     search_fields = ('email', 'first_name', 'last_name', 'username')
     ordering = ('-created_at',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
@@ -56,6 +63,7 @@ class UserAdmin(BaseUserAdmin):
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'city', 'country', 'has_avatar')
     list_filter = ('country', 'city', 'birth_date')
+    list_select_related = ('user',)
     search_fields = ('user__email', 'user__first_name', 'user__last_name', 'city', 'country')
     readonly_fields = ('user',)
     
@@ -82,6 +90,7 @@ class PasswordResetTokenAdmin(admin.ModelAdmin):
     list_filter = ('is_used', 'created_at', 'expires_at')
     search_fields = ('user__email', 'token')
     ordering = ('-created_at',)
+    list_select_related = ('user',)
     readonly_fields = ('created_at',)
     
     def user_email(self, obj):
@@ -107,7 +116,10 @@ class DroneAdmin(admin.ModelAdmin):
     list_filter = ('drone_type', 'status', 'created_at', 'purchase_date')
     search_fields = ('name', 'user__email', 'serial_number', 'registration_number')
     ordering = ('-created_at',)
-    readonly_fields = ('created_at', 'updated_at')
+    list_select_related = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = ('id', 'created_at', 'updated_at', 'is_maintenance_due', 'age_in_days')
     
     fieldsets = (
         ('Informations de base', {
@@ -120,7 +132,7 @@ class DroneAdmin(admin.ModelAdmin):
             'fields': ('status', 'registration_number', 'insurance_info')
         }),
         ('Maintenance', {
-            'fields': ('maintenance_notes', 'purchase_date', 'last_maintenance', 'next_maintenance')
+            'fields': ('maintenance_notes', 'purchase_date', 'last_maintenance', 'next_maintenance', 'maintenance_interval_hours')
         }),
         ('Média', {
             'fields': ('photo',)
@@ -144,6 +156,64 @@ class DroneAdmin(admin.ModelAdmin):
             return format_html('<span style="color: red; font-weight: bold;">⚠️ Maintenance requise</span>')
         return format_html('<span style="color: green;">✓ OK</span>')
     is_maintenance_due.short_description = 'Maintenance'
+    
+    def age_in_days(self, obj):
+        return obj.age_in_days
+    age_in_days.short_description = 'Âge (jours)'
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_maintenance_status()
+
+
+@admin.register(MaintenanceDueDrone)
+class MaintenanceDueDroneAdmin(admin.ModelAdmin):
+    """
+    Drones de toute la flotte dont la maintenance est due, calculés en une requête
+    """
+    list_display = (
+        'name', 'user', 'status', 'last_maintenance', 'next_maintenance',
+        'flight_hours_since_maintenance', 'maintenance_interval_hours'
+    )
+    list_filter = ('drone_type', 'status')
+    search_fields = ('name', 'user__email', 'serial_number', 'registration_number')
+    ordering = ('next_maintenance',)
+    list_select_related = ('user',)
+    show_full_result_count = False
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).maintenance_due()
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def flight_hours_since_maintenance(self, obj):
+        return round(obj.flight_minutes_since_maintenance / 60, 1)
+    flight_hours_since_maintenance.short_description = 'Heures de vol depuis la maintenance'
+    flight_hours_since_maintenance.admin_order_field = 'flight_minutes_since_maintenance'
+
+
+class DroneFlightAdminForm(forms.ModelForm):
+    """
+    Formulaire d'administration des vols : trace validée comme à l'API
+    """
+    
+    class Meta:
+        model = DroneFlight
+        fields = '__all__'
+    
+    def clean_track(self):
+        from .flight_metrics import parse_track
+        
+        track = self.cleaned_data.get('track')
+        if track:
+            try:
+                parse_track(track)
+            except ValueError as e:
+                raise forms.ValidationError(str(e))
+        return track
 
 
 @admin.register(DroneFlight)
@@ -151,11 +221,16 @@ class DroneFlightAdmin(admin.ModelAdmin):
     """
     Administration of drone flights
     """
-    list_display = ('drone', 'pilot', 'flight_date', 'duration', 'location')
+    form = DroneFlightAdminForm
+    list_display = ('drone', 'pilot', 'flight_date', 'duration', 'location', 'distance_flown', 'max_altitude')
     list_filter = ('flight_date', 'drone__drone_type', 'created_at')
     search_fields = ('drone__name', 'pilot__email', 'location', 'purpose')
     ordering = ('-flight_date',)
-    readonly_fields = ('created_at',)
+    # Drone.__str__ affiche le propriétaire
+    list_select_related = ('drone__user', 'pilot')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = ('id', 'created_at', 'distance_flown', 'max_altitude', 'max_distance_from_home', 'restricted_zone_time')
     
     fieldsets = (
         ('Informations de vol', {
@@ -164,12 +239,22 @@ class DroneFlightAdmin(admin.ModelAdmin):
         ('Détails', {
             'fields': ('purpose', 'weather_conditions', 'notes')
         }),
+        ('Trace GPS', {
+            'fields': ('track', 'distance_flown', 'max_altitude', 'max_distance_from_home', 'restricted_zone_time'),
+            'classes': ('collapse',)
+        }),
         ('Informations système', {
             'fields': ('id', 'created_at'),
             'classes': ('collapse',)
         }),
     )
     
+    def save_model(self, request, obj, form, change):
+        """Recalculer les métriques lorsque la trace ou la durée est modifiée"""
+        if {'track', 'duration'} & set(form.changed_data):
+            obj.set_track(obj.track)
+        super().save_model(request, obj, form, change)
+    
     def drone_name(self, obj):
         return obj.drone.name
     drone_name.short_description = 'Drone'
@@ -179,6 +264,24 @@ class DroneFlightAdmin(admin.ModelAdmin):
     pilot_full_name.short_description = 'Pilote'
 
 
+@admin.register(FlightDailyRollup)
+class FlightDailyRollupAdmin(admin.ModelAdmin):
+    """
+    Consultation des agrégats quotidiens de vols (maintenus automatiquement)
+    """
+    list_display = ('day', 'drone_type', 'location', 'flight_count', 'total_minutes')
+    list_filter = ('drone_type',)
+    search_fields = ('location',)
+    ordering = ('-day',)
+    date_hierarchy = 'day'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(CarouselImage)
 class CarouselImageAdmin(admin.ModelAdmin):
     """
@@ -215,16 +318,112 @@ class CarouselImageAdmin(admin.ModelAdmin):
         return format_html('<span style="color: red;">Aucune image</span>')
     image_preview.short_description = 'Aperçu'
 
+    def changelist_view(self, request, extra_context=None):
+        # Les lignes modifiées via list_editable invalident le carrousel une seule fois
+        with snapshots.batched_invalidation():
+            return super().changelist_view(request, extra_context)
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    """
+    Suivi des téléversements par morceaux
+    """
+    list_display = ('filename', 'target', 'user', 'received_bytes', 'total_size', 'status', 'updated_at')
+    list_filter = ('target', 'status')
+    search_fields = ('filename', 'user__email', 'storage_name')
+    list_select_related = ('user',)
+    readonly_fields = [field.name for field in UploadSession._meta.fields]
+    ordering = ('-created_at',)
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(StoredFile)
+class StoredFileAdmin(admin.ModelAdmin):
+    """
+    Consultation des références aux fichiers médias (maintenues automatiquement)
+    """
+    list_display = ('name', 'reference_count', 'updated_at')
+    search_fields = ('name',)
+    ordering = ('name',)
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class PossibleDuplicateFilter(admin.SimpleListFilter):
+    title = 'doublon possible'
+    parameter_name = 'duplicate'
+
+    def lookups(self, request, model_admin):
+        return (('yes', 'Oui'), ('no', 'Non'))
+
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.exclude(possible_duplicates=[])
+        if self.value() == 'no':
+            return queryset.filter(possible_duplicates=[])
+        return queryset
+
+
+class ModerationAdminMixin:
+    """
+    File de modération des contributions (``is_active=False`` : en attente,
+    affichées en premier) : approbation et rejet par lots
+    """
+    actions = ['approve_selected', 'reject_selected']
+    map_snapshot = None
+
+    @admin.action(description='Approuver la sélection', permissions=['change'])
+    def approve_selected(self, request, queryset):
+        # Une seule requête UPDATE ... WHERE id IN (...) : les coordonnées ne sont pas réécrites
+        count = queryset.filter(is_active=False).update(is_active=True, updated_at=timezone.now())
+        if count:
+            snapshots.invalidate(self.map_snapshot)
+        self.message_user(request, f'{count} élément(s) approuvé(s).', messages.SUCCESS)
+
+    @admin.action(description='Rejeter (supprimer) la sélection', permissions=['delete'])
+    def reject_selected(self, request, queryset):
+        # Les signaux de suppression invalident la carte une fois pour tout le lot
+        with snapshots.batched_invalidation():
+            _, deleted = queryset.delete()
+        count = deleted.get(self.model._meta.label, 0)
+        self.message_user(request, f'{count} élément(s) rejeté(s) et supprimé(s).', messages.SUCCESS)
+
+    def overlap_warning(self, obj):
+        if obj.overlaps_approved:
+            return format_html('<span style="color: orange; font-weight: bold;">⚠️ Chevauche une zone approuvée</span>')
+        return ''
+    overlap_warning.short_description = 'Chevauchement'
+    overlap_warning.admin_order_field = 'overlaps_approved'
+
+    def duplicate_warning(self, obj):
+        if not obj.possible_duplicates:
+            return ''
+        return format_html(
+            '<span style="color: red;">{}</span>',
+            format_html_join(', ', '{} ({} %, {} km)', (
+                (duplicate['name'], round(duplicate['overlap'] * 100), duplicate['distance_km'])
+                for duplicate in obj.possible_duplicates
+            ))
+        )
+    duplicate_warning.short_description = 'Doublons possibles'
+
 
 @admin.register(Airport)
-class AirportAdmin(admin.ModelAdmin):
+class AirportAdmin(ModerationAdminMixin, admin.ModelAdmin):
     """Administration des aéroports et aérodromes"""
-    list_display = ('name', 'city', 'airport_type', 'is_active', 'created_at')
-    list_filter = ('airport_type', 'is_active', 'city', 'created_at')
+    list_display = ('name', 'city', 'airport_type', 'is_active', 'overlap_warning', 'duplicate_warning', 'created_at')
+    list_filter = ('is_active', PossibleDuplicateFilter, 'airport_type', 'city', 'created_at')
     search_fields = ('name', 'city', 'code', 'airport_id')
-    ordering = ('airport_type', 'name')
-    list_editable = ('is_active',)
-    readonly_fields = ('created_at', 'updated_at')
+    ordering = ('is_active', 'airport_type', 'name')
+    map_snapshot = snapshots.AIRPORTS_MAP_SNAPSHOT
+    readonly_fields = ('duplicate_warning', 'created_at', 'updated_at')
     
     fieldsets = (
         ('Informations de base', {
@@ -234,7 +433,7 @@ class AirportAdmin(admin.ModelAdmin):
             'fields': ('latitude', 'longitude', 'radius')
         }),
         ('Détails', {
-            'fields': ('description', 'is_active')
+            'fields': ('description', 'is_active', 'duplicate_warning')
         }),
         ('Métadonnées', {
             'fields': ('created_by', 'created_at', 'updated_at'),
@@ -243,67 +442,82 @@ class AirportAdmin(admin.ModelAdmin):
     )
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('created_by')
+        return super().get_queryset(request).select_related('created_by').with_overlap_warning()
+
+
+class ProtectedAreaAdminMixin(ModerationAdminMixin):
+    """Liste des zones protégées : aperçu et emprise précalculés, polygones non chargés"""
+    map_snapshot = snapshots.PROTECTED_AREAS_MAP_SNAPSHOT
+    readonly_fields = ('geometry_thumbnail', 'vertex_count', 'duplicate_warning', 'created_at', 'updated_at')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('created_by').defer('coordinates').with_overlap_warning()
+
+    def geometry_thumbnail(self, obj):
+        if not obj.geometry_preview:
+            return ''
+        return format_html(
+            '<svg viewBox="-2 -2 {} {}" width="60" height="60">'
+            '<polygon points="{}" fill="#8fbc8f" stroke="#2e7d32" stroke-width="2"/></svg>',
+            PREVIEW_SIZE + 4, PREVIEW_SIZE + 4, obj.geometry_preview
+        )
+    geometry_thumbnail.short_description = 'Aperçu'
 
 
 @admin.register(NaturalReserve)
-class NaturalReserveAdmin(admin.ModelAdmin):
+class NaturalReserveAdmin(ProtectedAreaAdminMixin, admin.ModelAdmin):
     """Administration des réserves naturelles"""
-    list_display = ('name', 'area', 'is_active', 'created_at')
-    list_filter = ('is_active', 'created_at')
+    list_display = (
+        'geometry_thumbnail', 'name', 'area', 'vertex_count', 'is_active', 'overlap_warning', 'duplicate_warning', 'created_at'
+    )
+    list_display_links = ('name',)
+    list_filter = ('is_active', PossibleDuplicateFilter, 'created_at')
     search_fields = ('name', 'area', 'description')
-    ordering = ('name',)
-    list_editable = ('is_active',)
-    readonly_fields = ('created_at', 'updated_at')
+    ordering = ('is_active', 'name')
     
     fieldsets = (
         ('Informations de base', {
             'fields': ('reserve_id', 'name', 'type', 'area', 'description')
         }),
         ('Coordonnées', {
-            'fields': ('coordinates',)
+            'fields': ('coordinates', 'geometry_thumbnail', 'vertex_count')
         }),
         ('Statut', {
-            'fields': ('is_active',)
+            'fields': ('is_active', 'duplicate_warning')
         }),
         ('Métadonnées', {
             'fields': ('created_by', 'created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
     )
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related('created_by')
 
 
 @admin.register(NationalPark)
-class NationalParkAdmin(admin.ModelAdmin):
+class NationalParkAdmin(ProtectedAreaAdminMixin, admin.ModelAdmin):
     """Administration des parcs nationaux"""
-    list_display = ('name', 'area', 'is_active', 'created_at')
-    list_filter = ('is_active', 'created_at')
+    list_display = (
+        'geometry_thumbnail', 'name', 'area', 'vertex_count', 'is_active', 'overlap_warning', 'duplicate_warning', 'created_at'
+    )
+    list_display_links = ('name',)
+    list_filter = ('is_active', PossibleDuplicateFilter, 'created_at')
     search_fields = ('name', 'area', 'description')
-    ordering = ('name',)
-    list_editable = ('is_active',)
-    readonly_fields = ('created_at', 'updated_at')
+    ordering = ('is_active', 'name')
     
     fieldsets = (
         ('Informations de base', {
             'fields': ('park_id', 'name', 'type', 'area', 'description')
         }),
         ('Coordonnées', {
-            'fields': ('coordinates',)
+            'fields': ('coordinates', 'geometry_thumbnail', 'vertex_count')
         }),
         ('Statut', {
-            'fields': ('is_active',)
+            'fields': ('is_active', 'duplicate_warning')
         }),
         ('Métadonnées', {
             'fields': ('created_by', 'created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
     )
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related('created_by')
 
 
 @admin.register(JWTBlacklistedToken)
@@ -312,6 +526,8 @@ class JWTBlacklistedTokenAdmin(admin.ModelAdmin):
     list_filter = ('token_type', 'blacklisted_at', 'expires_at')
     search_fields = ('user_id', 'reason')
     ordering = ('-blacklisted_at',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = ('blacklisted_at',)
     
     fieldsets = (
@@ -0,0 +1,224 @@
+"""
+Vues asynchrones des lectures les plus fréquentes.
+
+Sous ASGI (profil ``config/gunicorn.conf.py``), ces vues n'occupent aucun
+thread pendant l'attente du cache ou de la base : elles utilisent l'ORM et le
+cache asynchrones de Django. Les écritures partageant leur URL restent
+confiées aux vues DRF synchrones (``with_sync_fallback``).
+
+DRF ne gérant pas les vues asynchrones, l'authentification (classes de
+``DEFAULT_AUTHENTICATION_CLASSES``, dans l'ordre) et les réponses d'erreur
+reproduisent celles des vues DRF.
+"""
+
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_safe
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .authentication import JWTCookieAuthentication, aget_cached_user
+from .metrics import query_budget, timed
+from .models import User
+from .routers import replica_reads
+from .serializers import DroneFlightSerializer, UserDetailSerializer
+from .snapshots import (
+    AIRPORTS_MAP_SNAPSHOT, CAROUSEL_SNAPSHOT, PROTECTED_AREAS_MAP_SNAPSHOT,
+    abuild_airports_map_snapshot, abuild_carousel_snapshot, abuild_protected_areas_map_snapshot,
+    aget_snapshot, snapshot_response
+)
+from .views import CarouselImageViewSet, DroneFlightViewSet, flight_queryset
+
+logger = logging.getLogger(__name__)
+
+
+def json_response(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def not_authenticated():
+    """Réponse 401 identique à celle des vues DRF"""
+    response = json_response({'detail': str(NotAuthenticated.default_detail)}, status=401)
+    response['WWW-Authenticate'] = JWTCookieAuthentication().authenticate_header(None)
+    return response
+
+
+async def _ajwt_user(request):
+    """Utilisateur du cookie JWT, lu dans le cache sans thread"""
+    access_token = request.COOKIES.get('access_token')
+    if not access_token:
+        return None
+    try:
+        validated_token = JWTCookieAuthentication().get_validated_token(access_token)
+        user = await aget_cached_user(validated_token.get('user_id'))
+        return user if user.is_active else None
+    except (InvalidToken, TokenError) as e:
+        logger.warning("Token JWT invalide: %s", e)
+    except User.DoesNotExist:
+        logger.warning("Token JWT invalide: utilisateur non trouvé")
+    return None
+
+
+async def aauthenticate(request):
+    """
+    Utilisateur authentifié par la première classe de
+    ``DEFAULT_AUTHENTICATION_CLASSES`` qui le reconnaît, sinon None
+
+    Le cookie JWT et la session ont un chemin asynchrone ; les autres classes
+    (authentification HTTP Basic, ...) sont appelées dans un thread. Comme
+    dans DRF, des identifiants refusés arrêtent la recherche.
+    """
+    with timed('auth_time'):
+        drf_request = None
+        for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+            if issubclass(authentication_class, JWTCookieAuthentication):
+                user = await _ajwt_user(request)
+            elif issubclass(authentication_class, SessionAuthentication):
+                user = await request.auser()
+                user = user if user.is_authenticated and user.is_active else None
+                if user is not None:
+                    # Profil chargé avec l'utilisateur : aucune requête synchrone à la sérialisation
+                    user = await aget_cached_user(user.pk)
+            else:
+                drf_request = drf_request or Request(request)
+                try:
+                    result = await sync_to_async(authentication_class().authenticate)(drf_request)
+                except AuthenticationFailed as e:
+                    logger.warning("Authentification refusée: %s", e.detail)
+                    return None
+                user = await aget_cached_user(result[0].pk) if result else None
+            if user is not None:
+                return user
+        return None
+
+
+def with_sync_fallback(async_view, sync_view):
+    """
+    Vue servant GET et HEAD avec ``async_view`` et confiant les autres
+    méthodes de la même URL à la vue DRF synchrone ``sync_view``
+    """
+    @csrf_exempt
+    async def view(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await async_view(request, *args, **kwargs)
+        return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+    view.query_budget = getattr(async_view, 'query_budget', None)
+    view.replica_reads = getattr(async_view, 'replica_reads', None)
+    view.sync_fallback = sync_view
+    view.__name__ = async_view.__name__
+    view.__doc__ = async_view.__doc__
+    return view
+
+
+@query_budget(2)
+@require_safe
+async def get_airports_for_map(request):
+    """
+    Récupère tous les aéroports et aérodromes approuvés pour l'affichage sur la carte
+    """
+    try:
+        snapshot = await aget_snapshot(AIRPORTS_MAP_SNAPSHOT, abuild_airports_map_snapshot)
+        return snapshot_response(request, snapshot)
+    except Exception as e:
+        logger.error("Erreur lors de la récupération des aéroports: %s", e)
+        return json_response({
+            'error': 'Erreur lors de la récupération des données',
+            'detail': str(e)
+        }, status=500)
+
+
+@query_budget(3)
+@require_safe
+async def get_protected_areas_for_map(request):
+    """
+    Récupère toutes les zones protégées approuvées pour l'affichage sur la carte
+    """
+    try:
+        snapshot = await aget_snapshot(PROTECTED_AREAS_MAP_SNAPSHOT, abuild_protected_areas_map_snapshot)
+        return snapshot_response(request, snapshot)
+    except Exception as e:
+        logger.error("Erreur lors de la récupération des zones protégées: %s", e)
+        return json_response({
+            'error': 'Erreur lors de la récupération des zones protégées',
+            'detail': str(e)
+        }, status=500)
+
+
+@query_budget(2)
+@require_safe
+async def check_auth_status(request):
+    """
+    Vérifier le statut d'authentification de l'utilisateur
+    """
+    user = await aauthenticate(request)
+    if user is None:
+        return not_authenticated()
+    return json_response({
+        'is_authenticated': True,
+        'user': UserDetailSerializer(user).data,
+        'success': True
+    })
+
+
+@query_budget(2)
+async def _carousel_list(request):
+    """Liste publique des images de carrousel actives (instantané pré-encodé + ETag)"""
+    try:
+        snapshot = await aget_snapshot(CAROUSEL_SNAPSHOT, abuild_carousel_snapshot)
+        return snapshot_response(request, snapshot)
+    except Exception as e:
+        logger.error("Erreur lors de la récupération des images de carrousel: %s", e)
+        return json_response({'error': 'Erreur lors de la récupération des images'}, status=500)
+
+
+@replica_reads
+@query_budget(3)
+async def _flight_list(request):
+    """Vols des drones de l'utilisateur connecté"""
+    user = await aauthenticate(request)
+    if user is None:
+        return not_authenticated()
+    try:
+        queryset = flight_queryset(user, ordering=request.GET.get('ordering'))
+        flights = [flight async for flight in queryset]
+        return json_response(DroneFlightSerializer(flights, many=True).data)
+    except Exception as e:
+        logger.error("Erreur lors de la récupération de la liste des vols: %s", e)
+        return json_response({'error': 'Erreur lors de la récupération des vols'}, status=500)
+
+
+@replica_reads
+@query_budget(3)
+@require_safe
+async def recent_flights(request):
+    """Dix derniers vols des drones de l'utilisateur connecté"""
+    user = await aauthenticate(request)
+    if user is None:
+        return not_authenticated()
+    try:
+        queryset = flight_queryset(user).order_by('-flight_date')[:10]
+        flights = [flight async for flight in queryset]
+        return json_response({
+            'recent_flights': DroneFlightSerializer(flights, many=True).data,
+            'status': 'success'
+        })
+    except Exception as e:
+        logger.error("Erreur lors de la récupération des vols récents: %s", e)
+        return json_response({'error': 'Erreur lors de la récupération des vols récents'}, status=500)
+
+
+# Même URL que les routes DRF : création confiée aux ViewSets synchrones
+carousel_list = with_sync_fallback(
+    _carousel_list, CarouselImageViewSet.as_view({'get': 'list', 'post': 'create'})
+)
+flight_list = with_sync_fallback(
+    _flight_list, DroneFlightViewSet.as_view({'get': 'list', 'post': 'create'})
+)
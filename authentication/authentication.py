@@ -3,14 +3,89 @@ from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.fields.files import FieldFile
 import jwt
 from datetime import datetime, timedelta
 import logging
 
+from .caching import user_cache
+from .models import UserProfile
+
 logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
+
+# Colonnes mises en cache : celles de l'authentification, des permissions et de
+# UserDetailSerializer. Jamais le hachage du mot de passe : il reste différé et
+# n'est lu en base que par check_password.
+CACHED_USER_FIELDS = (
+    'id', 'email', 'username', 'first_name', 'last_name', 'phone', 'is_active', 'is_staff',
+    'is_superuser', 'is_verified', 'last_login', 'date_joined', 'created_at', 'updated_at',
+)
+CACHED_PROFILE_FIELDS = ('id', 'user_id', 'avatar', 'avatar_variants', 'bio', 'city', 'country')
+
+
+def _columns(model, names):
+    # Ordre des colonnes du modèle, attendu par Model.from_db
+    return tuple(field.attname for field in model._meta.concrete_fields if field.attname in names)
+
+
+def _users():
+    # Lus sur le primaire : un réplica en retard figerait une ligne périmée dans le cache
+    return User.objects.using(DEFAULT_DB_ALIAS).select_related('profile').only(
+        *CACHED_USER_FIELDS, *(f'profile__{name}' for name in CACHED_PROFILE_FIELDS)
+    )
+
+
+def _column(instance, name):
+    value = getattr(instance, name)
+    # Fichiers : le nom enregistré en base, pas l'objet FieldFile
+    return value.name if isinstance(value, FieldFile) else value
+
+
+def _cache_entry(user):
+    """Valeurs mises en cache pour ``user`` : colonnes de l'utilisateur et du profil"""
+    profile = getattr(user, 'profile', None)
+    return (
+        tuple(_column(user, name) for name in _columns(User, CACHED_USER_FIELDS)),
+        None if profile is None else tuple(
+            _column(profile, name) for name in _columns(UserProfile, CACHED_PROFILE_FIELDS)
+        ),
+    )
+
+
+def _cached_user(entry):
+    """
+    Nouvelle instance reconstruite depuis le cache, à traiter en lecture seule :
+    les autres processus ne voient une invalidation qu'après
+    ``LOCAL_CACHE_SYNC_INTERVAL`` secondes. Les vues qui modifient
+    l'utilisateur le relisent en base avant ``save()``.
+    """
+    user_values, profile_values = entry
+    user = User.from_db(DEFAULT_DB_ALIAS, _columns(User, CACHED_USER_FIELDS), user_values)
+    profile = None
+    if profile_values is not None:
+        profile = UserProfile.from_db(
+            DEFAULT_DB_ALIAS, _columns(UserProfile, CACHED_PROFILE_FIELDS), profile_values
+        )
+        UserProfile.user.field.set_cached_value(profile, user)
+    User.profile.related.set_cached_value(user, profile)
+    return user
+
+
+def get_cached_user(user_id):
+    """Utilisateur (et son profil) depuis le cache à deux niveaux"""
+    return _cached_user(user_cache.get_or_set(str(user_id), lambda: _cache_entry(_users().get(id=user_id))))
+
+
+async def aget_cached_user(user_id):
+    async def build():
+        return _cache_entry(await _users().aget(id=user_id))
+    return _cached_user(await user_cache.aget_or_set(str(user_id), build))
+
+
 class CustomJWTAuthentication(JWTAuthentication):
     """
     Authentification JWT personnalisée avec gestion des cookies HttpOnly
@@ -39,10 +114,10 @@ class CustomJWTAuthentication(JWTAuthentication):
             return (user, validated_token)
             
         except (InvalidToken, TokenError) as e:
-            logger.warning(f"Token JWT invalide: {e}")
+            logger.warning("Token JWT invalide: %s", e)
             return None
         except Exception as e:
-            logger.error(f"Erreur lors de l'authentification JWT: {e}")
+            logger.error("Erreur lors de l'authentification JWT: %s", e)
             return None
     
     def get_validated_token(self, raw_token):
@@ -83,13 +158,13 @@ class CustomJWTAuthentication(JWTAuthentication):
             if user_id is None:
                 raise InvalidToken("Token ne contient pas d'ID utilisateur")
             
-            user = User.objects.get(id=user_id)
+            user = get_cached_user(user_id)
             return user
             
         except User.DoesNotExist:
             raise InvalidToken("Utilisateur non trouvé")
         except Exception as e:
-            logger.error(f"Erreur lors de la récupération de l'utilisateur: {e}")
+            logger.error("Erreur lors de la récupération de l'utilisateur: %s", e)
             raise InvalidToken("Erreur lors de la récupération de l'utilisateur")
 
 
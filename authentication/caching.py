@@ -0,0 +1,356 @@
+"""
+Cache à deux niveaux pour les objets lus souvent et rarement modifiés.
+
+Devant le cache partagé (Redis en production), chaque processus garde un
+cache LRU borné (``LOCAL_CACHE_MAX_ENTRIES`` entrées par espace de noms)
+dont les entrées expirent après ``local_timeout`` secondes : un succès local
+ne coûte ni aller-retour réseau ni désérialisation.
+
+Invalidation : chaque clé a un numéro de version dans le cache partagé et
+les valeurs y sont enregistrées avec la version lue avant leur calcul ; une
+valeur calculée avant une invalidation n'est donc jamais servie. Chaque
+invalidation incrémente aussi le compteur de l'espace de noms, relu par les
+autres processus au plus toutes les ``LOCAL_CACHE_SYNC_INTERVAL`` secondes :
+ils vident alors leur cache local pour cet espace de noms.
+
+Contre l'effet de meute, une seule recomputation a lieu à la fois par clé :
+dans le processus, les autres demandes attendent son résultat ; entre
+processus, un verrou dans le cache partagé fait attendre les autres
+processus jusqu'à ``STAMPEDE_WAIT`` secondes avant qu'ils ne calculent
+eux-mêmes.
+"""
+
+import asyncio
+import copy
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+# Durée maximale d'un calcul protégé par le verrou partagé (s)
+LOCK_TIMEOUT = 30
+# Attente maximale du calcul d'un autre processus (s), et intervalle de relecture
+STAMPEDE_WAIT = 5
+STAMPEDE_POLL_INTERVAL = 0.05
+
+_MISSING = object()
+
+# Caches déclarés, par espace de noms (métriques, remise à zéro dans les tests)
+_caches = {}
+
+
+class LocalLRU:
+    """Cache LRU du processus, borné en nombre d'entrées, avec expiration"""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return _MISSING
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TieredCache:
+    """
+    Cache local LRU devant le cache partagé, pour un espace de noms
+
+    ``copy`` est appliquée aux valeurs du cache local avant de les rendre :
+    nécessaire pour les objets modifiables (instances de modèles) partagés
+    entre les requêtes du processus.
+    """
+
+    def __init__(self, namespace, timeout=3600, local_timeout=60, max_entries=None, copy=None):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.copy = copy
+        self.local = LocalLRU(
+            max_entries or getattr(settings, 'LOCAL_CACHE_MAX_ENTRIES', 1000), local_timeout
+        )
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.builds = 0
+        self.stampede_waits = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._generation = None
+        self._next_sync = 0
+        self._local_generation = 0
+        _caches[namespace] = self
+
+    def _data_key(self, key):
+        return f'tiered:{self.namespace}:{key}'
+
+    def _version_key(self, key):
+        return f'tiered-version:{self.namespace}:{key}'
+
+    def _lock_key(self, key):
+        return f'tiered-lock:{self.namespace}:{key}'
+
+    @property
+    def _generation_key(self):
+        return f'tiered-generation:{self.namespace}'
+
+    def _result(self, value):
+        return self.copy(value) if self.copy is not None else value
+
+    def _count_shared(self, hit):
+        with self._lock:
+            if hit:
+                self.shared_hits += 1
+            else:
+                self.shared_misses += 1
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _sync_due(self):
+        now = time.monotonic()
+        if now < self._next_sync:
+            return False
+        self._next_sync = now + getattr(settings, 'LOCAL_CACHE_SYNC_INTERVAL', 1)
+        return True
+
+    def _apply_generation(self, generation):
+        """Vider le cache local si un autre processus a invalidé une clé"""
+        if generation != self._generation:
+            self.local.clear()
+            self._generation = generation
+
+    def _shared_entry(self, key, entries):
+        """(version courante, valeur ou _MISSING) depuis un ``get_many``"""
+        version = entries.get(self._version_key(key))
+        entry = entries.get(self._data_key(key))
+        if version is not None and entry is not None and entry[0] == version:
+            return version, entry[1]
+        return version, _MISSING
+
+    def get_or_set(self, key, builder):
+        """Valeur de ``key``, calculée par ``builder()`` si aucun niveau ne l'a"""
+        if self._sync_due():
+            self._apply_generation(cache.get(self._generation_key))
+
+        value = self.local.get(key)
+        if value is not _MISSING:
+            return self._result(value)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            # Calcul déjà en cours dans le processus : on attend son résultat
+            return self._result(future.result(timeout=LOCK_TIMEOUT))
+
+        try:
+            value = self._load(key, builder)
+            future.set_result(value)
+            return self._result(value)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _load(self, key, builder):
+        local_generation = self._local_generation
+        keys = [self._version_key(key), self._data_key(key)]
+        version, value = self._shared_entry(key, cache.get_many(keys))
+        self._count_shared(value is not _MISSING)
+
+        if value is _MISSING:
+            if version is None:
+                version = self._initial_version(key)
+            if cache.add(self._lock_key(key), 1, LOCK_TIMEOUT):
+                try:
+                    value = self._build(key, version, builder)
+                finally:
+                    cache.delete(self._lock_key(key))
+            else:
+                value = self._wait_for_build(key, version, keys)
+                if value is _MISSING:
+                    value = self._build(key, version, builder)
+
+        if local_generation == self._local_generation:
+            self.local.set(key, value)
+        return value
+
+    def _initial_version(self, key):
+        # Version initiale unique pour ne pas réutiliser un ancien numéro après éviction
+        version = time.time_ns()
+        if not cache.add(self._version_key(key), version, None):
+            version = cache.get(self._version_key(key), version)
+        return version
+
+    def _build(self, key, version, builder):
+        value = builder()
+        self._count('builds')
+        cache.set(self._data_key(key), (version, value), self.timeout)
+        return value
+
+    def _wait_for_build(self, key, version, keys):
+        """Attendre la valeur calculée par le processus qui détient le verrou"""
+        self._count('stampede_waits')
+        deadline = time.monotonic() + STAMPEDE_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(STAMPEDE_POLL_INTERVAL)
+            current, value = self._shared_entry(key, cache.get_many(keys))
+            if value is not _MISSING or current != version:
+                return value
+            if not cache.get(self._lock_key(key)):
+                break
+        return _MISSING
+
+    async def aget_or_set(self, key, abuilder):
+        """Version asynchrone de ``get_or_set`` (``abuilder`` est une coroutine)"""
+        if self._sync_due():
+            self._apply_generation(await cache.aget(self._generation_key))
+
+        value = self.local.get(key)
+        if value is not _MISSING:
+            return self._result(value)
+
+        loop = asyncio.get_running_loop()
+        inflight_key = (loop, key)
+        future = self._inflight.get(inflight_key)
+        if future is not None:
+            return self._result(await asyncio.shield(future))
+
+        future = self._inflight[inflight_key] = loop.create_future()
+        try:
+            value = await self._aload(key, abuilder)
+            future.set_result(value)
+            return self._result(value)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Exception déjà propagée par l'appelant : pas d'avertissement si personne n'attendait
+            future.exception()
+            raise
+        finally:
+            del self._inflight[inflight_key]
+
+    async def _aload(self, key, abuilder):
+        local_generation = self._local_generation
+        keys = [self._version_key(key), self._data_key(key)]
+        version, value = self._shared_entry(key, await cache.aget_many(keys))
+        self._count_shared(value is not _MISSING)
+
+        if value is _MISSING:
+            if version is None:
+                version = time.time_ns()
+                if not await cache.aadd(self._version_key(key), version, None):
+                    version = await cache.aget(self._version_key(key), version)
+            if await cache.aadd(self._lock_key(key), 1, LOCK_TIMEOUT):
+                try:
+                    value = await self._abuild(key, version, abuilder)
+                finally:
+                    await cache.adelete(self._lock_key(key))
+            else:
+                value = await self._await_build(key, version, keys)
+                if value is _MISSING:
+                    value = await self._abuild(key, version, abuilder)
+
+        if local_generation == self._local_generation:
+            self.local.set(key, value)
+        return value
+
+    async def _abuild(self, key, version, abuilder):
+        value = await abuilder()
+        self._count('builds')
+        await cache.aset(self._data_key(key), (version, value), self.timeout)
+        return value
+
+    async def _await_build(self, key, version, keys):
+        self._count('stampede_waits')
+        deadline = time.monotonic() + STAMPEDE_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(STAMPEDE_POLL_INTERVAL)
+            current, value = self._shared_entry(key, await cache.aget_many(keys))
+            if value is not _MISSING or current != version:
+                return value
+            if not await cache.aget(self._lock_key(key)):
+                break
+        return _MISSING
+
+    def invalidate(self, *keys):
+        """Invalider des clés dans tous les processus ; recalculées à la prochaine lecture"""
+        self._invalidate(keys)
+        if connection.in_atomic_block:
+            # Une lecture concurrente a pu recalculer l'ancienne valeur avant la validation
+            transaction.on_commit(lambda: self._invalidate(keys))
+
+    def _invalidate(self, keys):
+        for key in keys:
+            with self._lock:
+                self._local_generation += 1
+            self.local.delete(key)
+            try:
+                cache.incr(self._version_key(key))
+            except ValueError:
+                cache.set(self._version_key(key), time.time_ns(), None)
+        try:
+            cache.incr(self._generation_key)
+        except ValueError:
+            cache.set(self._generation_key, time.time_ns(), None)
+
+    def clear_local(self):
+        self.local.clear()
+        self._generation = None
+        self._next_sync = 0
+
+
+def tiered_caches():
+    return dict(_caches)
+
+
+def clear_local_caches():
+    """Vider les caches locaux du processus (tests, après un ``cache.clear()``)"""
+    for tiered in _caches.values():
+        tiered.clear_local()
+
+
+# Utilisateurs authentifiés avec leur profil (``authentication.authentication``) :
+# relus à chaque requête, rarement modifiés ; invalidés par les signaux. Seules
+# les colonnes utiles sont mises en cache (jamais le hachage du mot de passe)
+user_cache = TieredCache('users', timeout=600, local_timeout=60, copy=copy.deepcopy)
@@ -0,0 +1,189 @@
+"""
+Compression des réponses de l'API (zstd, brotli ou gzip selon ``Accept-Encoding``).
+
+Les réponses pré-encodées (instantanés de la carte et du carrousel,
+``snapshots.snapshot_response``) sont marquées ``precompress`` : leur corps
+compressé est conservé dans le cache à deux niveaux sous la clé
+« codage:ETag ». L'ETag étant l'empreinte du contenu, chaque variante n'est
+compressée qu'une fois par version des données, au niveau le plus élevé.
+Les autres réponses sont compressées à la volée, à un niveau rapide, à
+partir de ``COMPRESSION_MIN_SIZE`` octets.
+
+brotli (paquet ``brotli``) et zstd (paquet ``zstandard``) sont installés
+par ``requirements.txt`` ; s'ils manquent, seul gzip est proposé. Contre l'attaque BREACH, les réponses qui
+posent des cookies (jetons de connexion) et les pages HTML (jeton CSRF de
+l'administration) ne sont jamais compressées à la volée.
+"""
+
+import functools
+import gzip
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from .caching import TieredCache
+from .metrics import registry
+
+# Niveaux de compression : (à la volée, pré-compressée)
+LEVELS = {
+    'gzip': (6, 9),
+    'br': (5, 11),
+    'zstd': (3, 19),
+}
+
+COMPRESSIBLE_CONTENT_TYPES = (
+    'application/json', 'application/javascript', 'application/xml', 'application/msgpack', 'image/svg+xml',
+)
+
+# Variantes compressées des instantanés, indexées par codage et ETag
+compressed_cache = TieredCache('compressed', timeout=24 * 3600, local_timeout=300)
+
+
+@functools.cache
+def available_codecs():
+    """Codage -> fonction ``compress(data, level)`` des bibliothèques installées"""
+    codecs = {'gzip': lambda data, level: gzip.compress(data, compresslevel=level, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        pass
+    else:
+        codecs['br'] = lambda data, level: brotli.compress(data, quality=level)
+    try:
+        import zstandard
+    except ImportError:
+        pass
+    else:
+        codecs['zstd'] = lambda data, level: zstandard.ZstdCompressor(level=level).compress(data)
+    return codecs
+
+
+def compress(encoding, data, precompressed=False):
+    dynamic_level, precompressed_level = LEVELS[encoding]
+    return available_codecs()[encoding](data, precompressed_level if precompressed else dynamic_level)
+
+
+def parse_accept_encoding(header):
+    """Qualité de chaque codage d'un en-tête ``Accept-Encoding``"""
+    qualities = {}
+    for item in header.split(','):
+        name, _, parameters = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for parameter in parameters.split(';'):
+            key, _, value = parameter.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+    return qualities
+
+
+def choose_encoding(header):
+    """
+    Codage à utiliser pour un ``Accept-Encoding`` : la meilleure qualité,
+    puis l'ordre de ``COMPRESSION_ENCODINGS`` ; None si aucun ne convient
+    """
+    qualities = parse_accept_encoding(header)
+    codecs = available_codecs()
+    best, best_quality = None, 0.0
+    for encoding in getattr(settings, 'COMPRESSION_ENCODINGS', ['zstd', 'br', 'gzip']):
+        if encoding not in codecs:
+            continue
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type):
+    media_type = content_type.split(';')[0].strip().lower()
+    return (
+        media_type.startswith('text/') or media_type.endswith('+json')
+        or media_type in COMPRESSIBLE_CONTENT_TYPES
+    )
+
+
+class CompressionMiddleware:
+    """
+    Compresser les réponses ; variantes des réponses marquées ``precompress``
+    conservées par ETag
+
+    Synchrone ou asynchrone selon la pile, comme ``RequestMetricsMiddleware``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        response = self.get_response(request)
+        encoding = self._encoding(request, response)
+        if encoding is None:
+            return response
+        if self._precompressible(response):
+            content = response.content
+            body = compressed_cache.get_or_set(
+                f'{encoding}:{response["ETag"]}', lambda: compress(encoding, content, precompressed=True)
+            )
+            return self._apply(response, encoding, body, 'precompressed')
+        return self._apply(response, encoding, compress(encoding, response.content), 'dynamic')
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        encoding = self._encoding(request, response)
+        if encoding is None:
+            return response
+        if self._precompressible(response):
+            # Niveau maximal : hors de la boucle d'événements
+            builder = sync_to_async(
+                functools.partial(compress, encoding, response.content, precompressed=True), thread_sensitive=False
+            )
+            body = await compressed_cache.aget_or_set(f'{encoding}:{response["ETag"]}', builder)
+            return self._apply(response, encoding, body, 'precompressed')
+        return self._apply(response, encoding, compress(encoding, response.content), 'dynamic')
+
+    @staticmethod
+    def _precompressible(response):
+        return getattr(response, 'precompress', False) and response.has_header('ETag')
+
+    def _encoding(self, request, response):
+        """Codage de la réponse, ou None si elle reste telle quelle"""
+        if response.streaming or response.status_code != 200 or response.has_header('Content-Encoding'):
+            return None
+        if not is_compressible(response.get('Content-Type', '')):
+            return None
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+            return None
+        if not self._precompressible(response) and (
+            response.cookies or response['Content-Type'].startswith('text/html')
+        ):
+            return None
+        return choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+
+    @staticmethod
+    def _apply(response, encoding, body, mode):
+        if len(body) >= len(response.content):
+            return response
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        # Représentation différente : ETag faible, comme GZipMiddleware
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        registry.increment('api_compressed_responses_total', {'encoding': encoding, 'mode': mode})
+        return response
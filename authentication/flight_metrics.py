@@ -0,0 +1,140 @@
+"""
+Calcul des métriques dérivées d'un vol à partir de sa trace GPS.
+
+Une trace est une liste de points ``[lat, lng]``, ``[lat, lng, altitude]`` ou
+``[lat, lng, altitude, temps]`` où l'altitude est en mètres et le temps en
+secondes depuis le décollage. Les calculs sont vectorisés avec NumPy afin
+qu'une trace de plusieurs dizaines de milliers de points soit traitée en
+quelques millisecondes au moment de l'ingestion.
+"""
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Nombre maximal de points acceptés pour une trace
+MAX_TRACK_POINTS = 200_000
+
+# Taille des blocs de points pour le calcul des distances aux zones
+ZONE_CHUNK_SIZE = 4096
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """
+    Distance orthodromique (km) entre deux séries de points en degrés
+    """
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def parse_track(track):
+    """
+    Convertir une trace JSON en tableau NumPy (n, 4) : lat, lng, altitude, temps
+
+    Les colonnes absentes valent NaN. Lève ValueError si la trace est invalide.
+    """
+    if not isinstance(track, (list, tuple)) or len(track) < 2:
+        raise ValueError("La trace doit contenir au moins 2 points")
+    if len(track) > MAX_TRACK_POINTS:
+        raise ValueError(f"La trace ne peut pas dépasser {MAX_TRACK_POINTS} points")
+
+    width = len(track[0]) if isinstance(track[0], (list, tuple)) else 0
+    if width not in (2, 3, 4):
+        raise ValueError("Chaque point doit être [lat, lng], [lat, lng, altitude] ou [lat, lng, altitude, temps]")
+
+    try:
+        points = np.asarray(track, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError("Tous les points de la trace doivent avoir le même format numérique")
+
+    if points.ndim != 2 or points.shape[1] != width:
+        raise ValueError("Tous les points de la trace doivent avoir le même nombre de valeurs")
+    if not np.isfinite(points).all():
+        raise ValueError("La trace contient des valeurs non numériques")
+
+    lat, lng = points[:, 0], points[:, 1]
+    if ((lat < -90) | (lat > 90)).any():
+        raise ValueError("La latitude doit être comprise entre -90 et 90")
+    if ((lng < -180) | (lng > 180)).any():
+        raise ValueError("La longitude doit être comprise entre -180 et 180")
+    if width == 4 and (np.diff(points[:, 3]) < 0).any():
+        raise ValueError("Les temps de la trace doivent être croissants")
+
+    result = np.full((len(points), 4), np.nan)
+    result[:, :width] = points
+    return result
+
+
+def _point_times(points, duration_minutes):
+    """
+    Temps (s) de chaque point ; répartis uniformément sur la durée du vol à défaut
+    """
+    times = points[:, 3]
+    if not np.isnan(times).any():
+        return times
+    total = (duration_minutes or 0) * 60
+    return np.linspace(0.0, float(total), num=len(points))
+
+
+def _inside_zones_mask(lat, lng, zones):
+    """
+    Masque des points situés dans au moins une zone circulaire (lat, lng, rayon km)
+    """
+    inside = np.zeros(len(lat), dtype=bool)
+    if zones is None or len(zones) == 0:
+        return inside
+
+    zone_lat = zones[:, 0][np.newaxis, :]
+    zone_lng = zones[:, 1][np.newaxis, :]
+    zone_radius = zones[:, 2][np.newaxis, :]
+
+    for start in range(0, len(lat), ZONE_CHUNK_SIZE):
+        stop = start + ZONE_CHUNK_SIZE
+        distances = haversine_km(
+            lat[start:stop, np.newaxis], lng[start:stop, np.newaxis],
+            zone_lat, zone_lng
+        )
+        inside[start:stop] = (distances <= zone_radius).any(axis=1)
+    return inside
+
+
+def compute_flight_metrics(track, duration_minutes=None, restricted_zones=None):
+    """
+    Calculer les métriques d'un vol à partir de sa trace
+
+    ``restricted_zones`` est un tableau (m, 3) de zones circulaires
+    ``[lat, lng, rayon_km]``. Le temps passé en zone réglementée est la somme
+    des intervalles dont le point de départ se trouve dans une zone.
+    """
+    points = parse_track(track)
+    lat, lng = points[:, 0], points[:, 1]
+
+    steps = haversine_km(lat[:-1], lng[:-1], lat[1:], lng[1:])
+    from_home = haversine_km(lat[0], lng[0], lat, lng)
+
+    altitudes = points[:, 2]
+    max_altitude = None if np.isnan(altitudes).all() else float(np.nanmax(altitudes))
+
+    times = _point_times(points, duration_minutes)
+    inside = _inside_zones_mask(lat, lng, restricted_zones)
+    restricted_time = float(np.diff(times)[inside[:-1]].sum())
+
+    return {
+        'distance_flown': round(float(steps.sum()), 3),
+        'max_altitude': max_altitude,
+        'max_distance_from_home': round(float(from_home.max()), 3),
+        'restricted_zone_time': int(round(restricted_time)),
+    }
+
+
+def restricted_zones_from_airports():
+    """
+    Zones réglementées actives sous forme de tableau (m, 3) : lat, lng, rayon km
+    """
+    from .models import Airport
+
+    rows = Airport.objects.filter(is_active=True).values_list('latitude', 'longitude', 'radius')
+    return np.array([[float(lat), float(lng), float(radius)] for lat, lng, radius in rows]).reshape(-1, 3)
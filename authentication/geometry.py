@@ -0,0 +1,454 @@
+"""
+Géométrie des zones protégées (polygones ``[[lat, lng], ...]``).
+
+L'emprise (boîte englobante) et un aperçu simplifié sont calculés une fois,
+à l'enregistrement des coordonnées, et stockés avec la zone : la file de
+modération les affiche et détecte les chevauchements par une requête sur
+les emprises, sans charger les polygones complets.
+
+Doublons : à la soumission d'une zone, les zones existantes dont l'emprise
+recoupe la sienne sont lues par index (``min_latitude`` borné par
+``ZONE_MAX_SPAN_DEGREES``, la hauteur maximale d'une zone), puis comparées :
+part de la plus petite zone couverte par l'intersection (estimée sur une
+grille de points) et distance entre les centroïdes. Les quasi-doublons sont
+enregistrés dans ``possible_duplicates`` pour le modérateur.
+
+Validation : un contour soumis est vérifié en bloc (NumPy) puis réparé
+(``repair_ring``) : sommets répétés retirés, anneau fermé, sens
+trigonométrique (RFC 7946). Les contours qui se recoupent ou reviennent sur
+eux-mêmes sont refusés ; les recoupements sont cherchés par balayage
+(Shamos–Hoey, O(n log n)) pour traiter des frontières de 100 000 sommets
+dans le temps d'une requête.
+"""
+
+import math
+
+import numpy as np
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Abs
+
+from .flight_metrics import haversine_km
+
+# Aperçu : polygone simplifié dans un carré de PREVIEW_SIZE unités (SVG)
+PREVIEW_SIZE = 100
+PREVIEW_MAX_POINTS = 64
+
+# Côté de la grille d'estimation de l'aire d'intersection
+OVERLAP_GRID_SIZE = 64
+
+# Zones candidates comparées au plus par modèle
+DUPLICATE_MAX_CANDIDATES = 50
+
+# 1° de latitude ≈ 111 km
+KM_PER_DEGREE = 111.0
+
+
+def polygon_points(coordinates):
+    """Tableau NumPy (n, 2) lat, lng ; lève ValueError si les coordonnées sont invalides"""
+    if not isinstance(coordinates, (list, tuple)) or len(coordinates) < 3:
+        raise ValueError("Un polygone doit contenir au moins 3 points")
+    try:
+        points = np.asarray(coordinates, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError("Chaque coordonnée doit être [lat, lng]")
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError("Chaque coordonnée doit être [lat, lng]")
+    if not np.isfinite(points).all():
+        raise ValueError("Les coordonnées contiennent des valeurs non numériques")
+    return points
+
+
+def bounding_box(points):
+    """(lat min, lat max, lng min, lng max)"""
+    lat, lng = points[:, 0], points[:, 1]
+    return float(lat.min()), float(lat.max()), float(lng.min()), float(lng.max())
+
+
+def preview_points(points, size=PREVIEW_SIZE, max_points=PREVIEW_MAX_POINTS):
+    """
+    Attribut ``points`` d'un ``<polygon>`` SVG : au plus ``max_points``
+    sommets, nord en haut, proportions conservées
+    """
+    step = math.ceil(len(points) / max_points)
+    sampled = points[::step]
+    min_lat, max_lat, min_lng, max_lng = bounding_box(points)
+    span = max(max_lat - min_lat, max_lng - min_lng) or 1.0
+    x = (sampled[:, 1] - min_lng) * size / span
+    y = (max_lat - sampled[:, 0]) * size / span
+    return ' '.join(f'{a:.1f},{b:.1f}' for a, b in zip(x, y))
+
+
+def geometry_summary(coordinates):
+    """
+    Valeurs des champs d'emprise et d'aperçu d'une zone ; vides si les
+    coordonnées sont invalides
+    """
+    try:
+        points = polygon_points(coordinates)
+    except ValueError:
+        return {
+            'min_latitude': None, 'max_latitude': None, 'min_longitude': None, 'max_longitude': None,
+            'vertex_count': 0, 'geometry_preview': '',
+        }
+    min_lat, max_lat, min_lng, max_lng = bounding_box(points)
+    return {
+        'min_latitude': min_lat,
+        'max_latitude': max_lat,
+        'min_longitude': min_lng,
+        'max_longitude': max_lng,
+        'vertex_count': len(points),
+        'geometry_preview': preview_points(points),
+    }
+
+
+def max_zone_span():
+    """Hauteur maximale d'une zone en degrés de latitude (``ZONE_MAX_SPAN_DEGREES``)"""
+    return getattr(settings, 'ZONE_MAX_SPAN_DEGREES', 3.0)
+
+
+def zone_span_error(min_latitude, max_latitude):
+    """
+    Message d'erreur si la zone dépasse ``max_zone_span()`` (elle échapperait
+    à la recherche des doublons par index), sinon None
+    """
+    max_span = max_zone_span()
+    if max_latitude - min_latitude > max_span:
+        return f"La zone ne peut pas s'étendre sur plus de {max_span}° de latitude"
+    return None
+
+
+def _spike_vertices(points):
+    """Sommets où le contour repart sur le côté qu'il vient de parcourir"""
+    incoming = points - np.roll(points, 1, axis=0)
+    outgoing = np.roll(points, -1, axis=0) - points
+    cross = incoming[:, 0] * outgoing[:, 1] - incoming[:, 1] * outgoing[:, 0]
+    dot = (incoming * outgoing).sum(axis=1)
+    return np.flatnonzero((cross == 0) & (dot < 0))
+
+
+def find_self_intersection(points):
+    """
+    Première paire de côtés non consécutifs qui se croisent ou se touchent
+    (indices des côtés, le côté i allant du sommet i au suivant) ; None si
+    le contour est simple
+
+    Balayage de Shamos–Hoey d'ouest en est : les côtés coupés par la ligne
+    de balayage sont gardés triés du sud au nord, et seuls les voisins dans
+    cet ordre sont comparés. Le contour est ouvert (sans point de fermeture)
+    et sans sommets consécutifs égaux.
+    """
+    n = len(points)
+    x, y = points[:, 1], points[:, 0]
+    x2, y2 = np.roll(x, -1), np.roll(y, -1)
+    # Extrémités ordonnées : « gauche » = plus petite (lng, lat)
+    swap = (x2 < x) | ((x2 == x) & (y2 < y))
+    lx, ly = np.where(swap, x2, x), np.where(swap, y2, y)
+    rx, ry = np.where(swap, x, x2), np.where(swap, y, y2)
+    # Au même point, les insertions passent avant les retraits : deux côtés
+    # qui se touchent en un sommet sont présents ensemble dans le balayage
+    order = np.lexsort((np.repeat([0, 1], n), np.concatenate([ly, ry]), np.concatenate([lx, rx])))
+    lx, ly, rx, ry = lx.tolist(), ly.tolist(), rx.tolist(), ry.tolist()
+
+    def side(edge, px, py):
+        # > 0 : le point est au nord du côté (à gauche en allant vers l'est)
+        return (rx[edge] - lx[edge]) * (py - ly[edge]) - (ry[edge] - ly[edge]) * (px - lx[edge])
+
+    def on_edge(edge, px, py):
+        return lx[edge] <= px <= rx[edge] and min(ly[edge], ry[edge]) <= py <= max(ly[edge], ry[edge])
+
+    def consecutive(a, b):
+        return abs(a - b) in (1, n - 1)
+
+    def intersects(a, b):
+        if consecutive(a, b):
+            return False
+        d1, d2 = side(a, lx[b], ly[b]), side(a, rx[b], ry[b])
+        d3, d4 = side(b, lx[a], ly[a]), side(b, rx[a], ry[a])
+        if d1 * d2 < 0 and d3 * d4 < 0:
+            return True
+        return (
+            (d1 == 0 and on_edge(a, lx[b], ly[b])) or (d2 == 0 and on_edge(a, rx[b], ry[b]))
+            or (d3 == 0 and on_edge(b, lx[a], ly[a])) or (d4 == 0 and on_edge(b, rx[a], ry[a]))
+        )
+
+    def position(edge, removing=False):
+        # Rang de ``edge`` dans ``active`` à son extrémité gauche (insertion)
+        # ou droite (retrait) ; les côtés passant par ce point sont départagés
+        # par leur direction à l'est du point
+        px, py = (rx[edge], ry[edge]) if removing else (lx[edge], ly[edge])
+        low, high = 0, len(active)
+        while low < high:
+            middle = (low + high) // 2
+            other = active[middle]
+            above = side(other, px, py)
+            if above == 0:
+                if not removing:
+                    above = side(other, rx[edge], ry[edge])
+                elif lx[other] == px and ly[other] == py:
+                    above = -side(edge, rx[other], ry[other])
+                else:
+                    above = side(other, lx[edge], ly[edge])
+            if above > 0:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    active = []
+    for event in order.tolist():
+        if event < n:
+            edge = event
+            index = position(edge)
+            # Futurs voisins au sud et au nord
+            for neighbour in (index - 1, index):
+                if 0 <= neighbour < len(active) and intersects(edge, active[neighbour]):
+                    return edge, active[neighbour]
+            active.insert(index, edge)
+        else:
+            edge = event - n
+            index = position(edge, removing=True)
+            if index >= len(active) or active[index] != edge:
+                index = active.index(edge)
+            if 0 < index < len(active) - 1 and intersects(active[index - 1], active[index + 1]):
+                return active[index - 1], active[index + 1]
+            del active[index]
+    return None
+
+
+def repair_ring(coordinates, max_vertices=None):
+    """
+    Contour ``[[lat, lng], ...]`` validé et normalisé : sommets répétés
+    retirés, anneau fermé (dernier point = premier), sens trigonométrique ;
+    lève ValueError avec un message destiné à l'utilisateur
+    """
+    points = polygon_points(coordinates)
+    if max_vertices is None:
+        max_vertices = getattr(settings, 'ZONE_MAX_VERTICES', 100_000)
+    if len(points) > max_vertices + 1:
+        raise ValueError(f"Un polygone ne peut pas dépasser {max_vertices} points")
+    if (np.abs(points[:, 0]) > 90).any():
+        raise ValueError("La latitude doit être comprise entre -90 et 90")
+    if (np.abs(points[:, 1]) > 180).any():
+        raise ValueError("La longitude doit être comprise entre -180 et 180")
+
+    # Sommets répétés consécutifs, dont le point de fermeture
+    points = points[~(points == np.roll(points, -1, axis=0)).all(axis=1)]
+    if len(points) < 3:
+        raise ValueError("Un polygone doit contenir au moins 3 points distincts")
+
+    spikes = _spike_vertices(points)
+    if len(spikes):
+        lat, lng = points[spikes[0]]
+        raise ValueError(f"Le contour revient sur lui-même au point ({lat}, {lng})")
+    crossing = find_self_intersection(points)
+    if crossing is not None:
+        (lat_a, lng_a), (lat_b, lng_b) = points[sorted(crossing)]
+        raise ValueError(
+            f"Le contour se recoupe : côtés partant des points ({lat_a}, {lng_a}) et ({lat_b}, {lng_b})"
+        )
+
+    x, y = points[:, 1], points[:, 0]
+    signed_area = float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+    if signed_area == 0:
+        raise ValueError("Le polygone est plat (aire nulle)")
+    if signed_area < 0:
+        points = points[::-1]
+    return np.vstack([points, points[:1]]).tolist()
+
+
+def polygon_area(points):
+    """Aire (degrés²) par la formule du lacet, longitude en abscisse"""
+    x, y = points[:, 1], points[:, 0]
+    return abs(float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))) / 2
+
+
+def polygon_centroid(points):
+    """Centroïde (lat, lng) ; moyenne des sommets pour un polygone dégénéré"""
+    x, y = points[:, 1], points[:, 0]
+    cross = x * np.roll(y, -1) - np.roll(x, -1) * y
+    area = cross.sum() / 2
+    if abs(area) < 1e-12:
+        return float(y.mean()), float(x.mean())
+    cx = ((x + np.roll(x, -1)) * cross).sum() / (6 * area)
+    cy = ((y + np.roll(y, -1)) * cross).sum() / (6 * area)
+    return float(cy), float(cx)
+
+
+def grid_in_polygon(lats, lngs, points):
+    """
+    Masque (latitudes × longitudes) des nœuds d'une grille à l'intérieur du
+    polygone (règle pair-impair) : une ligne de balayage par latitude, les
+    côtés traversés sont triés puis comptés par recherche dichotomique
+    """
+    a_lat, a_lng = points[:, 0], points[:, 1]
+    b_lat, b_lng = np.roll(a_lat, -1), np.roll(a_lng, -1)
+    inside = np.zeros((len(lats), len(lngs)), dtype=bool)
+    for row, lat in enumerate(lats):
+        crosses = (a_lat > lat) != (b_lat > lat)
+        edge_lng = np.sort(
+            a_lng[crosses]
+            + (lat - a_lat[crosses]) * (b_lng[crosses] - a_lng[crosses]) / (b_lat[crosses] - a_lat[crosses])
+        )
+        # Nombre de côtés strictement à l'est de chaque nœud
+        east = len(edge_lng) - np.searchsorted(edge_lng, lngs, side='right')
+        inside[row] = east % 2 == 1
+    return inside
+
+
+def _common_box(first, second):
+    min_lat_a, max_lat_a, min_lng_a, max_lng_a = bounding_box(first)
+    min_lat_b, max_lat_b, min_lng_b, max_lng_b = bounding_box(second)
+    return (
+        max(min_lat_a, min_lat_b), min(max_lat_a, max_lat_b),
+        max(min_lng_a, min_lng_b), min(max_lng_a, max_lng_b),
+    )
+
+
+def overlap_upper_bound(first, second):
+    """Majorant de ``overlap_ratio`` : aire de l'emprise commune sur l'aire de la plus petite zone"""
+    min_lat, max_lat, min_lng, max_lng = _common_box(first, second)
+    smallest = min(polygon_area(first), polygon_area(second))
+    if min_lat >= max_lat or min_lng >= max_lng or smallest == 0:
+        return 0.0
+    return (max_lat - min_lat) * (max_lng - min_lng) / smallest
+
+
+def overlap_ratio(first, second, grid_size=OVERLAP_GRID_SIZE):
+    """
+    Part de la plus petite des deux zones couverte par leur intersection,
+    estimée sur une grille de ``grid_size``² points de l'emprise commune
+    """
+    min_lat, max_lat, min_lng, max_lng = _common_box(first, second)
+    smallest = min(polygon_area(first), polygon_area(second))
+    if min_lat >= max_lat or min_lng >= max_lng or smallest == 0:
+        return 0.0
+
+    # Centres des cellules de la grille
+    lat_step = (max_lat - min_lat) / grid_size
+    lng_step = (max_lng - min_lng) / grid_size
+    lats = min_lat + lat_step * (np.arange(grid_size) + 0.5)
+    lngs = min_lng + lng_step * (np.arange(grid_size) + 0.5)
+    both = grid_in_polygon(lats, lngs, first) & grid_in_polygon(lats, lngs, second)
+    intersection = both.sum() * lat_step * lng_step
+    return min(1.0, float(intersection / smallest))
+
+
+def circle_overlap_ratio(distance_km, first_radius_km, second_radius_km):
+    """Part du plus petit cercle couverte par l'intersection de deux cercles"""
+    r1, r2, d = float(first_radius_km), float(second_radius_km), float(distance_km)
+    smallest = min(r1, r2)
+    if smallest <= 0 or d >= r1 + r2:
+        return 0.0
+    if d <= abs(r1 - r2):
+        return 1.0
+    lens = (
+        r1 ** 2 * math.acos((d ** 2 + r1 ** 2 - r2 ** 2) / (2 * d * r1))
+        + r2 ** 2 * math.acos((d ** 2 + r2 ** 2 - r1 ** 2) / (2 * d * r2))
+        - 0.5 * math.sqrt((-d + r1 + r2) * (d + r1 - r2) * (d - r1 + r2) * (d + r1 + r2))
+    )
+    return min(1.0, lens / (math.pi * smallest ** 2))
+
+
+def _thresholds():
+    return getattr(settings, 'ZONE_DUPLICATE_OVERLAP', 0.8), getattr(settings, 'ZONE_DUPLICATE_DISTANCE_KM', 1.0)
+
+
+def is_near_duplicate(overlap, distance_km):
+    min_overlap, max_distance = _thresholds()
+    return overlap >= min_overlap or distance_km <= max_distance
+
+
+def _duplicate_entry(kind, zone, identifier, overlap, distance_km):
+    return {
+        'type': kind,
+        'id': str(zone.pk),
+        'identifier': identifier,
+        'name': zone.name,
+        'is_active': zone.is_active,
+        'overlap': round(overlap, 3),
+        'distance_km': round(distance_km, 3),
+    }
+
+
+def find_duplicate_zones(coordinates, exclude=None):
+    """
+    Quasi-doublons d'un polygone parmi les réserves naturelles et parcs
+    nationaux (approuvés ou en attente), du plus recouvrant au moins recouvrant
+
+    ``exclude`` : zone à ignorer (la zone elle-même lors d'une modification).
+    """
+    from .models import NationalPark, NaturalReserve
+
+    points = polygon_points(coordinates)
+    min_lat, max_lat, min_lng, max_lng = bounding_box(points)
+    centroid = polygon_centroid(points)
+    span = max_zone_span()
+    min_overlap, max_distance = _thresholds()
+    # Écart des centres d'emprise (somme des bornes : pas de division en SQL),
+    # longitudes ramenées à l'échelle des latitudes
+    lng_scale = math.cos(math.radians((min_lat + max_lat) / 2))
+    centre_offset = (
+        Abs(F('min_latitude') + F('max_latitude') - (min_lat + max_lat))
+        + Abs(F('min_longitude') + F('max_longitude') - (min_lng + max_lng)) * lng_scale
+    )
+
+    duplicates = []
+    for model, kind, identifier_field in (
+        (NaturalReserve, 'natural_reserve', 'reserve_id'),
+        (NationalPark, 'national_park', 'park_id'),
+    ):
+        candidates = model.objects.filter(
+            # Borne inférieure : l'index sur min_latitude reste sélectif
+            min_latitude__gte=min_lat - span,
+            min_latitude__lte=max_lat,
+            max_latitude__gte=min_lat,
+            min_longitude__lte=max_lng,
+            max_longitude__gte=min_lng,
+        ).only('pk', 'name', 'is_active', identifier_field, 'coordinates')
+        if exclude is not None and isinstance(exclude, model):
+            candidates = candidates.exclude(pk=exclude.pk)
+        # Au-delà de la limite, les zones les plus proches sont comparées
+        candidates = candidates.alias(centre_offset=centre_offset).order_by('centre_offset', 'pk')
+
+        for zone in candidates[:DUPLICATE_MAX_CANDIDATES]:
+            try:
+                other = polygon_points(zone.coordinates)
+            except ValueError:
+                continue
+            distance = float(haversine_km(*centroid, *polygon_centroid(other)))
+            if distance > max_distance and overlap_upper_bound(points, other) < min_overlap:
+                # Recouvrement insuffisant quelle que soit la forme : pas d'estimation sur grille
+                continue
+            overlap = overlap_ratio(points, other)
+            if is_near_duplicate(overlap, distance):
+                duplicates.append(_duplicate_entry(kind, zone, getattr(zone, identifier_field), overlap, distance))
+
+    return sorted(duplicates, key=lambda entry: (-entry['overlap'], entry['distance_km']))
+
+
+def find_duplicate_airports(latitude, longitude, radius, exclude=None):
+    """Quasi-doublons d'un aéroport (zones interdites circulaires) parmi les aéroports existants"""
+    from .models import Airport
+
+    latitude, longitude, radius = float(latitude), float(longitude), float(radius)
+    max_radius = getattr(settings, 'AIRPORT_MAX_RADIUS_KM', 50)
+    reach = (radius + max_radius) / KM_PER_DEGREE
+    candidates = Airport.objects.filter(
+        latitude__range=(latitude - reach, latitude + reach),
+        longitude__range=(longitude - reach, longitude + reach),
+    ).only('pk', 'name', 'is_active', 'airport_id', 'latitude', 'longitude', 'radius')
+    if exclude is not None:
+        candidates = candidates.exclude(pk=exclude.pk)
+    lng_scale = math.cos(math.radians(latitude))
+    candidates = candidates.alias(
+        centre_offset=Abs(F('latitude') - latitude) + Abs(F('longitude') - longitude) * lng_scale
+    ).order_by('centre_offset', 'pk')
+
+    duplicates = []
+    for airport in candidates[:DUPLICATE_MAX_CANDIDATES]:
+        distance = float(haversine_km(latitude, longitude, float(airport.latitude), float(airport.longitude)))
+        overlap = circle_overlap_ratio(distance, radius, airport.radius)
+        if is_near_duplicate(overlap, distance):
+            duplicates.append(_duplicate_entry('airport', airport, airport.airport_id, overlap, distance))
+    return sorted(duplicates, key=lambda entry: (-entry['overlap'], entry['distance_km']))
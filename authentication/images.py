@@ -0,0 +1,208 @@
+"""
+Génération des déclinaisons redimensionnées des images téléversées.
+
+Chaque image source (``CarouselImage.image``, ``Drone.photo``,
+``UserProfile.avatar``) est déclinée en AVIF, WebP et JPEG à des largeurs
+fixes. Pillow 10 n'encode pas l'AVIF : le format est fourni par le greffon
+``pillow-avif-plugin`` (requirements.txt) et omis s'il n'est pas installé. Le travail est fait dans un pool de threads après
+la validation de la transaction, jamais dans la requête ; le résultat
+(nom, dimensions et taille de chaque fichier) est enregistré dans le champ
+JSON ``*_variants`` du modèle.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+# Largeurs générées (px)
+DERIVATIVE_WIDTHS = (320, 640, 1280)
+
+# Format Pillow, extension et options d'encodage par format de sortie
+DERIVATIVE_FORMATS = {
+    'avif': ('AVIF', 'avif', {'quality': 60}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Champs image pris en charge : modèle -> (champ image, champ des déclinaisons)
+IMAGE_FIELDS = {
+    'authentication.CarouselImage': ('image', 'image_variants'),
+    'authentication.Drone': ('photo', 'photo_variants'),
+    'authentication.UserProfile': ('avatar', 'avatar_variants'),
+}
+
+DERIVATIVES_DIR = 'derivatives'
+
+# Émis quand les déclinaisons d'une instance ont été enregistrées (sender=modèle, pk=...)
+derivatives_ready = Signal()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def available_formats():
+    """Formats de sortie supportés par l'installation de Pillow"""
+    from PIL import Image
+
+    try:
+        import pillow_avif  # noqa: F401  (greffon AVIF optionnel)
+    except ImportError:
+        pass
+
+    Image.init()
+    return [name for name, (pil_format, _, _) in DERIVATIVE_FORMATS.items() if pil_format in Image.SAVE]
+
+
+def derivative_name(source_name, width, extension):
+    """Nom de stockage d'une déclinaison : derivatives/<dossier>/<nom>_<largeur>w.<ext>"""
+    directory, filename = os.path.split(source_name)
+    stem = os.path.splitext(filename)[0]
+    return '/'.join(part for part in (DERIVATIVES_DIR, directory, f'{stem}_{width}w.{extension}') if part)
+
+
+def _prepare(image, pil_format):
+    """Adapter le mode de couleur au format de sortie"""
+    from PIL import Image
+
+    if pil_format == 'JPEG':
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            return background
+        if image.mode != 'RGB':
+            return image.convert('RGB')
+        return image
+    if image.mode not in ('RGB', 'RGBA'):
+        return image.convert('RGBA' if 'A' in image.getbands() or image.mode == 'P' else 'RGB')
+    return image
+
+
+def generate_derivatives(source_name, storage=None):
+    """
+    Générer toutes les déclinaisons d'une image stockée et retourner leur description
+    """
+    from PIL import Image, ImageOps
+
+    storage = storage or default_storage
+    with storage.open(source_name, 'rb') as source:
+        original = Image.open(source)
+        original.load()
+    original = ImageOps.exif_transpose(original)
+
+    widths = [width for width in DERIVATIVE_WIDTHS if width < original.width] or [original.width]
+    formats = available_formats()
+    variants = []
+
+    for width in widths:
+        height = max(1, round(original.height * width / original.width))
+        resized = original.resize((width, height), Image.LANCZOS) if width != original.width else original
+
+        for format_name in formats:
+            pil_format, extension, options = DERIVATIVE_FORMATS[format_name]
+            buffer = BytesIO()
+            _prepare(resized, pil_format).save(buffer, pil_format, **options)
+
+            # Nom définitif donné par le stockage adressé par contenu ; les anciennes
+            # déclinaisons sont libérées par le comptage des références (storage)
+            name = storage.save(derivative_name(source_name, width, extension), ContentFile(buffer.getvalue()))
+
+            variants.append({
+                'format': format_name,
+                'name': name,
+                'width': width,
+                'height': height,
+                'size': buffer.tell(),
+            })
+
+    return {'source': source_name, 'variants': variants}
+
+
+def process_image(model_label, pk, source_name):
+    """
+    Tâche du pool : générer les déclinaisons puis les enregistrer si l'image
+    source n'a pas changé entre-temps
+    """
+    image_field, variants_field = IMAGE_FIELDS[model_label]
+    model = apps.get_model(model_label)
+
+    try:
+        data = generate_derivatives(source_name)
+        if model.objects.filter(pk=pk, **{image_field: source_name}).update(**{variants_field: data}):
+            derivatives_ready.send(sender=model, pk=pk)
+    except Exception as e:
+        logger.error("Erreur lors de la génération des déclinaisons de %s: %s", source_name, e)
+
+
+def _process_in_worker(*args):
+    """Exécution dans un thread du pool, qui libère sa connexion à la base ensuite"""
+    try:
+        process_image(*args)
+    finally:
+        close_old_connections()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 2),
+                thread_name_prefix='image-derivatives'
+            )
+        return _executor
+
+
+def schedule_derivatives(instance):
+    """
+    Programmer la génération des déclinaisons d'une instance après la transaction
+    (exécution immédiate si IMAGE_DERIVATIVE_WORKERS vaut 0)
+    """
+    model_label = instance._meta.label
+    image_field, variants_field = IMAGE_FIELDS[model_label]
+    source_name = getattr(instance, image_field).name or ''
+    current = getattr(instance, variants_field) or {}
+
+    if current.get('source', '') == source_name:
+        return
+
+    if not source_name:
+        type(instance).objects.filter(pk=instance.pk).update(**{variants_field: {}})
+        return
+
+    def submit():
+        if getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 2) == 0:
+            process_image(model_label, instance.pk, source_name)
+        else:
+            _get_executor().submit(_process_in_worker, model_label, instance.pk, source_name)
+
+    transaction.on_commit(submit)
+
+
+def build_srcset(data, storage=None):
+    """
+    Attributs ``srcset`` par format : {'webp': '<url> 320w, <url> 640w', ...}
+    """
+    storage = storage or default_storage
+    srcset = {}
+    for variant in (data or {}).get('variants', []):
+        srcset.setdefault(variant['format'], []).append(
+            f"{storage.url(variant['name'])} {variant['width']}w"
+        )
+    return {format_name: ', '.join(entries) for format_name, entries in srcset.items()}
+
+
+def variant_names(data):
+    """Noms de stockage des déclinaisons enregistrées"""
+    return [variant['name'] for variant in (data or {}).get('variants', [])]
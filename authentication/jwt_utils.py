@@ -41,7 +41,7 @@ class JWTTokenManager:
             }
             
         except Exception as e:
-            logger.error(f"Erreur lors de la création des tokens JWT: {e}")
+            logger.error("Erreur lors de la création des tokens JWT: %s", e)
             raise
     
     @staticmethod
@@ -86,7 +86,7 @@ class JWTTokenManager:
             return response
             
         except Exception as e:
-            logger.error(f"Erreur lors de la définition des cookies: {e}")
+            logger.error("Erreur lors de la définition des cookies: %s", e)
             raise
     
     @staticmethod
@@ -101,7 +101,7 @@ class JWTTokenManager:
             return response
             
         except Exception as e:
-            logger.error(f"Erreur lors de la suppression des cookies: {e}")
+            logger.error("Erreur lors de la suppression des cookies: %s", e)
             raise
     
     @staticmethod
@@ -126,7 +126,7 @@ class JWTTokenManager:
             }
             
         except Exception as e:
-            logger.error(f"Erreur lors du rafraîchissement du token: {e}")
+            logger.error("Erreur lors du rafraîchissement du token: %s", e)
             raise
     
     @staticmethod
@@ -155,7 +155,7 @@ class JWTTokenManager:
             return payload
             
         except Exception as e:
-            logger.error(f"Erreur lors du décodage du token: {e}")
+            logger.error("Erreur lors du décodage du token: %s", e)
             return None
 
 
@@ -0,0 +1,511 @@
+"""
+Générateur de charge asynchrone (asyncio, bibliothèque standard uniquement).
+
+Des utilisateurs virtuels (``concurrency``) rejouent en boucle fermée le
+mélange de trafic d'un scénario JSON, soit contre un serveur HTTP (HTTP/1.1,
+connexions persistantes), soit directement contre l'application ASGI dans le
+processus. Le rapport JSON (débit, centiles de latence, taux d'erreur par
+groupe et par route) est trié pour être comparé d'une version à l'autre.
+
+Format du scénario ::
+
+    {
+      "name": "trafic-reel",
+      "think_time_ms": 0,
+      "setup": [
+        {"name": "drones", "method": "GET", "path": "/api/drones/", "auth": true,
+         "extract": {"drone_id": "0.id"}}
+      ],
+      "groups": [
+        {"name": "public", "weight": 80, "requests": [
+          {"name": "airports_map", "method": "GET", "path": "/api/auth/airports/map/", "weight": 1}
+        ]}
+      ]
+    }
+
+Les chaînes de ``path`` et ``body`` acceptent des variables ``{nom}`` :
+celles extraites par ``setup`` (chemin pointé dans la réponse JSON), ``{email}``,
+``{password}``, ``{user}`` (numéro de l'utilisateur virtuel) et ``{run}``
+(compteur unique). Les requêtes ``"auth": true`` utilisent les cookies de
+session de l'utilisateur virtuel, connecté au démarrage.
+"""
+
+import asyncio
+import json
+import math
+import random
+import ssl
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone as dt_timezone
+from http.cookies import SimpleCookie
+from itertools import count
+from urllib.parse import urlsplit
+
+LOGIN_PATH = '/api/auth/login/'
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class ScenarioError(Exception):
+    pass
+
+
+def load_scenario(path):
+    """Lire et valider un fichier de scénario"""
+    with open(path, encoding='utf-8') as f:
+        scenario = json.load(f)
+
+    groups = scenario.get('groups') or []
+    if not groups:
+        raise ScenarioError('Le scénario ne contient aucun groupe de requêtes')
+    names = set()
+    for group in groups:
+        if not group.get('requests'):
+            raise ScenarioError(f"Le groupe {group.get('name')!r} ne contient aucune requête")
+        for request in group['requests']:
+            if not request.get('name') or not request.get('path'):
+                raise ScenarioError(f"Requête sans nom ou sans chemin dans le groupe {group.get('name')!r}")
+            if request['name'] in names:
+                raise ScenarioError(f"Nom de requête en double : {request['name']}")
+            names.add(request['name'])
+    return scenario
+
+
+def requires_auth(scenario):
+    requests = list(scenario.get('setup', []))
+    for group in scenario['groups']:
+        requests.extend(group['requests'])
+    return any(request.get('auth') for request in requests)
+
+
+def percentile(values, rank):
+    """Centile au rang le plus proche"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(rank / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def extract(data, dotted):
+    """Valeur au chemin pointé ``a.0.b`` d'un document JSON"""
+    for key in dotted.split('.'):
+        data = data[int(key)] if isinstance(data, list) else data[key]
+    return data
+
+
+def render(template, variables):
+    """Substituer les variables dans les chaînes d'une valeur JSON"""
+    if isinstance(template, str):
+        return template.format_map(variables)
+    if isinstance(template, list):
+        return [render(item, variables) for item in template]
+    if isinstance(template, dict):
+        return {key: render(value, variables) for key, value in template.items()}
+    return template
+
+
+def is_expected(request, status_code):
+    expected = request.get('status')
+    if expected is None:
+        return 200 <= status_code < 400
+    if isinstance(expected, list):
+        return status_code in expected
+    return status_code == expected
+
+
+# Transports : request(method, path, headers, body) -> (statut, en-têtes, corps)
+
+class HttpTransport:
+    """Connexion HTTP/1.1 persistante vers un serveur (une par utilisateur virtuel)"""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.prefix = parts.path.rstrip('/')
+        self.authority = parts.netloc
+        self._reader = self._writer = None
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, ssl.SSLError):
+                pass
+        self._reader = self._writer = None
+
+    async def request(self, method, path, headers, body):
+        if self._writer is None or self._writer.is_closing():
+            await self._connect()
+        try:
+            return await self._exchange(method, path, headers, body)
+        except BaseException:
+            await self.close()
+            raise
+
+    async def _exchange(self, method, path, headers, body):
+        lines = [f'{method} {self.prefix}{path} HTTP/1.1', f'Host: {self.authority}', f'Content-Length: {len(body)}']
+        lines.extend(f'{name}: {value}' for name, value in headers)
+        self._writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError('Connexion fermée par le serveur')
+        status_code = int(status_line.split()[1])
+
+        response_headers = []
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers.append((name.strip().lower(), value.strip()))
+        header_map = dict(response_headers)
+
+        if method == 'HEAD' or status_code in (204, 304) or 100 <= status_code < 200:
+            content = b''
+        elif header_map.get('transfer-encoding', '').lower() == 'chunked':
+            content = await self._read_chunked()
+        elif 'content-length' in header_map:
+            content = await self._reader.readexactly(int(header_map['content-length']))
+        else:
+            content = await self._reader.read()
+            header_map['connection'] = 'close'
+
+        if header_map.get('connection', '').lower() == 'close':
+            await self.close()
+        return status_code, response_headers, content
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self._reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                # Fin du corps et éventuels en-têtes de fin
+                while (await self._reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return b''.join(chunks)
+            chunks.append(await self._reader.readexactly(size))
+            await self._reader.readexactly(2)
+
+
+class AsgiTransport:
+    """Appel direct de l'application ASGI dans le processus"""
+
+    def __init__(self, application, server=('testserver', 80)):
+        self.application = application
+        self.server = server
+
+    async def close(self):
+        pass
+
+    async def request(self, method, path, headers, body):
+        path, _, query = path.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': [(b'host', self.server[0].encode()), (b'content-length', str(len(body)).encode())] + [
+                (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': self.server,
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        disconnected = asyncio.Event()
+        response = {'status': None, 'headers': [], 'body': []}
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+                response['headers'] = [
+                    (name.decode('latin-1').lower(), value.decode('latin-1')) for name, value in message['headers']
+                ]
+            elif message['type'] == 'http.response.body':
+                response['body'].append(message.get('body', b''))
+
+        try:
+            await self.application(scope, receive, send)
+        finally:
+            disconnected.set()
+        return response['status'], response['headers'], b''.join(response['body'])
+
+
+class Session:
+    """Utilisateur virtuel : transport et cookies"""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.cookies = {}
+
+    def _store_cookies(self, headers):
+        for name, value in headers:
+            if name != 'set-cookie':
+                continue
+            for key, morsel in SimpleCookie(value).items():
+                expired = morsel['max-age'] in ('0', '-1') or morsel['expires'].startswith('Thu, 01 Jan 1970')
+                if expired or not morsel.value:
+                    self.cookies.pop(key, None)
+                else:
+                    self.cookies[key] = morsel.value
+
+    async def request(self, method, path, body=None, auth=False):
+        headers = [('Accept', 'application/json')]
+        payload = b''
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers.append(('Content-Type', 'application/json'))
+        if auth and self.cookies:
+            headers.append(('Cookie', '; '.join(f'{key}={value}' for key, value in self.cookies.items())))
+
+        status_code, response_headers, content = await self.transport.request(method, path, headers, payload)
+        self._store_cookies(response_headers)
+        return status_code, content
+
+    async def login(self, email, password):
+        status_code, content = await self.request('POST', LOGIN_PATH, {'email': email, 'password': password})
+        if status_code != 200:
+            raise ScenarioError(f'Connexion impossible pour {email} (statut {status_code})')
+
+
+class Recorder:
+    """Latences et statuts par route"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+        self.groups = {}
+
+    def record(self, group, name, latency_ms, outcome, ok):
+        self.groups[name] = group
+        self.latencies[name].append(latency_ms)
+        self.statuses[name][outcome] += 1
+        if not ok:
+            self.errors[name] += 1
+
+
+def _summary(latencies, errors, elapsed, statuses=None):
+    total = len(latencies)
+    summary = {
+        'requests': total,
+        'errors': errors,
+        'error_rate': round(errors / total, 6) if total else 0.0,
+        'throughput_rps': round(total / elapsed, 3) if elapsed else 0.0,
+        'latency_ms': {},
+    }
+    if total:
+        summary['latency_ms'] = {
+            **{f'p{rank}': round(percentile(latencies, rank), 3) for rank in PERCENTILES},
+            'mean': round(sum(latencies) / total, 3),
+            'max': round(max(latencies), 3),
+        }
+    if statuses is not None:
+        summary['status_codes'] = dict(sorted(statuses.items()))
+    return summary
+
+
+def build_report(scenario, recorder, elapsed, config):
+    """Rapport JSON : totaux, groupes et routes"""
+    by_group = defaultdict(list)
+    group_errors = Counter()
+    for name, latencies in recorder.latencies.items():
+        by_group[recorder.groups[name]].extend(latencies)
+        group_errors[recorder.groups[name]] += recorder.errors[name]
+
+    every = [latency for latencies in recorder.latencies.values() for latency in latencies]
+    return {
+        'scenario': scenario.get('name', ''),
+        'config': config,
+        'elapsed_s': round(elapsed, 3),
+        'totals': _summary(every, sum(recorder.errors.values()), elapsed),
+        'groups': {
+            name: _summary(by_group[name], group_errors[name], elapsed)
+            for name in sorted(by_group)
+        },
+        'endpoints': {
+            name: {
+                'group': recorder.groups[name],
+                **_summary(latencies, recorder.errors[name], elapsed, recorder.statuses[name]),
+            }
+            for name, latencies in sorted(recorder.latencies.items())
+        },
+    }
+
+
+async def fetch_server_metrics(transport, token, prefixes=('db_pool_',)):
+    """
+    Métriques du serveur (``/api/metrics``) dont le nom commence par l'un des
+    préfixes : ligne Prometheus (nom et étiquettes) -> valeur
+    """
+    try:
+        status_code, _, content = await transport.request(
+            'GET', '/api/metrics', [('Authorization', f'Bearer {token}')], b''
+        )
+    finally:
+        await transport.close()
+    if status_code != 200:
+        raise ScenarioError(f'Métriques du serveur indisponibles (statut {status_code})')
+
+    metrics = {}
+    for line in content.decode('utf-8').splitlines():
+        if line.startswith(prefixes):
+            name, _, value = line.rpartition(' ')
+            metrics[name] = float(value)
+    return metrics
+
+
+def compare_reports(baseline, report):
+    """Écarts par route entre deux rapports : débit, p95 et taux d'erreur"""
+    rows = []
+    for name, current in report['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if previous is None:
+            rows.append((name, None, None, None))
+            continue
+        p95_before = previous['latency_ms'].get('p95')
+        p95_after = current['latency_ms'].get('p95')
+        rows.append((
+            name,
+            round(current['throughput_rps'] - previous['throughput_rps'], 3),
+            round(p95_after - p95_before, 3) if p95_before is not None and p95_after is not None else None,
+            round(current['error_rate'] - previous['error_rate'], 6),
+        ))
+    return rows
+
+
+class LoadTest:
+    """Exécution d'un scénario"""
+
+    def __init__(self, scenario, transport_factory, concurrency=10, duration=30.0, max_requests=None,
+                 warmup=0.0, credentials=None, seed=None, timeout=30.0):
+        self.scenario = scenario
+        self.transport_factory = transport_factory
+        self.concurrency = concurrency
+        self.duration = duration
+        self.max_requests = max_requests
+        self.warmup = warmup
+        self.credentials = credentials or {}
+        self.seed = seed
+        self.timeout = timeout
+        self.think_time = scenario.get('think_time_ms', 0) / 1000
+        self.variables = {}
+        self.recorder = Recorder()
+        self._counter = count()
+        self._issued = 0
+
+    async def _session(self):
+        session = Session(self.transport_factory())
+        if requires_auth(self.scenario):
+            await session.login(self.credentials['email'], self.credentials['password'])
+        return session
+
+    def _variables(self, user):
+        return {
+            **self.variables,
+            'email': self.credentials.get('email', ''),
+            'password': self.credentials.get('password', ''),
+            'user': user,
+            'run': next(self._counter),
+        }
+
+    async def setup(self):
+        """Requêtes préalables : extraction des variables des scénarios"""
+        session = await self._session()
+        try:
+            for request in self.scenario.get('setup', []):
+                path = render(request['path'], self._variables(0))
+                status_code, content = await session.request(
+                    request.get('method', 'GET'), path, render(request.get('body'), self._variables(0)),
+                    request.get('auth', False)
+                )
+                if not is_expected(request, status_code):
+                    raise ScenarioError(f"Préparation {request.get('name', path)} : statut {status_code}")
+                document = json.loads(content) if content else None
+                for variable, dotted in request.get('extract', {}).items():
+                    try:
+                        self.variables[variable] = extract(document, dotted)
+                    except (KeyError, IndexError, TypeError, ValueError):
+                        raise ScenarioError(f"Préparation {request.get('name', path)} : {dotted!r} introuvable")
+        finally:
+            await session.transport.close()
+
+    def _pick(self, rng):
+        groups = self.scenario['groups']
+        group = rng.choices(groups, weights=[g.get('weight', 1) for g in groups])[0]
+        requests = group['requests']
+        request = rng.choices(requests, weights=[r.get('weight', 1) for r in requests])[0]
+        return group['name'], request
+
+    def _should_continue(self, deadline):
+        if self.max_requests is not None:
+            return self._issued < self.max_requests
+        return time.monotonic() < deadline
+
+    async def _user(self, user, deadline, measure_from):
+        rng = random.Random(None if self.seed is None else self.seed + user)
+        session = await self._session()
+        try:
+            while self._should_continue(deadline):
+                self._issued += 1
+                group, request = self._pick(rng)
+                variables = self._variables(user)
+                path = render(request['path'], variables)
+                body = render(request.get('body'), variables)
+
+                start = time.perf_counter()
+                try:
+                    status_code, _ = await asyncio.wait_for(
+                        session.request(request.get('method', 'GET'), path, body, request.get('auth', False)),
+                        self.timeout
+                    )
+                    outcome, ok = str(status_code), is_expected(request, status_code)
+                except asyncio.TimeoutError:
+                    outcome, ok = 'timeout', False
+                except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+                    outcome, ok = type(e).__name__, False
+                latency_ms = (time.perf_counter() - start) * 1000
+
+                if time.monotonic() >= measure_from:
+                    self.recorder.record(group, request['name'], latency_ms, outcome, ok)
+                if self.think_time:
+                    await asyncio.sleep(self.think_time)
+        finally:
+            await session.transport.close()
+
+    async def run(self):
+        """Exécuter le scénario et retourner le rapport"""
+        await self.setup()
+        started_at = datetime.now(dt_timezone.utc)
+        start = time.monotonic()
+        measure_from = start + self.warmup
+        deadline = measure_from + self.duration
+        await asyncio.gather(*(self._user(user, deadline, measure_from) for user in range(self.concurrency)))
+        elapsed = max(0.0, time.monotonic() - measure_from)
+
+        return build_report(self.scenario, self.recorder, elapsed, {
+            'concurrency': self.concurrency,
+            'duration_s': self.duration,
+            'max_requests': self.max_requests,
+            'warmup_s': self.warmup,
+            'seed': self.seed,
+            'started_at': started_at.isoformat(),
+        })
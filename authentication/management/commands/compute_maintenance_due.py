@@ -0,0 +1,83 @@
+from collections import defaultdict
+from datetime import datetime
+
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from authentication.models import Drone
+
+
+class Command(BaseCommand):
+    """
+    Récapitulatif des drones à entretenir par propriétaire, avec envoi
+    facultatif par email. Rien n'est enregistré : l'API et l'administration
+    calculent l'état de maintenance à la lecture, en une requête
+    (``DroneQuerySet.with_maintenance_status``).
+    """
+    help = (
+        'Lister et notifier les drones à entretenir par propriétaire '
+        '(ex. cron : 0 2 * * * python manage.py compute_maintenance_due --notify)'
+    )
+    # Tâche planifiée : pas de vérifications système (URLconf, vues, sérialiseurs)
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Date de référence au format YYYY-MM-DD (par défaut : aujourd\'hui)',
+        )
+        parser.add_argument(
+            '--notify',
+            action='store_true',
+            help='Envoyer un email récapitulatif à chaque propriétaire concerné',
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        if options['date']:
+            today = datetime.strptime(options['date'], '%Y-%m-%d').date()
+
+        # Une seule requête pour toute la flotte
+        due_drones = Drone.objects.maintenance_due(today).select_related('user').order_by(
+            'user__email', 'next_maintenance'
+        )
+
+        due_by_owner = defaultdict(list)
+        owners = {}
+        for drone in due_drones:
+            due_by_owner[drone.user_id].append(drone)
+            owners[drone.user_id] = drone.user
+
+        for user_id, drones in due_by_owner.items():
+            owner = owners[user_id]
+            self.stdout.write(f'{owner.email} : {len(drones)} drone(s) à entretenir')
+            for drone in drones:
+                hours = round(drone.flight_minutes_since_maintenance / 60, 1)
+                self.stdout.write(
+                    f'  - {drone.name} (prochaine maintenance : {drone.next_maintenance or "-"}, '
+                    f'{hours} h de vol depuis la dernière maintenance)'
+                )
+
+        if options['notify'] and due_by_owner:
+            messages = [
+                (
+                    'Maintenance de vos drones',
+                    'Les drones suivants doivent être entretenus :\n' + '\n'.join(
+                        f'- {drone.name}' for drone in due_by_owner[user_id]
+                    ),
+                    getattr(settings, 'DEFAULT_FROM_EMAIL', None),
+                    [owners[user_id].email],
+                )
+                for user_id in due_by_owner
+            ]
+            sent = send_mass_mail(messages, fail_silently=True)
+            self.stdout.write(f'{sent} email(s) envoyé(s)')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{sum(len(d) for d in due_by_owner.values())} drone(s) à entretenir '
+                f'pour {len(due_by_owner)} propriétaire(s) au {today}'
+            )
+        )
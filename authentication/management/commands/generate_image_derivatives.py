@@ -0,0 +1,34 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from authentication.images import IMAGE_FIELDS, process_image
+
+
+class Command(BaseCommand):
+    help = 'Générer les déclinaisons redimensionnées des images déjà téléversées'
+    # Tâche planifiée : pas de vérifications système (URLconf, vues, sérialiseurs)
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Régénérer aussi les images qui ont déjà des déclinaisons à jour',
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for model_label, (image_field, variants_field) in IMAGE_FIELDS.items():
+            model = apps.get_model(model_label)
+            rows = model.objects.exclude(**{image_field: ''}).exclude(
+                **{f'{image_field}__isnull': True}
+            ).values_list('pk', image_field, variants_field)
+
+            for pk, source_name, variants in rows.iterator():
+                if not options['force'] and (variants or {}).get('source') == source_name:
+                    continue
+                process_image(model_label, pk, source_name)
+                total += 1
+                self.stdout.write(f'✓ {model_label} {source_name}')
+
+        self.stdout.write(self.style.SUCCESS(f'\nGénération terminée ! {total} image(s) traitée(s).'))
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.loadtest import (
+    AsgiTransport, HttpTransport, LoadTest, ScenarioError, compare_reports, fetch_server_metrics, load_scenario,
+    requires_auth
+)
+
+DEFAULT_SCENARIO = os.path.join('config', 'loadtest-scenario.json')
+
+
+class Command(BaseCommand):
+    help = (
+        "Rejouer un scénario de trafic contre un serveur (--url) ou directement contre "
+        "l'application ASGI, et écrire un rapport JSON (débit, latences, erreurs)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', default=DEFAULT_SCENARIO, help=f'Fichier de scénario (défaut : {DEFAULT_SCENARIO})')
+        parser.add_argument('--url', help="URL du serveur (ex. http://127.0.0.1:8000) ; sans elle, l'application ASGI est appelée directement")
+        parser.add_argument('--concurrency', type=int, default=10, help='Utilisateurs virtuels simultanés (défaut : 10)')
+        parser.add_argument('--duration', type=float, default=30.0, help='Durée mesurée en secondes (défaut : 30)')
+        parser.add_argument('--requests', type=int, help='Nombre total de requêtes (remplace --duration)')
+        parser.add_argument('--warmup', type=float, default=0.0, help='Durée de chauffe non mesurée en secondes')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Délai maximal par requête en secondes')
+        parser.add_argument('--seed', type=int, help='Graine du tirage des requêtes (mélange reproductible)')
+        parser.add_argument('--email', default=os.environ.get('LOADTEST_EMAIL'), help='Compte des utilisateurs virtuels (ou LOADTEST_EMAIL)')
+        parser.add_argument('--password', default=os.environ.get('LOADTEST_PASSWORD'), help='Mot de passe (ou LOADTEST_PASSWORD)')
+        parser.add_argument(
+            '--metrics-token', default=os.environ.get('METRICS_TOKEN'),
+            help='Jeton de /api/metrics : ajoute au rapport les métriques des pools de connexions du serveur'
+        )
+        parser.add_argument('--output', help='Fichier du rapport JSON (défaut : sortie standard)')
+        parser.add_argument('--baseline', help='Rapport précédent à comparer')
+
+    def handle(self, *args, **options):
+        try:
+            scenario = load_scenario(options['scenario'])
+        except (OSError, ValueError, ScenarioError) as e:
+            raise CommandError(f'Scénario invalide : {e}')
+
+        if requires_auth(scenario) and not (options['email'] and options['password']):
+            raise CommandError('Le scénario contient des requêtes authentifiées : --email et --password sont requis')
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency doit être supérieur ou égal à 1')
+
+        if options['url']:
+            transport_factory = lambda: HttpTransport(options['url'])
+            target = options['url']
+        else:
+            from django.core.asgi import get_asgi_application
+            application = get_asgi_application()
+            transport_factory = lambda: AsgiTransport(application)
+            target = 'asgi'
+
+        load_test = LoadTest(
+            scenario,
+            transport_factory,
+            concurrency=options['concurrency'],
+            duration=options['duration'],
+            max_requests=options['requests'],
+            warmup=options['warmup'],
+            credentials={'email': options['email'], 'password': options['password']},
+            seed=options['seed'],
+            timeout=options['timeout'],
+        )
+        try:
+            report = asyncio.run(load_test.run())
+        except (OSError, ScenarioError) as e:
+            raise CommandError(f'Test de charge interrompu : {e}')
+        report['config']['target'] = target
+
+        if options['metrics_token']:
+            # Saturation du pool de connexions pendant le test (attentes, délais dépassés)
+            try:
+                report['server_metrics'] = asyncio.run(
+                    fetch_server_metrics(transport_factory(), options['metrics_token'])
+                )
+            except (OSError, ScenarioError) as e:
+                self.stderr.write(self.style.WARNING(f'Métriques du serveur non relevées : {e}'))
+
+        content = json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(content + '\n')
+        else:
+            self.stdout.write(content)
+
+        totals = report['totals']
+        self.stderr.write(self.style.SUCCESS(
+            f"{totals['requests']} requête(s) en {report['elapsed_s']} s : "
+            f"{totals['throughput_rps']} req/s, p95 {totals['latency_ms'].get('p95', '-')} ms, "
+            f"{totals['error_rate'] * 100:.2f} % d'erreurs"
+        ))
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as f:
+                baseline = json.load(f)
+            self.stderr.write('\nÉcarts avec le rapport de référence (débit req/s, p95 ms, taux d\'erreur) :')
+            for name, throughput, p95, error_rate in compare_reports(baseline, report):
+                if throughput is None:
+                    self.stderr.write(f'  {name} : nouvelle route')
+                else:
+                    p95 = '-' if p95 is None else f'{p95:+}'
+                    self.stderr.write(f'  {name} : {throughput:+} req/s, p95 {p95} ms, erreurs {error_rate:+}')
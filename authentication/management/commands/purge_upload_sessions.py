@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from authentication.models import UploadSession
+from authentication.uploads import abort_upload
+
+
+class Command(BaseCommand):
+    help = (
+        'Supprimer les téléversements par morceaux abandonnés et leurs fichiers partiels '
+        '(tâche périodique, ex. cron : 0 3 * * * python manage.py purge_upload_sessions)'
+    )
+    # Tâche planifiée : pas de vérifications système (URLconf, vues, sérialiseurs)
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=24,
+            help='Ancienneté minimale (en heures) depuis le dernier morceau reçu (défaut : 24)',
+        )
+
+    def handle(self, *args, **options):
+        limit = timezone.now() - timedelta(hours=options['hours'])
+        stale = UploadSession.objects.filter(updated_at__lt=limit).exclude(status='complete')
+
+        purged = 0
+        for session in stale.iterator():
+            abort_upload(session)
+            purged += 1
+
+        # Les sessions terminées ne servent plus qu'au suivi
+        completed, _ = UploadSession.objects.filter(status='complete', updated_at__lt=limit).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{purged} téléversement(s) abandonné(s) supprimé(s), {completed} session(s) terminée(s) supprimée(s)'
+        ))
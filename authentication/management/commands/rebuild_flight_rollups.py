@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from authentication.reporting import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Reconstruire les agrégats quotidiens des vols à partir de la table des vols'
+    # Tâche planifiée : pas de vérifications système (URLconf, vues, sérialiseurs)
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='Premier jour à reconstruire (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Dernier jour à reconstruire (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        start = datetime.strptime(options['start'], '%Y-%m-%d').date() if options['start'] else None
+        end = datetime.strptime(options['end'], '%Y-%m-%d').date() if options['end'] else None
+
+        self.stdout.write('Reconstruction des agrégats de vols...')
+        buckets = rebuild_rollups(start=start, end=end)
+        self.stdout.write(self.style.SUCCESS(f'Reconstruction terminée ! {buckets} agrégats créés.'))
@@ -5,6 +5,8 @@ from decimal import Decimal
 
 class Command(BaseCommand):
     help = 'Peupler la base de données avec les réserves naturelles et parcs nationaux de la Côte d\'Ivoire'
+    # Tâche planifiée : pas de vérifications système (URLconf, vues, sérialiseurs)
+    requires_system_checks = []
 
     def handle(self, *args, **options):
         self.stdout.write('Début du peuplement des zones protégées...')
@@ -0,0 +1,80 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.startup import format_tree, over_budget, profile, top_modules
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesurer le temps de démarrage de l'application (asgi, wsgi) ou de commandes, "
+        "avec l'arbre des imports (python -X importtime) et les budgets STARTUP_BUDGETS"
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'targets', nargs='*', default=['asgi'],
+            help="asgi, wsgi ou noms de commandes (défaut : asgi)"
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Démarrages mesurés par cible (défaut : 5)')
+        parser.add_argument('--min-ms', type=float, default=1.0, help='Temps cumulé minimal affiché dans l\'arbre (défaut : 1 ms)')
+        parser.add_argument('--depth', type=int, default=4, help='Profondeur maximale de l\'arbre (défaut : 4)')
+        parser.add_argument('--top', type=int, default=15, help='Modules au temps propre le plus élevé (défaut : 15)')
+        parser.add_argument('--json', action='store_true', help='Rapport JSON sur la sortie standard')
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Échouer si une cible dépasse son budget ou importe un module à chargement différé'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat doit être supérieur ou égal à 1')
+
+        results = []
+        for target in options['targets']:
+            try:
+                results.append(profile(target, repeat=options['repeat']))
+            except RuntimeError as e:
+                raise CommandError(f'{target} : {e}')
+
+        if options['json']:
+            report = [
+                {**result, 'imports': [root.as_dict() for root in result['imports']]}
+                for result in results
+            ]
+            self.stdout.write(json.dumps(report, indent=2, ensure_ascii=False))
+        else:
+            for result in results:
+                self.write_result(result, options)
+
+        failures = [
+            result['target'] for result in results
+            if over_budget(result) or result['eager_lazy_modules']
+        ]
+        if options['check'] and failures:
+            raise CommandError(f'Budget de démarrage non respecté : {", ".join(failures)}')
+
+    def write_result(self, result, options):
+        limit = result['budget_ms']
+        status = ''
+        if limit is not None:
+            style = self.style.ERROR if over_budget(result) else self.style.SUCCESS
+            status = style(f' (budget : {limit} ms)')
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{result['target']} : {result['startup_ms']} ms, {result['modules']} modules"
+        ) + status)
+        if result['eager_lazy_modules']:
+            self.stdout.write(self.style.ERROR(
+                f"  Modules à chargement différé importés : {', '.join(result['eager_lazy_modules'])}"
+            ))
+
+        self.stdout.write('     cumulé   propre  module (ms)')
+        for line in format_tree(result['imports'], options['min_ms'], options['depth']):
+            self.stdout.write(f'  {line}')
+
+        if options['top']:
+            self.stdout.write('  Temps propre le plus élevé (ms) :')
+            for node in top_modules(result['imports'], options['top']):
+                self.stdout.write(f'  {node.self_us / 1000:9.1f}  {node.name}')
+        self.stdout.write('')
@@ -0,0 +1,121 @@
+"""
+Format binaire des données de la carte (MessagePack).
+
+Servi à la place du JSON quand le client le demande (``Accept:
+application/msgpack`` ou ``?format=msgpack``), et pré-encodé avec
+l'instantané JSON (``snapshots``) à partir des mêmes données sérialisées.
+
+Les noms des champs ne sont écrits qu'une fois, dans l'en-tête : chaque
+entrée est une liste de valeurs dans l'ordre de ``*_fields``. Les
+coordonnées sont des entiers (degrés × ``scale``) ; un contour est un
+binaire de varints zigzag (LEB128) : premier point en absolu, puis les
+écarts successifs, latitude et longitude alternées. Le schéma et un
+décodeur JavaScript sont décrits dans le README (« Format binaire de la
+carte »).
+"""
+
+import msgpack
+import numpy as np
+
+MSGPACK_CONTENT_TYPE = 'application/msgpack'
+
+# Version du format, à incrémenter à chaque changement incompatible
+MAP_PAYLOAD_FORMAT = 1
+
+# 1e-6 degré ≈ 0,11 m, la précision des coordonnées des aéroports
+COORDINATE_SCALE = 10 ** 6
+
+AIRPORT_FIELDS = (
+    'id', 'name', 'code', 'airport_type', 'city', 'radius', 'description', 'created_by', 'created_at',
+    'latitude', 'longitude',
+)
+NATURAL_RESERVE_FIELDS = (
+    'id', 'reserve_id', 'name', 'type', 'area', 'description', 'created_by', 'created_at', 'coordinates',
+)
+NATIONAL_PARK_FIELDS = (
+    'id', 'park_id', 'name', 'type', 'area', 'description', 'created_by', 'created_at', 'coordinates',
+)
+
+
+def scaled(value):
+    return int(round(float(value) * COORDINATE_SCALE))
+
+
+def encode_ring(coordinates):
+    """Contour ``[[lat, lng], ...]`` en varints zigzag des écarts successifs"""
+    if not coordinates:
+        return b''
+    points = np.rint(np.asarray(coordinates, dtype=float) * COORDINATE_SCALE).astype(np.int64)
+    deltas = np.vstack([points[:1], np.diff(points, axis=0)]).ravel()
+    values = ((deltas << 1) ^ (deltas >> 63)).astype(np.uint64)
+
+    # Nombre d'octets de chaque varint (7 bits utiles par octet)
+    sizes = np.ones(len(values), dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        sizes += rest > 0
+        rest >>= np.uint64(7)
+    shifts = np.arange(sizes.max(), dtype=np.uint64) * np.uint64(7)
+    groups = (values[:, None] >> shifts) & np.uint64(0x7F)
+    position = np.arange(len(shifts))
+    continued = position < (sizes[:, None] - 1)
+    groups |= continued.astype(np.uint64) << np.uint64(7)
+    return groups[position < sizes[:, None]].astype(np.uint8).tobytes()
+
+
+def decode_ring(data):
+    """Inverse de ``encode_ring`` : liste ``[[lat, lng], ...]`` en degrés"""
+    values, value, shift = [], 0, 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            values.append((value >> 1) ^ -(value & 1))
+            value, shift = 0, 0
+    points = np.cumsum(np.asarray(values, dtype=np.int64).reshape(-1, 2), axis=0)
+    return (points / COORDINATE_SCALE).tolist()
+
+
+def _airport_row(data):
+    latitude, longitude = data['coordinates']
+    values = {**data, 'radius': float(data['radius']), 'latitude': scaled(latitude), 'longitude': scaled(longitude)}
+    return [values[field] for field in AIRPORT_FIELDS]
+
+
+def _zone_row(data, fields):
+    values = {**data, 'coordinates': encode_ring(data['coordinates'])}
+    return [values[field] for field in fields]
+
+
+def pack(payload):
+    # UUID (created_by) : chaîne, comme dans le JSON
+    return msgpack.packb(payload, use_bin_type=True, default=str)
+
+
+def encode_airports_payload(airports, aerodromes):
+    """Aéroports et aérodromes sérialisés (``AirportSerializer``) au format binaire"""
+    return pack({
+        'format': MAP_PAYLOAD_FORMAT,
+        'scale': COORDINATE_SCALE,
+        'airport_fields': list(AIRPORT_FIELDS),
+        'airports': [_airport_row(data) for data in airports],
+        'aerodromes': [_airport_row(data) for data in aerodromes],
+        'total_airports': len(airports),
+        'total_aerodromes': len(aerodromes),
+        'total_locations': len(airports) + len(aerodromes),
+    })
+
+
+def encode_protected_areas_payload(natural_reserves, national_parks):
+    """Zones protégées sérialisées au format binaire, contours en écarts"""
+    return pack({
+        'format': MAP_PAYLOAD_FORMAT,
+        'scale': COORDINATE_SCALE,
+        'natural_reserve_fields': list(NATURAL_RESERVE_FIELDS),
+        'national_park_fields': list(NATIONAL_PARK_FIELDS),
+        'natural_reserves': [_zone_row(data, NATURAL_RESERVE_FIELDS) for data in natural_reserves],
+        'national_parks': [_zone_row(data, NATIONAL_PARK_FIELDS) for data in national_parks],
+        'total_natural_reserves': len(natural_reserves),
+        'total_national_parks': len(national_parks),
+        'total_protected_areas': len(natural_reserves) + len(national_parks),
+    })
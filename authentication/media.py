@@ -0,0 +1,191 @@
+"""
+Service des fichiers médias (``MEDIA_ROOT``) en production.
+
+Les fichiers complets sont renvoyés par ``FileResponse``, que le serveur WSGI
+transmet avec ``sendfile`` (``wsgi.file_wrapper``) sans copie en mémoire. Si
+``MEDIA_ACCEL_REDIRECT_PREFIX`` est défini, l'envoi est délégué au serveur
+frontal (nginx, ``X-Accel-Redirect``) après les vérifications de la vue.
+
+La vue gère les requêtes conditionnelles (``If-None-Match``,
+``If-Modified-Since``) et les plages d'octets (``Range``, ``If-Range``). Les
+fichiers nommés d'après leur contenu sont immuables et servis avec un cache
+d'un an.
+"""
+
+import mimetypes
+import os
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from .storage import is_content_addressed
+
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('image/avif', '.avif')
+
+# Fichiers en cours d'écriture, jamais servis
+PRIVATE_SUFFIXES = ('.part', '.tmp')
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Taille des blocs lus pour une réponse partielle
+RANGE_BLOCK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    Plage unique ``bytes=<début>-<fin>`` -> (début, fin) inclus
+
+    Retourne None si l'en-tête est absent, mal formé ou demande plusieurs
+    plages (le fichier est alors servi en entier) ; lève RangeNotSatisfiable
+    si la plage est hors du fichier.
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    spec = header[len('bytes='):].strip()
+    if ',' in spec:
+        return None
+
+    first, separator, last = spec.partition('-')
+    if not separator:
+        return None
+    try:
+        if first.strip():
+            start = int(first)
+            end = int(last) if last.strip() else max(start, size - 1)
+        else:
+            # Suffixe : les <n> derniers octets
+            start, end = max(0, size - int(last)), size - 1
+    except ValueError:
+        return None
+    if start < 0 or end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+def _etag(name, stats):
+    if is_content_addressed(name):
+        return '"%s"' % os.path.splitext(os.path.basename(name))[0]
+    return '"%x-%x"' % (stats.st_mtime_ns, stats.st_size)
+
+
+def _cache_control(name):
+    if is_content_addressed(name):
+        return IMMUTABLE_CACHE_CONTROL
+    return f"public, max-age={getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600)}"
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or etag in etags or f'W/{etag}' in etags
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and int(mtime) <= since
+
+
+def _range_applies(request, etag, mtime):
+    """``If-Range`` : la plage ne vaut que si le fichier n'a pas changé"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+def _read_range(path, start, end):
+    with open(path, 'rb') as media:
+        media.seek(start)
+        remaining = end - start + 1
+        while remaining:
+            block = media.read(min(RANGE_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Servir un fichier de ``MEDIA_ROOT`` (GET/HEAD, plages d'octets, requêtes conditionnelles)
+    """
+    name = path.replace('\\', '/')
+    if not name or name.endswith(PRIVATE_SUFFIXES):
+        raise Http404('Fichier introuvable')
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, name)
+        stats = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404('Fichier introuvable')
+    if not stat.S_ISREG(stats.st_mode):
+        raise Http404('Fichier introuvable')
+
+    etag = _etag(name, stats)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stats.st_mtime),
+        'Cache-Control': _cache_control(name),
+        'Accept-Ranges': 'bytes',
+    }
+
+    if _not_modified(request, etag, stats.st_mtime):
+        response = HttpResponseNotModified()
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', None)
+    if accel_prefix:
+        # nginx envoie le fichier (plages comprises) depuis son emplacement interne
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(name)
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    byte_range = None
+    if _range_applies(request, etag, stats.st_mtime):
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), stats.st_size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stats.st_size}'
+            response['Accept-Ranges'] = 'bytes'
+            return response
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = stats.st_size
+    elif byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(_read_range(full_path, start, end), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{stats.st_size}'
+        response['Content-Length'] = end - start + 1
+    else:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+    for header, value in headers.items():
+        response[header] = value
+    return response
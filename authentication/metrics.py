@@ -0,0 +1,453 @@
+"""
+Instrumentation des requêtes de l'API.
+
+``RequestMetricsMiddleware`` mesure pour chaque requête le nombre et la
+durée des requêtes SQL, le temps d'authentification DRF, le temps de
+sérialisation (``serializer.data`` et rendu JSON) et la latence totale, puis
+les agrège par nom de vue. Les agrégats sont exposés au format texte de
+Prometheus par ``/api/metrics`` et, sur option (``METRICS_SERVER_TIMING``),
+renvoyés dans l'en-tête ``Server-Timing`` de chaque réponse. La collecte
+relève aussi l'occupation des pools de connexions à la base (saturation,
+attentes, connexions rejetées par la vérification de santé), le retard
+des réplicas en lecture et les succès par niveau des caches à deux niveaux.
+
+Les agrégats sont propres à chaque processus : avec plusieurs workers,
+chaque collecte ne voit que le worker qui y répond.
+
+Les vues peuvent déclarer un budget de requêtes SQL avec ``query_budget`` ;
+un dépassement est journalisé et compté, et ``authentication.testing``
+permet d'en faire une assertion dans les tests.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# Bornes des histogrammes : durées (s) et nombre de requêtes SQL
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+# Métriques exportées : nom -> (type, description, bornes)
+METRICS = {
+    'api_requests_total': ('counter', 'Requêtes HTTP par vue, méthode et statut', None),
+    'api_request_duration_seconds': ('histogram', 'Latence totale des requêtes', DURATION_BUCKETS),
+    'api_db_queries': ('histogram', 'Requêtes SQL par requête HTTP', QUERY_COUNT_BUCKETS),
+    'api_db_duration_seconds': ('histogram', 'Temps passé en base par requête HTTP', DURATION_BUCKETS),
+    'api_auth_duration_seconds': ('histogram', "Temps d'authentification DRF", DURATION_BUCKETS),
+    'api_serialization_duration_seconds': ('histogram', 'Temps de sérialisation et de rendu', DURATION_BUCKETS),
+    'api_query_budget_exceeded_total': ('counter', 'Requêtes HTTP ayant dépassé leur budget de requêtes SQL', None),
+    'db_pool_max_connections': ('gauge', 'Taille maximale du pool de connexions', None),
+    'db_pool_connections': ('gauge', 'Connexions ouvertes par le pool', None),
+    'db_pool_available_connections': ('gauge', 'Connexions libres dans le pool', None),
+    'db_pool_utilization': ('gauge', 'Part des connexions maximales en cours d\'utilisation (saturation si proche de 1)', None),
+    'db_pool_waiting_requests': ('gauge', 'Demandes de connexion en attente', None),
+    'db_pool_requests_total': ('counter', 'Connexions demandées au pool', None),
+    'db_pool_queued_requests_total': ('counter', 'Demandes ayant dû attendre une connexion libre', None),
+    'db_pool_wait_seconds_total': ('counter', "Temps total d'attente d'une connexion", None),
+    'db_pool_request_errors_total': ('counter', 'Demandes de connexion en échec (délai dépassé)', None),
+    'db_replica_lag_seconds': ('gauge', 'Retard de réplication relevé (+Inf : réplica injoignable)', None),
+    'cache_requests_total': ('counter', 'Lectures du cache à deux niveaux par niveau (local, partagé) et résultat', None),
+    'cache_hit_ratio': ('gauge', 'Taux de succès du cache à deux niveaux par niveau', None),
+    'cache_local_entries': ('gauge', 'Entrées du cache local du processus', None),
+    'cache_builds_total': ('counter', 'Valeurs recalculées après un échec des deux niveaux', None),
+    'cache_stampede_waits_total': ('counter', "Attentes du calcul d'un autre processus (effet de meute évité)", None),
+    'log_records_dropped_total': ('counter', 'Enregistrements de journal abandonnés (file d\'écriture pleine)', None),
+    'api_compressed_responses_total': ('counter', 'Réponses compressées par codage et mode (pré-compressée, à la volée)', None),
+    'db_pool_connections_lost_total': ('counter', 'Connexions rejetées par la vérification de santé', None),
+    'db_pool_connection_errors_total': ('counter', 'Échecs d\'ouverture de connexion', None),
+}
+
+# Statistiques psycopg_pool (get_stats) -> (métrique, facteur)
+POOL_STATS = {
+    'pool_max': ('db_pool_max_connections', 1),
+    'pool_size': ('db_pool_connections', 1),
+    'pool_available': ('db_pool_available_connections', 1),
+    'requests_waiting': ('db_pool_waiting_requests', 1),
+    'requests_num': ('db_pool_requests_total', 1),
+    'requests_queued': ('db_pool_queued_requests_total', 1),
+    'requests_wait_ms': ('db_pool_wait_seconds_total', 0.001),
+    'requests_errors': ('db_pool_request_errors_total', 1),
+    'connections_lost': ('db_pool_connections_lost_total', 1),
+    'connections_errors': ('db_pool_connection_errors_total', 1),
+}
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Mesures de la requête HTTP en cours"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.auth_time = 0.0
+        self.serialization_time = 0.0
+        self._depth = {}
+
+
+def count_query(execute, sql, params, many, context):
+    """
+    ``execute_wrapper`` de chaque connexion : compte et chronomètre les
+    requêtes SQL de la requête HTTP en cours
+
+    Les connexions sont propres à chaque thread et contexte (les vues
+    synchrones servies sous ASGI utilisent une autre connexion que le
+    middleware) ; les mesures suivent la requête par ``ContextVar``.
+    """
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.db_time += time.perf_counter() - start
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """Récepteur de ``connection_created`` : installer ``count_query`` sur la connexion"""
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def current_timings():
+    """Mesures de la requête en cours (None hors d'une requête instrumentée)"""
+    return _current.get()
+
+
+@contextmanager
+def timed(attribute):
+    """
+    Ajouter la durée du bloc à une mesure de la requête en cours ; seuls les
+    blocs les plus externes comptent (sérialiseurs imbriqués)
+    """
+    timings = _current.get()
+    if timings is None or timings._depth.get(attribute):
+        yield
+        return
+
+    timings._depth[attribute] = 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(timings, attribute, getattr(timings, attribute) + time.perf_counter() - start)
+        timings._depth[attribute] = 0
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """Agrégats en mémoire, par métrique et jeu d'étiquettes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _get(self, name, labels):
+        key = (name, tuple(sorted(labels.items())))
+        series = self._series.get(key)
+        if series is None:
+            kind, _, buckets = METRICS[name]
+            series = self._series[key] = Histogram(buckets) if kind == 'histogram' else [0]
+        return series
+
+    def increment(self, name, labels, value=1):
+        with self._lock:
+            self._get(name, labels)[0] += value
+
+    def observe(self, name, labels, value):
+        with self._lock:
+            self._get(name, labels).observe(value)
+
+    def set(self, name, labels, value):
+        """Valeur courante d'une jauge (ou d'un compteur tenu ailleurs)"""
+        with self._lock:
+            self._get(name, labels)[0] = value
+
+    def record(self, view, method, status_code, timings, duration, budget=None):
+        """Enregistrer les mesures d'une requête HTTP"""
+        labels = {'view': view, 'method': method}
+        with self._lock:
+            self._get('api_requests_total', {**labels, 'status': str(status_code)})[0] += 1
+            self._get('api_request_duration_seconds', labels).observe(duration)
+            self._get('api_db_queries', labels).observe(timings.queries)
+            self._get('api_db_duration_seconds', labels).observe(timings.db_time)
+            self._get('api_auth_duration_seconds', labels).observe(timings.auth_time)
+            self._get('api_serialization_duration_seconds', labels).observe(timings.serialization_time)
+            if budget is not None and timings.queries > budget:
+                self._get('api_query_budget_exceeded_total', labels)[0] += 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        """Export au format texte de Prometheus"""
+        with self._lock:
+            series = sorted(self._series.items())
+            lines = []
+            for name, (kind, description, _) in METRICS.items():
+                entries = [(labels, value) for (series_name, labels), value in series if series_name == name]
+                if not entries:
+                    continue
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in entries:
+                    if kind in ('counter', 'gauge'):
+                        lines.append(f'{name}{_format_labels(labels)} {value[0]}')
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(value.buckets + ('+Inf',), value.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{_format_labels(labels + (("le", str(bound)),))} {cumulative}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {value.sum:.6f}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        f'{key}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for key, value in labels
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+registry = MetricsRegistry()
+
+
+def query_budget(queries):
+    """
+    Déclarer le nombre maximal de requêtes SQL d'une vue ou d'une action,
+    authentification JWT comprise
+    """
+    def decorator(view):
+        view.query_budget = queries
+        return view
+    return decorator
+
+
+def declared_view_attribute(resolver_match, method, name):
+    """
+    Attribut déclaré par décorateur (``query_budget``...) sur la vue résolue,
+    ou sur l'action du ViewSet qui traite la méthode HTTP ; None sinon
+    """
+    if resolver_match is None:
+        return None
+
+    func = resolver_match.func
+    # Vue asynchrone confiant les écritures à une vue DRF (async_views.with_sync_fallback)
+    fallback = getattr(func, 'sync_fallback', None)
+    if fallback is not None and method.upper() not in ('GET', 'HEAD'):
+        func = fallback
+
+    value = getattr(func, name, None)
+    if value is not None:
+        return value
+
+    view_class = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    if view_class is None:
+        return None
+    actions = getattr(func, 'actions', None)
+    handler_name = actions.get(method.lower()) if actions else method.lower()
+    return getattr(getattr(view_class, handler_name or '', None), name, None)
+
+
+def declared_query_budget(resolver_match, method):
+    """Budget de requêtes déclaré pour la vue résolue et la méthode HTTP, ou None"""
+    return declared_view_attribute(resolver_match, method, 'query_budget')
+
+
+def connection_pools():
+    """Pools de connexions psycopg déjà créés dans ce processus : alias -> pool"""
+    pools = {}
+    for alias in connections:
+        pool = getattr(type(connections[alias]), '_connection_pools', {}).get(alias)
+        if pool is not None:
+            pools[alias] = pool
+    return pools
+
+
+def collect_pool_metrics():
+    """Relever les statistiques des pools de connexions (à chaque collecte)"""
+    for alias, pool in connection_pools().items():
+        stats = pool.get_stats()
+        labels = {'alias': alias}
+        for stat, (name, factor) in POOL_STATS.items():
+            registry.set(name, labels, stats.get(stat, 0) * factor)
+        pool_max = stats.get('pool_max') or 0
+        in_use = stats.get('pool_size', 0) - stats.get('pool_available', 0)
+        registry.set('db_pool_utilization', labels, round(in_use / pool_max, 4) if pool_max else 0)
+
+
+def collect_replica_metrics():
+    """Relever le retard de réplication des réplicas (à chaque collecte)"""
+    from .routers import replica_lag
+
+    for alias, lag in replica_lag.lags().items():
+        if lag is not None:
+            registry.set('db_replica_lag_seconds', {'alias': alias}, lag)
+
+
+def collect_cache_metrics():
+    """Relever les compteurs des caches à deux niveaux (à chaque collecte)"""
+    from .caching import tiered_caches
+
+    for namespace, tiered in tiered_caches().items():
+        labels = {'cache': namespace}
+        tiers = {
+            'local': (tiered.local.hits, tiered.local.misses),
+            'shared': (tiered.shared_hits, tiered.shared_misses),
+        }
+        for tier, (hits, misses) in tiers.items():
+            registry.set('cache_requests_total', {**labels, 'tier': tier, 'result': 'hit'}, hits)
+            registry.set('cache_requests_total', {**labels, 'tier': tier, 'result': 'miss'}, misses)
+            total = hits + misses
+            registry.set('cache_hit_ratio', {**labels, 'tier': tier}, round(hits / total, 4) if total else 0)
+        registry.set('cache_local_entries', labels, len(tiered.local))
+        registry.set('cache_builds_total', labels, tiered.builds)
+        registry.set('cache_stampede_waits_total', labels, tiered.stampede_waits)
+
+
+def view_label(request):
+    """Nom de vue utilisé comme étiquette (jamais le chemin, pour borner la cardinalité)"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match._func_path
+
+
+def server_timing(timings, duration):
+    """Valeur de l'en-tête Server-Timing"""
+    return ', '.join([
+        f'db;desc="{timings.queries} SQL";dur={timings.db_time * 1000:.1f}',
+        f'auth;dur={timings.auth_time * 1000:.1f}',
+        f'serialize;dur={timings.serialization_time * 1000:.1f}',
+        f'total;dur={duration * 1000:.1f}',
+    ])
+
+
+class RequestMetricsMiddleware:
+    """
+    Mesurer chaque requête et l'enregistrer dans le registre des métriques
+
+    Synchrone ou asynchrone selon la pile : sous ASGI, les vues asynchrones
+    ne repassent pas par un thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install_drf_hooks()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings, time.perf_counter() - start)
+
+    def _finish(self, request, response, timings, duration):
+        view = view_label(request)
+        budget = declared_query_budget(getattr(request, 'resolver_match', None), request.method)
+        registry.record(view, request.method, response.status_code, timings, duration, budget)
+
+        if budget is not None and timings.queries > budget:
+            logger.warning(
+                "Budget de requêtes dépassé pour %s (%s): %s requêtes pour un budget de %s",
+                view, request.method, timings.queries, budget
+            )
+
+        if getattr(settings, 'METRICS_SERVER_TIMING', False):
+            response['Server-Timing'] = server_timing(timings, duration)
+        return response
+
+
+def install_query_counting():
+    """Compter les requêtes SQL de chaque connexion (appelé au démarrage de l'application)"""
+    connection_created.connect(install_query_counter, dispatch_uid='metrics-query-counter')
+    for alias in connections:
+        # Connexions déjà ouvertes avant le démarrage de l'application
+        if connections[alias].connection is not None:
+            install_query_counter(None, connections[alias])
+
+
+def install_drf_hooks():
+    """
+    Chronométrer l'authentification DRF, ``serializer.data`` et le rendu
+    JSON. Appelé à la création du gestionnaire de requêtes (middleware) :
+    les commandes de gestion n'importent pas DRF pour autant.
+    """
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.serializers import BaseSerializer
+    from rest_framework.views import APIView
+
+    if getattr(APIView, '_metrics_hooks_installed', False):
+        return
+    APIView._metrics_hooks_installed = True
+
+    perform_authentication = APIView.perform_authentication
+    get_data = BaseSerializer.data.fget
+    render = JSONRenderer.render
+
+    def timed_perform_authentication(self, request):
+        with timed('auth_time'):
+            return perform_authentication(self, request)
+
+    def timed_data(self):
+        with timed('serialization_time'):
+            return get_data(self)
+
+    def timed_render(self, *args, **kwargs):
+        with timed('serialization_time'):
+            return render(self, *args, **kwargs)
+
+    APIView.perform_authentication = timed_perform_authentication
+    BaseSerializer.data = property(timed_data)
+    JSONRenderer.render = timed_render
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0011_jwt_blacklist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='droneflight',
+            name='distance_flown',
+            field=models.FloatField(blank=True, null=True, verbose_name='Distance parcourue (km)'),
+        ),
+        migrations.AddField(
+            model_name='droneflight',
+            name='max_altitude',
+            field=models.FloatField(blank=True, null=True, verbose_name='Altitude max atteinte (m)'),
+        ),
+        migrations.AddField(
+            model_name='droneflight',
+            name='max_distance_from_home',
+            field=models.FloatField(blank=True, null=True, verbose_name='Distance max du point de départ (km)'),
+        ),
+        migrations.AddField(
+            model_name='droneflight',
+            name='restricted_zone_time',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Temps en zone réglementée (s)'),
+        ),
+        migrations.AddField(
+            model_name='droneflight',
+            name='track',
+            field=models.JSONField(blank=True, help_text='Liste de points [lat, lng, altitude (m), temps (s)]', null=True, verbose_name='Trace GPS'),
+        ),
+        migrations.AddIndex(
+            model_name='droneflight',
+            index=models.Index(fields=['distance_flown'], name='drone_fligh_distanc_b1cd4e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='droneflight',
+            index=models.Index(fields=['max_altitude'], name='drone_fligh_max_alt_0551ea_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='droneflight',
+            index=models.Index(fields=['max_distance_from_home'], name='drone_fligh_max_dis_e53b74_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='droneflight',
+            index=models.Index(fields=['restricted_zone_time'], name='drone_fligh_restric_e26166_idx'),
+        ),
+    ]
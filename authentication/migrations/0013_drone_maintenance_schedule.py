@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0012_droneflight_track_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaintenanceDueDrone',
+            fields=[
+            ],
+            options={
+                'verbose_name': 'Drone à entretenir',
+                'verbose_name_plural': 'Drones à entretenir',
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('authentication.drone',),
+        ),
+        migrations.AddField(
+            model_name='drone',
+            name='maintenance_interval_hours',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Intervalle de maintenance (heures de vol)'),
+        ),
+        migrations.AddIndex(
+            model_name='drone',
+            index=models.Index(fields=['next_maintenance'], name='drone_next_ma_3ba6d3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drone',
+            index=models.Index(fields=['user', 'next_maintenance'], name='drone_user_id_894fb5_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:37
+
+import uuid
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def backfill_flight_rollups(apps, schema_editor):
+    DroneFlight = apps.get_model('authentication', 'DroneFlight')
+    FlightDailyRollup = apps.get_model('authentication', 'FlightDailyRollup')
+
+    buckets = {}
+    rows = DroneFlight.objects.order_by().annotate(day=TruncDate('flight_date')).values(
+        'day', 'drone__drone_type', 'location'
+    ).annotate(flight_count=models.Count('id'), total_minutes=models.Sum('duration'))
+    for row in rows:
+        key = (row['day'], row['drone__drone_type'], ' '.join((row['location'] or '').split()))
+        count, minutes = buckets.get(key, (0, 0))
+        buckets[key] = (count + row['flight_count'], minutes + (row['total_minutes'] or 0))
+
+    FlightDailyRollup.objects.bulk_create(
+        [
+            FlightDailyRollup(day=day, drone_type=drone_type, location=location, flight_count=count, total_minutes=minutes)
+            for (day, drone_type, location), (count, minutes) in buckets.items()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0013_drone_maintenance_schedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlightDailyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('day', models.DateField(verbose_name='Jour')),
+                ('drone_type', models.CharField(choices=[('quadcopter', 'Quadricoptère'), ('hexacopter', 'Hexacoptère'), ('octocopter', 'Octocoptère'), ('fixed_wing', 'Aile fixe'), ('helicopter', 'Hélicoptère'), ('other', 'Autre')], max_length=20, verbose_name='Type de drone')),
+                ('location', models.CharField(max_length=200, verbose_name='Lieu de vol')),
+                ('flight_count', models.IntegerField(default=0, verbose_name='Nombre de vols')),
+                ('total_minutes', models.BigIntegerField(default=0, verbose_name='Durée totale (minutes)')),
+            ],
+            options={
+                'verbose_name': 'Agrégat quotidien de vols',
+                'verbose_name_plural': 'Agrégats quotidiens de vols',
+                'db_table': 'flight_daily_rollup',
+                'ordering': ['-day', 'drone_type', 'location'],
+                'indexes': [models.Index(fields=['drone_type', 'day'], name='flight_dail_drone_t_bc0263_idx'), models.Index(fields=['location', 'day'], name='flight_dail_locatio_95bd76_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'drone_type', 'location'), name='flight_rollup_unique_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_flight_rollups, migrations.RunPython.noop),
+    ]
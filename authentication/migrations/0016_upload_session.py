@@ -0,0 +1,42 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:40
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0015_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(choices=[('drone_photo', 'Photo de drone'), ('carousel_image', 'Image de carrousel')], max_length=20, verbose_name='Cible')),
+                ('object_id', models.UUIDField(verbose_name="Identifiant de l'objet cible")),
+                ('filename', models.CharField(max_length=255, verbose_name='Nom du fichier')),
+                ('content_type', models.CharField(max_length=100, verbose_name='Type de contenu')),
+                ('total_size', models.BigIntegerField(verbose_name='Taille totale (octets)')),
+                ('received_bytes', models.BigIntegerField(default=0, verbose_name='Octets reçus')),
+                ('chunk_digests', models.JSONField(blank=True, default=list, verbose_name='Empreintes SHA-256 des morceaux')),
+                ('checksum', models.CharField(blank=True, max_length=80, verbose_name='Empreinte du fichier')),
+                ('storage_name', models.CharField(max_length=255, verbose_name='Emplacement de stockage')),
+                ('status', models.CharField(choices=[('pending', 'En cours'), ('complete', 'Terminé'), ('failed', 'Échoué')], default='pending', max_length=10, verbose_name='Statut')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Dernière modification')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Téléversement par morceaux',
+                'verbose_name_plural': 'Téléversements par morceaux',
+                'db_table': 'upload_session',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='upload_sess_status_9f71fb_idx')],
+            },
+        ),
+    ]
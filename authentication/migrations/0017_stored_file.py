@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:44
+
+import uuid
+from collections import Counter
+from django.db import migrations, models
+
+
+def backfill_stored_files(apps, schema_editor):
+    StoredFile = apps.get_model('authentication', 'StoredFile')
+
+    references = Counter()
+    for model_name, field_name in [('Drone', 'photo'), ('UserProfile', 'avatar'), ('CarouselImage', 'image')]:
+        model = apps.get_model('authentication', model_name)
+        rows = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+        references.update(rows.values_list(field_name, flat=True).iterator())
+
+    StoredFile.objects.bulk_create(
+        [StoredFile(name=name, reference_count=count) for name, count in references.items()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0016_upload_session'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Nom de stockage')),
+                ('reference_count', models.IntegerField(default=0, verbose_name='Nombre de références')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Dernière modification')),
+            ],
+            options={
+                'verbose_name': 'Fichier stocké',
+                'verbose_name_plural': 'Fichiers stockés',
+                'db_table': 'stored_file',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RunPython(backfill_stored_files, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-19 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('authentication', '0017_stored_file'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='drone',
+            index=models.Index(fields=['created_at'], name='drone_created_8d5ce2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drone',
+            index=models.Index(fields=['drone_type', 'status'], name='drone_drone_t_32a144_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='droneflight',
+            index=models.Index(fields=['flight_date'], name='drone_fligh_flight__5cddba_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='droneflight',
+            index=models.Index(fields=['created_at'], name='drone_fligh_created_c1efda_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jwtblacklistedtoken',
+            index=models.Index(fields=['blacklisted_at'], name='jwt_blackli_blackli_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['created_at'], name='auth_user_created_2cecd0_idx'),
+        ),
+    ]
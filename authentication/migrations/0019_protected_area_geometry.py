@@ -0,0 +1,96 @@
+# Generated by Django 5.2.5 on 2026-10-19 07:21
+
+from django.db import migrations, models
+
+from authentication.geometry import geometry_summary
+
+
+def backfill_geometry(apps, schema_editor):
+    """Calculer l'emprise et l'aperçu des zones protégées existantes"""
+    for model_name in ('NaturalReserve', 'NationalPark'):
+        model = apps.get_model('authentication', model_name)
+        areas = []
+        for area in model.objects.only('pk', 'coordinates').iterator(chunk_size=100):
+            for field, value in geometry_summary(area.coordinates).items():
+                setattr(area, field, value)
+            areas.append(area)
+        model.objects.bulk_update(areas, list(geometry_summary(None)), batch_size=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0018_admin_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nationalpark',
+            name='geometry_preview',
+            field=models.TextField(blank=True, editable=False, verbose_name='Aperçu du polygone (SVG)'),
+        ),
+        migrations.AddField(
+            model_name='nationalpark',
+            name='max_latitude',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Latitude max'),
+        ),
+        migrations.AddField(
+            model_name='nationalpark',
+            name='max_longitude',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Longitude max'),
+        ),
+        migrations.AddField(
+            model_name='nationalpark',
+            name='min_latitude',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Latitude min'),
+        ),
+        migrations.AddField(
+            model_name='nationalpark',
+            name='min_longitude',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Longitude min'),
+        ),
+        migrations.AddField(
+            model_name='nationalpark',
+            name='vertex_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de sommets'),
+        ),
+        migrations.AddField(
+            model_name='naturalreserve',
+            name='geometry_preview',
+            field=models.TextField(blank=True, editable=False, verbose_name='Aperçu du polygone (SVG)'),
+        ),
+        migrations.AddField(
+            model_name='naturalreserve',
+            name='max_latitude',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Latitude max'),
+        ),
+        migrations.AddField(
+            model_name='naturalreserve',
+            name='max_longitude',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Longitude max'),
+        ),
+        migrations.AddField(
+            model_name='naturalreserve',
+            name='min_latitude',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Latitude min'),
+        ),
+        migrations.AddField(
+            model_name='naturalreserve',
+            name='min_longitude',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Longitude min'),
+        ),
+        migrations.AddField(
+            model_name='naturalreserve',
+            name='vertex_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de sommets'),
+        ),
+        migrations.AddIndex(
+            model_name='nationalpark',
+            index=models.Index(fields=['is_active', 'min_latitude', 'max_latitude'], name='national_pa_is_acti_704ddf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='naturalreserve',
+            index=models.Index(fields=['is_active', 'min_latitude', 'max_latitude'], name='natural_res_is_acti_9a11b8_idx'),
+        ),
+        migrations.RunPython(backfill_geometry, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-19 07:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0019_protected_area_geometry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='airport',
+            name='possible_duplicates',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Doublons possibles'),
+        ),
+        migrations.AddField(
+            model_name='nationalpark',
+            name='possible_duplicates',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Doublons possibles'),
+        ),
+        migrations.AddField(
+            model_name='naturalreserve',
+            name='possible_duplicates',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Doublons possibles'),
+        ),
+        migrations.AddIndex(
+            model_name='nationalpark',
+            index=models.Index(fields=['min_latitude', 'max_latitude', 'min_longitude', 'max_longitude'], name='national_pa_min_lat_e491f7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='naturalreserve',
+            index=models.Index(fields=['min_latitude', 'max_latitude', 'min_longitude', 'max_longitude'], name='natural_res_min_lat_43fab6_idx'),
+        ),
+    ]
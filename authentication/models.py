@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+import datetime
 import uuid
+from decimal import Decimal
 
 
 class UserManager(BaseUserManager):
@@ -60,6 +62,9 @@ class User(AbstractUser):
         verbose_name = "Utilisateur"
         verbose_name_plural = "Utilisateurs"
         db_table = 'auth_user'
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.email})"
@@ -80,6 +85,7 @@ class UserProfile(models.Model):
     """
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True, verbose_name="Photo de profil")
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Déclinaisons de la photo de profil")
     bio = models.TextField(blank=True, verbose_name="Biographie")
     birth_date = models.DateField(blank=True, null=True, verbose_name="Date de naissance")
     address = models.TextField(blank=True, verbose_name="Adresse")
@@ -94,6 +100,12 @@ class UserProfile(models.Model):
     
     def __str__(self):
         return f"Profil de {self.user.full_name}"
+    
+    @property
+    def avatar_srcset(self):
+        """Retourne les srcset des déclinaisons redimensionnées par format"""
+        from .images import build_srcset
+        return build_srcset(self.avatar_variants)
 
 
 class PasswordResetToken(models.Model):
@@ -120,6 +132,58 @@ class PasswordResetToken(models.Model):
         return timezone.now() > self.expires_at
 
 
+class DroneQuerySet(models.QuerySet):
+    """
+    QuerySet des drones avec le statut de maintenance calculé côté base
+    """
+    
+    def with_maintenance_status(self, today=None):
+        """
+        Annoter l'âge, les minutes de vol depuis la dernière maintenance et
+        l'échéance de maintenance (date prévue ou intervalle d'heures de vol)
+        """
+        from django.utils import timezone
+        from django.db.models.functions import Coalesce
+        
+        today = today or timezone.now().date()
+        
+        flight_minutes = DroneFlight.objects.filter(
+            drone=models.OuterRef('pk'),
+            flight_date__date__gte=Coalesce(
+                models.OuterRef('last_maintenance'),
+                models.Value(datetime.date.min, output_field=models.DateField())
+            ),
+        ).order_by().values('drone').annotate(
+            total=models.Sum('duration')
+        ).values('total')
+        
+        return self.annotate(
+            flight_minutes_since_maintenance=Coalesce(
+                models.Subquery(flight_minutes, output_field=models.IntegerField()),
+                models.Value(0)
+            ),
+        ).annotate(
+            is_maintenance_due=models.Case(
+                models.When(next_maintenance__lte=today, then=models.Value(True)),
+                models.When(
+                    maintenance_interval_hours__isnull=False,
+                    flight_minutes_since_maintenance__gte=models.F('maintenance_interval_hours') * 60,
+                    then=models.Value(True)
+                ),
+                default=models.Value(False),
+                output_field=models.BooleanField(),
+            ),
+            age_in_days=models.ExpressionWrapper(
+                models.Value(today, output_field=models.DateField()) - models.F('purchase_date'),
+                output_field=models.DurationField()
+            ),
+        )
+    
+    def maintenance_due(self, today=None):
+        """Drones dont la maintenance est due, en une seule requête"""
+        return self.with_maintenance_status(today).filter(is_maintenance_due=True)
+
+
 class Drone(models.Model):
     """
     Drone model for users to manage their drones
@@ -159,34 +223,79 @@ class Drone(models.Model):
     purchase_date = models.DateField(blank=True, null=True, verbose_name="Date d'achat")
     last_maintenance = models.DateField(blank=True, null=True, verbose_name="Dernière maintenance")
     next_maintenance = models.DateField(blank=True, null=True, verbose_name="Prochaine maintenance")
+    maintenance_interval_hours = models.PositiveIntegerField(blank=True, null=True, verbose_name="Intervalle de maintenance (heures de vol)")
     photo = models.ImageField(upload_to='drones/', blank=True, null=True, verbose_name="Photo du drone")
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Déclinaisons de la photo")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
     
+    objects = DroneQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Drone"
         verbose_name_plural = "Drones"
         db_table = 'drone'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['next_maintenance']),
+            models.Index(fields=['user', 'next_maintenance']),
+            models.Index(fields=['created_at']),
+            models.Index(fields=['drone_type', 'status']),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.user.full_name}"
     
     @property
     def is_maintenance_due(self):
-        """Check if maintenance is due"""
+        """
+        Check if maintenance is due (annotated value when loaded via with_maintenance_status)
+
+        Sans l'annotation, seule l'échéance ``next_maintenance`` est vérifiée :
+        aucune requête par instance. Les listes chargent les drones avec
+        ``with_maintenance_status()`` pour tenir compte des heures de vol.
+        """
+        if hasattr(self, '_is_maintenance_due'):
+            return self._is_maintenance_due
+        
         from django.utils import timezone
-        if self.next_maintenance:
-            return timezone.now().date() >= self.next_maintenance
-        return False
+        return bool(self.next_maintenance and timezone.now().date() >= self.next_maintenance)
+    
+    @is_maintenance_due.setter
+    def is_maintenance_due(self, value):
+        self._is_maintenance_due = bool(value)
     
     @property
     def age_in_days(self):
-        """Calculate drone age in days"""
+        """Calculate drone age in days (annotated value when loaded via with_maintenance_status)"""
+        if hasattr(self, '_age_in_days'):
+            return self._age_in_days
+        
         from django.utils import timezone
         if self.purchase_date:
             return (timezone.now().date() - self.purchase_date).days
         return None
+    
+    @age_in_days.setter
+    def age_in_days(self, value):
+        self._age_in_days = value.days if isinstance(value, datetime.timedelta) else value
+    
+    @property
+    def photo_srcset(self):
+        """Retourne les srcset des déclinaisons redimensionnées par format"""
+        from .images import build_srcset
+        return build_srcset(self.photo_variants)
+
+
+class MaintenanceDueDrone(Drone):
+    """
+    Vue d'administration des drones de toute la flotte dont la maintenance est due
+    """
+    
+    class Meta:
+        proxy = True
+        verbose_name = "Drone à entretenir"
+        verbose_name_plural = "Drones à entretenir"
 
 
 class DroneFlight(models.Model):
@@ -202,6 +311,11 @@ class DroneFlight(models.Model):
     purpose = models.CharField(max_length=200, blank=True, verbose_name="Objectif du vol")
     weather_conditions = models.TextField(blank=True, verbose_name="Conditions météo")
     notes = models.TextField(blank=True, verbose_name="Notes de vol")
+    track = models.JSONField(blank=True, null=True, verbose_name="Trace GPS", help_text="Liste de points [lat, lng, altitude (m), temps (s)]")
+    distance_flown = models.FloatField(blank=True, null=True, verbose_name="Distance parcourue (km)")
+    max_altitude = models.FloatField(blank=True, null=True, verbose_name="Altitude max atteinte (m)")
+    max_distance_from_home = models.FloatField(blank=True, null=True, verbose_name="Distance max du point de départ (km)")
+    restricted_zone_time = models.PositiveIntegerField(blank=True, null=True, verbose_name="Temps en zone réglementée (s)")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
     
     class Meta:
@@ -209,9 +323,64 @@ class DroneFlight(models.Model):
         verbose_name_plural = "Vols de drones"
         db_table = 'drone_flight'
         ordering = ['-flight_date']
+        indexes = [
+            models.Index(fields=['flight_date']),
+            models.Index(fields=['created_at']),
+            models.Index(fields=['distance_flown']),
+            models.Index(fields=['max_altitude']),
+            models.Index(fields=['max_distance_from_home']),
+            models.Index(fields=['restricted_zone_time']),
+        ]
     
     def __str__(self):
         return f"Vol de {self.drone.name} le {self.flight_date.strftime('%d/%m/%Y')}"
+    
+    def set_track(self, track, restricted_zones=None):
+        """Enregistrer une trace et calculer une seule fois ses métriques dérivées"""
+        from .flight_metrics import compute_flight_metrics, restricted_zones_from_airports
+        
+        self.track = track
+        if not track:
+            self.distance_flown = None
+            self.max_altitude = None
+            self.max_distance_from_home = None
+            self.restricted_zone_time = None
+            return
+        
+        if restricted_zones is None:
+            restricted_zones = restricted_zones_from_airports()
+        metrics = compute_flight_metrics(track, self.duration, restricted_zones)
+        for field, value in metrics.items():
+            setattr(self, field, value)
+
+
+class FlightDailyRollup(models.Model):
+    """
+    Agrégats quotidiens des vols par type de drone et lieu, tenus à jour à
+    chaque création, modification ou suppression de vol (rapports nationaux)
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    day = models.DateField(verbose_name="Jour")
+    drone_type = models.CharField(max_length=20, choices=Drone.DRONE_TYPES, verbose_name="Type de drone")
+    location = models.CharField(max_length=200, verbose_name="Lieu de vol")
+    flight_count = models.IntegerField(default=0, verbose_name="Nombre de vols")
+    total_minutes = models.BigIntegerField(default=0, verbose_name="Durée totale (minutes)")
+    
+    class Meta:
+        verbose_name = "Agrégat quotidien de vols"
+        verbose_name_plural = "Agrégats quotidiens de vols"
+        db_table = 'flight_daily_rollup'
+        ordering = ['-day', 'drone_type', 'location']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'drone_type', 'location'], name='flight_rollup_unique_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['drone_type', 'day']),
+            models.Index(fields=['location', 'day']),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} - {self.get_drone_type_display()} - {self.location} ({self.flight_count} vols)"
 
 
 class CarouselImage(models.Model):
@@ -222,6 +391,7 @@ class CarouselImage(models.Model):
     title = models.CharField(max_length=200, verbose_name="Titre de l'image")
     description = models.TextField(blank=True, verbose_name="Description")
     image = models.ImageField(upload_to='carousel/', verbose_name="Image")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Déclinaisons de l'image")
     order = models.PositiveIntegerField(default=0, verbose_name="Ordre d'affichage")
     is_active = models.BooleanField(default=True, verbose_name="Actif")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
@@ -242,6 +412,96 @@ class CarouselImage(models.Model):
         if self.image:
             return self.image.url
         return None
+    
+    @property
+    def image_srcset(self):
+        """Retourne les srcset des déclinaisons redimensionnées par format"""
+        from .images import build_srcset
+        return build_srcset(self.image_variants)
+
+
+class UploadSession(models.Model):
+    """
+    Téléversement par morceaux (reprenable) d'une image de drone ou de carrousel
+    """
+    TARGET_CHOICES = [
+        ('drone_photo', 'Photo de drone'),
+        ('carousel_image', 'Image de carrousel'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'En cours'),
+        ('complete', 'Terminé'),
+        ('failed', 'Échoué'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions', verbose_name="Utilisateur")
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES, verbose_name="Cible")
+    object_id = models.UUIDField(verbose_name="Identifiant de l'objet cible")
+    filename = models.CharField(max_length=255, verbose_name="Nom du fichier")
+    content_type = models.CharField(max_length=100, verbose_name="Type de contenu")
+    total_size = models.BigIntegerField(verbose_name="Taille totale (octets)")
+    received_bytes = models.BigIntegerField(default=0, verbose_name="Octets reçus")
+    chunk_digests = models.JSONField(default=list, blank=True, verbose_name="Empreintes SHA-256 des morceaux")
+    checksum = models.CharField(max_length=80, blank=True, verbose_name="Empreinte du fichier")
+    storage_name = models.CharField(max_length=255, verbose_name="Emplacement de stockage")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name="Statut")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
+    
+    class Meta:
+        verbose_name = "Téléversement par morceaux"
+        verbose_name_plural = "Téléversements par morceaux"
+        db_table = 'upload_session'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.filename} ({self.received_bytes}/{self.total_size} octets)"
+
+
+class StoredFile(models.Model):
+    """
+    Compteur de références d'un fichier média adressé par contenu
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=255, unique=True, verbose_name="Nom de stockage")
+    reference_count = models.IntegerField(default=0, verbose_name="Nombre de références")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
+    
+    class Meta:
+        verbose_name = "Fichier stocké"
+        verbose_name_plural = "Fichiers stockés"
+        db_table = 'stored_file'
+        ordering = ['name']
+    
+    def __str__(self):
+        return f"{self.name} ({self.reference_count} référence(s))"
+
+
+class AirportQuerySet(models.QuerySet):
+    """Requêtes de la file de modération des aéroports"""
+
+    def with_overlap_warning(self):
+        """
+        Annoter ``overlaps_approved`` : la zone interdite recouvre celle d'un
+        aéroport approuvé (carré de côté 2 × rayon)
+        """
+        # 1° ≈ 111 km (multiplication : la division de décimaux est entière sous SQLite)
+        reach = (models.OuterRef('radius') + models.F('radius')) * Decimal('0.009')
+        return self.annotate(overlaps_approved=models.Exists(
+            Airport.objects.filter(
+                is_active=True,
+                latitude__gt=models.OuterRef('latitude') - reach,
+                latitude__lt=models.OuterRef('latitude') + reach,
+                longitude__gt=models.OuterRef('longitude') - reach,
+                longitude__lt=models.OuterRef('longitude') + reach,
+            ).exclude(pk=models.OuterRef('pk'))
+        ))
 
 
 class Airport(models.Model):
@@ -265,10 +525,13 @@ class Airport(models.Model):
     radius = models.DecimalField(max_digits=5, decimal_places=2, verbose_name="Rayon de la zone interdite (km)")
     description = models.TextField(blank=True, verbose_name="Description")
     is_active = models.BooleanField(default=False, verbose_name="Approuvé par l'admin")
+    possible_duplicates = models.JSONField(default=list, blank=True, editable=False, verbose_name="Doublons possibles")
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Créé par")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
 
+    objects = AirportQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Aéroport/Aérodrome"
         verbose_name_plural = "Aéroports/Aérodromes"
@@ -293,7 +556,90 @@ class Airport(models.Model):
         return self.airport_type in ['international', 'domestic', 'aerodrome']
 
 
-class NaturalReserve(models.Model):
+class ProtectedAreaQuerySet(models.QuerySet):
+    """Requêtes de la file de modération des zones protégées"""
+
+    def with_overlap_warning(self):
+        """
+        Annoter ``overlaps_approved`` : l'emprise recouvre celle d'une zone
+        protégée approuvée (réserve ou parc), sans charger les polygones
+        """
+        def overlapping(model):
+            return models.Exists(model.objects.filter(
+                is_active=True,
+                min_latitude__lte=models.OuterRef('max_latitude'),
+                max_latitude__gte=models.OuterRef('min_latitude'),
+                min_longitude__lte=models.OuterRef('max_longitude'),
+                max_longitude__gte=models.OuterRef('min_longitude'),
+            ).exclude(pk=models.OuterRef('pk')))
+
+        return self.annotate(overlaps_approved=overlapping(NaturalReserve) | overlapping(NationalPark))
+
+
+class ProtectedAreaGeometry(models.Model):
+    """
+    Emprise et aperçu du polygone ``coordinates``, recalculés à chaque
+    enregistrement des coordonnées (``authentication.geometry``)
+    """
+    min_latitude = models.FloatField(null=True, blank=True, editable=False, verbose_name="Latitude min")
+    max_latitude = models.FloatField(null=True, blank=True, editable=False, verbose_name="Latitude max")
+    min_longitude = models.FloatField(null=True, blank=True, editable=False, verbose_name="Longitude min")
+    max_longitude = models.FloatField(null=True, blank=True, editable=False, verbose_name="Longitude max")
+    vertex_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre de sommets")
+    geometry_preview = models.TextField(blank=True, editable=False, verbose_name="Aperçu du polygone (SVG)")
+    # Quasi-doublons relevés à la soumission (authentication.geometry.find_duplicate_zones)
+    possible_duplicates = models.JSONField(default=list, blank=True, editable=False, verbose_name="Doublons possibles")
+
+    GEOMETRY_FIELDS = (
+        'min_latitude', 'max_latitude', 'min_longitude', 'max_longitude', 'vertex_count', 'geometry_preview'
+    )
+
+    objects = ProtectedAreaQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def set_geometry_summary(self):
+        """Recalculer l'emprise et l'aperçu à partir de ``coordinates``"""
+        from .geometry import geometry_summary
+
+        for field, value in geometry_summary(self.coordinates).items():
+            setattr(self, field, value)
+
+    def validate_span(self):
+        """Hauteur bornée par ZONE_MAX_SPAN_DEGREES, comme dans l'API (admin, peuplement)"""
+        from django.core.exceptions import ValidationError
+        from .geometry import zone_span_error
+
+        if self.min_latitude is not None:
+            error = zone_span_error(self.min_latitude, self.max_latitude)
+            if error:
+                raise ValidationError({'coordinates': error})
+
+    def clean(self):
+        """Validation personnalisée"""
+        from django.core.exceptions import ValidationError
+        from .geometry import polygon_points
+
+        super().clean()
+        try:
+            polygon_points(self.coordinates)
+        except ValueError as e:
+            raise ValidationError({'coordinates': str(e)})
+        self.set_geometry_summary()
+        self.validate_span()
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'coordinates' in update_fields:
+            self.set_geometry_summary()
+            self.validate_span()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *self.GEOMETRY_FIELDS}
+        super().save(*args, **kwargs)
+
+
+class NaturalReserve(ProtectedAreaGeometry):
     """
     Modèle pour les réserves naturelles de la Côte d'Ivoire
     """
@@ -316,6 +662,8 @@ class NaturalReserve(models.Model):
         ordering = ['name']
         indexes = [
             models.Index(fields=['is_active']),
+            models.Index(fields=['is_active', 'min_latitude', 'max_latitude']),
+            models.Index(fields=['min_latitude', 'max_latitude', 'min_longitude', 'max_longitude']),
         ]
     
     def __str__(self):
@@ -329,7 +677,7 @@ class NaturalReserve(models.Model):
         return []
 
 
-class NationalPark(models.Model):
+class NationalPark(ProtectedAreaGeometry):
     """
     Modèle pour les parcs nationaux de la Côte d'Ivoire
     """
@@ -352,6 +700,8 @@ class NationalPark(models.Model):
         ordering = ['name']
         indexes = [
             models.Index(fields=['is_active']),
+            models.Index(fields=['is_active', 'min_latitude', 'max_latitude']),
+            models.Index(fields=['min_latitude', 'max_latitude', 'min_longitude', 'max_longitude']),
         ]
     
     def __str__(self):
@@ -452,6 +802,7 @@ class JWTBlacklistedToken(models.Model):
             models.Index(fields=['user_id'], name='jwt_blackli_user_id_idx'),
             models.Index(fields=['token_type'], name='jwt_blackli_token_ty_idx'),
             models.Index(fields=['expires_at'], name='jwt_blackli_expires_idx'),
+            models.Index(fields=['blacklisted_at'], name='jwt_blackli_blackli_idx'),
         ]
     
     def __str__(self):
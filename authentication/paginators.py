@@ -0,0 +1,50 @@
+"""
+Pagination de l'administration sans ``COUNT(*)`` complet.
+
+Le paginateur par défaut compte toutes les lignes à chaque page : sur les
+tables de vols et de tokens blacklistés, ce comptage coûte plus cher que la
+page elle-même. ``EstimatedCountPaginator`` utilise :
+
+- sans filtre ni recherche, sous PostgreSQL : l'estimation du planificateur
+  (``pg_class.reltuples``, tenue à jour par ``ANALYZE``) si la table dépasse
+  ``ADMIN_COUNT_ESTIMATE_MIN_ROWS`` lignes ;
+- sinon, un comptage plafonné à ``ADMIN_COUNT_LIMIT`` lignes : au-delà, la
+  liste affiche le plafond et ses pages, à affiner par les filtres.
+"""
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(model, using='default'):
+    """Nombre de lignes estimé par PostgreSQL, ou None (autre base, table jamais analysée)"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)',
+            [connection.ops.quote_name(model._meta.db_table)]
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginateur à nombre de lignes estimé (table entière) ou plafonné (liste filtrée)"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = queryset.query
+        if not query.where and not query.distinct and not query.combinator:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= getattr(settings, 'ADMIN_COUNT_ESTIMATE_MIN_ROWS', 100_000):
+                return estimate
+
+        limit = getattr(settings, 'ADMIN_COUNT_LIMIT', 10_000)
+        return queryset.order_by().values('pk')[:limit].count()
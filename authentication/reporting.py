@@ -0,0 +1,157 @@
+"""
+Rapports nationaux sur les vols de drones.
+
+Les rapports sont calculés sur la table ``FlightDailyRollup`` (un seau par
+jour, type de drone et lieu) maintenue de façon incrémentale par les signaux
+de ``DroneFlight`` ; la table brute des vols n'est relue que par
+``rebuild_rollups``.
+"""
+
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import DroneFlight, FlightDailyRollup
+
+# Dimensions de regroupement acceptées par les rapports
+GROUP_BY_FIELDS = {
+    'day': 'day',
+    'month': 'month',
+    'drone_type': 'drone_type',
+    'location': 'location',
+}
+
+
+def normalize_location(location):
+    """Normaliser un lieu de vol pour le regroupement (espaces superflus)"""
+    return ' '.join((location or '').split())
+
+
+def rollup_key(flight_date, drone_type, location):
+    """Seau (jour, type de drone, lieu) d'un vol"""
+    return (timezone.localdate(flight_date), drone_type, normalize_location(location))
+
+
+def apply_flight_delta(key, flight_count, total_minutes):
+    """
+    Ajouter (ou retirer) des vols d'un seau avec un UPDATE atomique,
+    en créant le seau au premier vol
+    """
+    day, drone_type, location = key
+    bucket = FlightDailyRollup.objects.filter(day=day, drone_type=drone_type, location=location)
+    values = {
+        'flight_count': models.F('flight_count') + flight_count,
+        'total_minutes': models.F('total_minutes') + total_minutes,
+    }
+
+    if bucket.update(**values):
+        return
+
+    try:
+        with transaction.atomic():
+            FlightDailyRollup.objects.create(
+                day=day, drone_type=drone_type, location=location,
+                flight_count=flight_count, total_minutes=total_minutes
+            )
+    except IntegrityError:
+        # Seau créé entre-temps par une requête concurrente
+        bucket.update(**values)
+
+
+def flight_buckets(flights):
+    """Nombre de vols et minutes de vol par seau (jour, type de drone, lieu)"""
+    buckets = {}
+    rows = flights.annotate(day=TruncDate('flight_date')).values(
+        'day', 'drone__drone_type', 'location'
+    ).annotate(
+        flight_count=models.Count('id'),
+        total_minutes=models.Sum('duration'),
+    )
+    for row in rows.iterator():
+        key = (row['day'], row['drone__drone_type'], normalize_location(row['location']))
+        count, minutes = buckets.get(key, (0, 0))
+        buckets[key] = (count + row['flight_count'], minutes + (row['total_minutes'] or 0))
+    return buckets
+
+
+def move_drone_flights(drone_id, previous_drone_type):
+    """
+    Déplacer les vols d'un drone dont le type a changé de l'ancien seau de
+    type vers le nouveau (appelé après l'enregistrement du drone)
+    """
+    buckets = flight_buckets(DroneFlight.objects.filter(drone_id=drone_id).order_by())
+    with transaction.atomic():
+        for (day, drone_type, location), (count, minutes) in buckets.items():
+            apply_flight_delta((day, previous_drone_type, location), -count, -minutes)
+            apply_flight_delta((day, drone_type, location), count, minutes)
+
+
+def rebuild_rollups(start=None, end=None):
+    """
+    Reconstruire les agrégats depuis la table des vols (initialisation ou
+    rattrapage après des modifications en masse qui contournent les signaux)
+    """
+    flights = DroneFlight.objects.order_by()
+    rollups = FlightDailyRollup.objects.all()
+    if start:
+        flights = flights.filter(flight_date__date__gte=start)
+        rollups = rollups.filter(day__gte=start)
+    if end:
+        flights = flights.filter(flight_date__date__lte=end)
+        rollups = rollups.filter(day__lte=end)
+
+    buckets = flight_buckets(flights)
+
+    with transaction.atomic():
+        rollups.delete()
+        FlightDailyRollup.objects.bulk_create(
+            [
+                FlightDailyRollup(
+                    day=day, drone_type=drone_type, location=location,
+                    flight_count=count, total_minutes=minutes
+                )
+                for (day, drone_type, location), (count, minutes) in buckets.items()
+            ],
+            batch_size=1000
+        )
+    return len(buckets)
+
+
+def flight_report(group_by, start=None, end=None, drone_type=None, location=None):
+    """
+    Rapport agrégé sur les seaux quotidiens
+
+    ``group_by`` est une liste de dimensions parmi ``GROUP_BY_FIELDS``.
+    """
+    queryset = FlightDailyRollup.objects.filter(flight_count__gt=0)
+    if start:
+        queryset = queryset.filter(day__gte=start)
+    if end:
+        queryset = queryset.filter(day__lte=end)
+    if drone_type:
+        queryset = queryset.filter(drone_type=drone_type)
+    if location:
+        queryset = queryset.filter(location__iexact=normalize_location(location))
+
+    if 'month' in group_by:
+        queryset = queryset.annotate(month=TruncMonth('day'))
+
+    dimensions = [GROUP_BY_FIELDS[name] for name in group_by]
+    if not dimensions:
+        totals = queryset.aggregate(flights=models.Sum('flight_count'), minutes=models.Sum('total_minutes'))
+        rows = [totals] if totals['flights'] else []
+    else:
+        rows = queryset.order_by().values(*dimensions).annotate(
+            flights=models.Sum('flight_count'),
+            minutes=models.Sum('total_minutes'),
+        ).order_by(*dimensions)
+
+    return [
+        {
+            **{name: row[GROUP_BY_FIELDS[name]] for name in group_by},
+            'flight_count': row['flights'],
+            'total_minutes': row['minutes'],
+            'total_hours': round(row['minutes'] / 60, 2),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,280 @@
+"""
+Routage des lectures vers les réplicas de la base.
+
+Les lectures des vues désignées (``replica_reads``) et des blocs
+``with read_from_replica():`` partent sur un réplica de
+``DATABASE_REPLICAS`` ; tout le reste, écritures comprises, reste sur
+``default``. Une lecture désignée revient au primaire :
+
+- dans une transaction, ou après une écriture de la même requête ;
+- pendant ``REPLICA_STICKY_SECONDS`` après une écriture du même client
+  (cookie posé par ``ReplicaRoutingMiddleware``), pour qu'il relise ses
+  propres modifications, par exemple la liste de ses drones juste après
+  en avoir créé un ;
+- si le retard de réplication dépasse ``REPLICA_MAX_LAG`` secondes ou n'est
+  pas encore connu. Le retard des réplicas PostgreSQL est relevé en tâche
+  de fond toutes les ``REPLICA_LAG_CHECK_INTERVAL`` secondes ; un réplica
+  injoignable est écarté jusqu'au relevé suivant.
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from .metrics import declared_view_attribute
+
+logger = logging.getLogger(__name__)
+
+# Cookie de lecture sur le primaire après une écriture (horodatage d'expiration)
+STICKY_COOKIE = 'db_primary_until'
+
+# Retard de rejeu d'un réplica PostgreSQL, nul s'il a rejoué tout ce qu'il a
+# reçu (un primaire inactif ne fait pas vieillir le dernier rejeu)
+LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+class RoutingState:
+    """État du routage pour la requête HTTP (ou le bloc) en cours"""
+
+    def __init__(self, request=None, sticky=False, replica=None):
+        self.request = request
+        self.sticky = sticky
+        self.wrote = False
+        self._replica = replica
+
+    @property
+    def replica(self):
+        """Lectures autorisées sur un réplica (vue désignée, méthode sûre)"""
+        if self._replica is None:
+            request = self.request
+            match = getattr(request, 'resolver_match', None)
+            if match is None:
+                # Vue pas encore résolue : décision reportée
+                return False
+            self._replica = request.method in ('GET', 'HEAD') and bool(
+                declared_view_attribute(match, request.method, 'replica_reads')
+            )
+        return self._replica
+
+    @replica.setter
+    def replica(self, value):
+        self._replica = value
+
+
+_state = ContextVar('database_routing', default=None)
+
+
+class ReplicaLagMonitor:
+    """
+    Retard de réplication des réplicas, en secondes
+
+    None tant qu'un réplica PostgreSQL n'a pas été relevé, ``math.inf`` s'il
+    est injoignable ; les autres moteurs (SQLite en local) sont supposés à jour.
+    """
+
+    def __init__(self):
+        self._lags = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def lag(self, alias):
+        with self._lock:
+            if alias in self._lags:
+                return self._lags[alias]
+        if connections[alias].vendor != 'postgresql':
+            return 0.0
+        self.start()
+        return None
+
+    def set_lag(self, alias, seconds):
+        """Fixer le retard d'un réplica (tests, ou relevé externe)"""
+        with self._lock:
+            self._lags[alias] = seconds
+
+    def reset(self):
+        with self._lock:
+            self._lags.clear()
+
+    def lags(self):
+        with self._lock:
+            return dict(self._lags)
+
+    def start(self):
+        """Démarrer le relevé périodique (une fois par processus)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='replica-lag-monitor', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            for alias in replica_aliases():
+                if connections[alias].vendor == 'postgresql':
+                    self.set_lag(alias, self.measure(alias))
+            time.sleep(getattr(settings, 'REPLICA_LAG_CHECK_INTERVAL', 5))
+
+    def measure(self, alias):
+        """Relever le retard d'un réplica PostgreSQL"""
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(LAG_QUERY)
+                return float(cursor.fetchone()[0])
+        except DatabaseError as e:
+            logger.warning("Retard du réplica %s non mesurable, lectures sur le primaire: %s", alias, e)
+            return math.inf
+        finally:
+            # Connexion propre au thread de relevé : rendue au pool ou fermée
+            connection.close()
+
+
+replica_lag = ReplicaLagMonitor()
+
+
+def healthy_replica():
+    """Réplica assez à jour pour servir une lecture, ou None"""
+    max_lag = getattr(settings, 'REPLICA_MAX_LAG', 5)
+    candidates = []
+    for alias in replica_aliases():
+        lag = replica_lag.lag(alias)
+        if lag is not None and lag <= max_lag:
+            candidates.append(alias)
+    return random.choice(candidates) if candidates else None
+
+
+class ReplicaRouter:
+    """Routeur de base de données : lectures désignées sur un réplica à jour"""
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Relations d'un objet déjà chargé : même base que l'objet
+            return None
+
+        state = _state.get()
+        if state is None or state.sticky or state.wrote or not state.replica:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return healthy_replica()
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Le primaire et ses réplicas contiennent les mêmes données
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Les réplicas reçoivent le schéma par la réplication
+        if db in replica_aliases():
+            return False
+        return None
+
+
+def replica_reads(view):
+    """Désigner une vue, ou une action de ViewSet, dont les lectures GET peuvent partir sur un réplica"""
+    view.replica_reads = True
+    return view
+
+
+@contextmanager
+def read_from_replica():
+    """Lire sur un réplica dans le bloc (commandes, tâches, querysets hors vues désignées)"""
+    state = _state.get()
+    if state is None:
+        token = _state.set(RoutingState(replica=True))
+        try:
+            yield
+        finally:
+            _state.reset(token)
+        return
+
+    previous = state._replica
+    state.replica = True
+    try:
+        yield
+    finally:
+        state.replica = previous
+
+
+def sticky_until(request):
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0))
+    except ValueError:
+        return 0
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Porter l'état du routage le temps de la requête et, après une écriture,
+    garder le client sur le primaire pendant ``REPLICA_STICKY_SECONDS``
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        state = RoutingState(request, sticky=sticky_until(request) > time.time())
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(state, response)
+
+    async def __acall__(self, request):
+        state = RoutingState(request, sticky=sticky_until(request) > time.time())
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(state, response)
+
+    def _finish(self, state, response):
+        if state.wrote and replica_aliases():
+            seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+            response.set_cookie(
+                STICKY_COOKIE,
+                str(int(time.time() + seconds)),
+                max_age=seconds,
+                httponly=True,
+                samesite='Lax',
+                secure=not settings.DEBUG
+            )
+        return response
@@ -1,8 +1,11 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from datetime import datetime
-from .models import User, UserProfile, PasswordResetToken, Drone, DroneFlight, CarouselImage, Airport, NaturalReserve, NationalPark, ProtectedAreaCoordinates
+import copy
+from .geometry import find_duplicate_airports, find_duplicate_zones, repair_ring, zone_span_error
+from .models import User, UserProfile, PasswordResetToken, Drone, DroneFlight, CarouselImage, Airport, NaturalReserve, NationalPark, ProtectedAreaCoordinates, UploadSession
 
 
 def validate_date_format(value):
@@ -16,6 +19,32 @@ def validate_date_format(value):
     return value
 
 
+def validate_zone_span(coordinates):
+    """Hauteur de la zone bornée par ZONE_MAX_SPAN_DEGREES (recherche des doublons par index)"""
+    latitudes = [coord[0] for coord in coordinates]
+    error = zone_span_error(min(latitudes), max(latitudes))
+    if error:
+        raise serializers.ValidationError(error)
+    return coordinates
+
+
+class PolygonField(serializers.Field):
+    """
+    Contour ``[[lat, lng], ...]`` vérifié en bloc puis réparé (fermé, sens
+    trigonométrique) par ``geometry.repair_ring`` ; les contours qui se
+    recoupent sont refusés
+    """
+
+    def to_internal_value(self, data):
+        try:
+            return repair_ring(data)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+
+    def to_representation(self, value):
+        return value
+
+
 def validate_datetime_format(value):
     if value:
         try:
@@ -27,6 +56,34 @@ def validate_datetime_format(value):
     return value
 
 
+class FieldSelectionMixin:
+    """
+    Construit les champs une seule fois par classe et ne garde que ceux
+    demandés via le contexte ``fields`` (ex. ``?fields=id,name,status``)
+    """
+    
+    def get_fields(self):
+        cls = type(self)
+        field_map = cls.__dict__.get('_field_map')
+        if field_map is None:
+            field_map = super().get_fields()
+            cls._field_map = field_map
+        
+        requested = self.context.get('fields')
+        if requested:
+            selected = [name for name in field_map if name in requested]
+            if selected:
+                return {name: copy.deepcopy(field_map[name]) for name in selected}
+        return copy.deepcopy(field_map)
+
+
+def parse_fields_param(value):
+    """Convertir le paramètre ``fields`` en liste de noms de champs"""
+    if not value:
+        return None
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
     confirm_password = serializers.CharField(write_only=True, required=True)
@@ -87,6 +144,7 @@ class UserDetailSerializer(serializers.ModelSerializer):
         if hasattr(obj, 'profile'):
             return {
                 'avatar': obj.profile.avatar.url if obj.profile.avatar else None,
+                'avatar_srcset': obj.profile.avatar_srcset,
                 'bio': obj.profile.bio,
                 'city': obj.profile.city,
                 'country': obj.profile.country
@@ -115,9 +173,11 @@ class PasswordResetRequestSerializer(serializers.Serializer):
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
+    avatar_srcset = serializers.ReadOnlyField()
+    
     class Meta:
         model = UserProfile
-        fields = ['avatar', 'bio', 'birth_date', 'address', 'city', 'country', 'postal_code']
+        fields = ['avatar', 'avatar_srcset', 'bio', 'birth_date', 'address', 'city', 'country', 'postal_code']
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -129,10 +189,11 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'is_verified', 'created_at']
 
 
-class DroneSerializer(serializers.ModelSerializer):
+class DroneSerializer(FieldSelectionMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     is_maintenance_due = serializers.ReadOnlyField()
     age_in_days = serializers.ReadOnlyField()
+    photo_srcset = serializers.ReadOnlyField()
     
     class Meta:
         model = Drone
@@ -140,10 +201,19 @@ class DroneSerializer(serializers.ModelSerializer):
             'id', 'user', 'name', 'model', 'brand', 'drone_type', 'serial_number',
             'weight', 'max_payload', 'max_flight_time', 'max_range', 'max_altitude',
             'status', 'registration_number', 'insurance_info', 'maintenance_notes',
-            'purchase_date', 'last_maintenance', 'next_maintenance', 'photo',
-            'created_at', 'updated_at', 'is_maintenance_due', 'age_in_days'
+            'purchase_date', 'last_maintenance', 'next_maintenance', 'maintenance_interval_hours', 'photo',
+            'photo_srcset', 'created_at', 'updated_at', 'is_maintenance_due', 'age_in_days'
         ]
-        read_only_fields = ['id', 'user', 'created_at', 'updated_at', 'is_maintenance_due', 'age_in_days']
+        read_only_fields = ['id', 'user', 'created_at', 'updated_at', 'is_maintenance_due', 'age_in_days', 'photo_srcset']
+
+
+class DroneListSerializer(DroneSerializer):
+    """Représentation allégée pour les listes : le propriétaire est l'utilisateur connecté"""
+    user = None
+    
+    class Meta(DroneSerializer.Meta):
+        fields = [name for name in DroneSerializer.Meta.fields if name != 'user']
+        read_only_fields = [name for name in DroneSerializer.Meta.read_only_fields if name != 'user']
 
 
 class DroneCreateSerializer(serializers.ModelSerializer):
@@ -157,7 +227,7 @@ class DroneCreateSerializer(serializers.ModelSerializer):
             'name', 'model', 'brand', 'drone_type', 'serial_number',
             'weight', 'max_payload', 'max_flight_time', 'max_range', 'max_altitude',
             'status', 'registration_number', 'insurance_info', 'maintenance_notes',
-            'purchase_date', 'last_maintenance', 'next_maintenance', 'photo'
+            'purchase_date', 'last_maintenance', 'next_maintenance', 'maintenance_interval_hours', 'photo'
         ]
     
     def to_internal_value(self, data):
@@ -176,19 +246,33 @@ class DroneFlightSerializer(serializers.ModelSerializer):
         model = DroneFlight
         fields = [
             'id', 'drone', 'pilot', 'flight_date', 'duration', 'location',
-            'purpose', 'weather_conditions', 'notes', 'created_at'
+            'purpose', 'weather_conditions', 'notes',
+            'distance_flown', 'max_altitude', 'max_distance_from_home', 'restricted_zone_time',
+            'created_at'
+        ]
+        read_only_fields = [
+            'id', 'drone', 'pilot', 'created_at',
+            'distance_flown', 'max_altitude', 'max_distance_from_home', 'restricted_zone_time'
         ]
-        read_only_fields = ['id', 'drone', 'pilot', 'created_at']
+
+
+class DroneFlightDetailSerializer(DroneFlightSerializer):
+    """Détail d'un vol avec sa trace GPS complète"""
+    
+    class Meta(DroneFlightSerializer.Meta):
+        fields = DroneFlightSerializer.Meta.fields + ['track']
+        read_only_fields = DroneFlightSerializer.Meta.read_only_fields + ['track']
 
 
 class DroneFlightCreateSerializer(serializers.ModelSerializer):
     flight_date = serializers.DateTimeField(validators=[validate_datetime_format])
+    track = serializers.JSONField(required=False, allow_null=True)
     
     class Meta:
         model = DroneFlight
         fields = [
             'drone', 'flight_date', 'duration', 'location',
-            'purpose', 'weather_conditions', 'notes'
+            'purpose', 'weather_conditions', 'notes', 'track'
         ]
     
     def to_internal_value(self, data):
@@ -196,23 +280,67 @@ class DroneFlightCreateSerializer(serializers.ModelSerializer):
             if 'flight_date' in data and data['flight_date'] == '':
                 data['flight_date'] = None
         return super().to_internal_value(data)
+    
+    def validate_track(self, value):
+        """Valider la trace GPS avant le calcul des métriques"""
+        from .flight_metrics import parse_track
+        
+        if value:
+            try:
+                parse_track(value)
+            except ValueError as e:
+                raise serializers.ValidationError(str(e))
+        return value
+    
+    def create(self, validated_data):
+        """Créer le vol et calculer les métriques de la trace à l'ingestion"""
+        track = validated_data.pop('track', None)
+        flight = DroneFlight(**validated_data)
+        flight.set_track(track)
+        flight.save()
+        return flight
+    
+    def update(self, instance, validated_data):
+        """Recalculer les métriques uniquement si une nouvelle trace est fournie"""
+        track_provided = 'track' in validated_data
+        track = validated_data.pop('track', None)
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        if track_provided or ('duration' in validated_data and instance.track):
+            instance.set_track(track if track_provided else instance.track)
+        instance.save()
+        return instance
 
 
 class CarouselImageSerializer(serializers.ModelSerializer):
     image_url = serializers.ReadOnlyField()
+    image_srcset = serializers.ReadOnlyField()
     
     class Meta:
         model = CarouselImage
-        fields = ['id', 'title', 'description', 'image', 'image_url', 'order', 'is_active', 'created_at']
-        read_only_fields = ['id', 'image_url', 'created_at']
+        fields = ['id', 'title', 'description', 'image', 'image_url', 'image_srcset', 'order', 'is_active', 'created_at']
+        read_only_fields = ['id', 'image_url', 'image_srcset', 'created_at']
 
 
 class CarouselImageListSerializer(serializers.ModelSerializer):
     image_url = serializers.ReadOnlyField()
+    image_srcset = serializers.ReadOnlyField()
     
     class Meta:
         model = CarouselImage
-        fields = ['id', 'title', 'description', 'image_url', 'order', 'is_active']
+        fields = ['id', 'title', 'description', 'image_url', 'image_srcset', 'order', 'is_active']
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer pour les téléversements par morceaux"""
+    
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'target', 'object_id', 'filename', 'content_type', 'total_size',
+            'received_bytes', 'checksum', 'status', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'received_bytes', 'checksum', 'status', 'created_at', 'updated_at']
 
 
 class AirportSerializer(serializers.ModelSerializer):
@@ -249,9 +377,18 @@ class AirportCreateSerializer(serializers.ModelSerializer):
             'city', 'latitude', 'longitude', 'radius', 'description'
         ]
     
+    def validate_radius(self, value):
+        if value > settings.AIRPORT_MAX_RADIUS_KM:
+            raise serializers.ValidationError(f"Le rayon ne peut pas dépasser {settings.AIRPORT_MAX_RADIUS_KM} km")
+        return value
+
     def create(self, validated_data):
         """Créer un aéroport avec l'utilisateur connecté"""
         validated_data['created_by'] = self.context['request'].user
+        # Signalés au modérateur, sans bloquer la soumission
+        validated_data['possible_duplicates'] = find_duplicate_airports(
+            validated_data['latitude'], validated_data['longitude'], validated_data['radius']
+        )
         return super().create(validated_data)
 
 
@@ -283,13 +420,7 @@ class NaturalReserveSerializer(serializers.ModelSerializer):
 class NaturalReserveCreateSerializer(serializers.ModelSerializer):
     """Serializer pour la création de réserves naturelles"""
     
-    coordinates = serializers.ListField(
-        child=serializers.ListField(
-            child=serializers.FloatField(),
-            min_length=2,
-            max_length=2
-        ),
-        min_length=3,
+    coordinates = PolygonField(
         help_text="Liste des coordonnées [lat, lng] (minimum 3 points)"
     )
     
@@ -300,23 +431,14 @@ class NaturalReserveCreateSerializer(serializers.ModelSerializer):
         ]
     
     def validate_coordinates(self, value):
-        """Valider les coordonnées"""
-        for coord in value:
-            if len(coord) != 2:
-                raise serializers.ValidationError("Chaque coordonnée doit avoir exactement 2 valeurs (lat, lng)")
-            
-            lat, lng = coord
-            if not (-90 <= lat <= 90):
-                raise serializers.ValidationError("La latitude doit être comprise entre -90 et 90")
-            if not (-180 <= lng <= 180):
-                raise serializers.ValidationError("La longitude doit être comprise entre -180 et 180")
-        
-        return value
+        """Valider les coordonnées (contour déjà réparé par PolygonField)"""
+        return validate_zone_span(value)
     
     def create(self, validated_data):
         """Créer la réserve naturelle"""
         validated_data['type'] = 'natural_reserve'
         validated_data['is_active'] = False  # En attente d'approbation admin
+        validated_data['possible_duplicates'] = find_duplicate_zones(validated_data['coordinates'])
         
         # Récupérer l'utilisateur depuis le contexte
         user = self.context.get('request').user if self.context.get('request') else None
@@ -358,13 +480,7 @@ class NationalParkSerializer(serializers.ModelSerializer):
 class NationalParkCreateSerializer(serializers.ModelSerializer):
     """Serializer pour la création de parcs nationaux"""
     
-    coordinates = serializers.ListField(
-        child=serializers.ListField(
-            child=serializers.FloatField(),
-            min_length=2,
-            max_length=2
-        ),
-        min_length=3,
+    coordinates = PolygonField(
         help_text="Liste des coordonnées [lat, lng] (minimum 3 points)"
     )
     
@@ -375,23 +491,14 @@ class NationalParkCreateSerializer(serializers.ModelSerializer):
         ]
     
     def validate_coordinates(self, value):
-        """Valider les coordonnées"""
-        for coord in value:
-            if len(coord) != 2:
-                raise serializers.ValidationError("Chaque coordonnée doit avoir exactement 2 valeurs (lat, lng)")
-            
-            lat, lng = coord
-            if not (-90 <= lat <= 90):
-                raise serializers.ValidationError("La latitude doit être comprise entre -90 et 90")
-            if not (-180 <= lng <= 180):
-                raise serializers.ValidationError("La longitude doit être comprise entre -180 et 180")
-        
-        return value
+        """Valider les coordonnées (contour déjà réparé par PolygonField)"""
+        return validate_zone_span(value)
     
     def create(self, validated_data):
         """Créer le parc national"""
         validated_data['type'] = 'national_park'
         validated_data['is_active'] = False  # En attente d'approbation admin
+        validated_data['possible_duplicates'] = find_duplicate_zones(validated_data['coordinates'])
         
         # Récupérer l'utilisateur depuis le contexte
         user = self.context.get('request').user if self.context.get('request') else None
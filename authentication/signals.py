@@ -0,0 +1,227 @@
+"""
+Signaux de l'application : maintien des agrégats de vols, déclinaisons
+d'images, comptage des références aux médias, invalidation des
+instantanés publics et des utilisateurs en cache
+"""
+
+from contextvars import ContextVar
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import snapshots
+from .caching import user_cache
+from .images import IMAGE_FIELDS, derivatives_ready, schedule_derivatives, variant_names
+from .models import Airport, CarouselImage, Drone, DroneFlight, NationalPark, NaturalReserve, User, UserProfile
+from .reporting import apply_flight_delta, move_drone_flights, rollup_key
+from .storage import release, retain
+
+
+# Types des drones en cours de suppression : les vols supprimés en cascade
+# reprennent celui de leur drone sans requête
+_deleted_drone_types = ContextVar('deleted_drone_types', default=None)
+
+
+def _flight_drone_type(flight):
+    """Type du drone d'un vol, sans requête si le drone est déjà chargé ou en cours de suppression"""
+    if DroneFlight.drone.is_cached(flight):
+        return flight.drone.drone_type
+    deleted = _deleted_drone_types.get()
+    if deleted and flight.drone_id in deleted:
+        return deleted[flight.drone_id]
+    return Drone.objects.filter(pk=flight.drone_id).values_list('drone_type', flat=True).first()
+
+
+@receiver(pre_delete, sender=Drone)
+def remember_deleted_drone_type(sender, instance, **kwargs):
+    """Mémoriser le type d'un drone supprimé avant la suppression de ses vols"""
+    deleted = _deleted_drone_types.get()
+    if deleted is None:
+        deleted = {}
+        _deleted_drone_types.set(deleted)
+    deleted[instance.pk] = instance.drone_type
+
+
+@receiver(post_delete, sender=Drone)
+def forget_deleted_drone_type(sender, instance, **kwargs):
+    deleted = _deleted_drone_types.get()
+    if deleted is not None:
+        deleted.pop(instance.pk, None)
+        if not deleted:
+            _deleted_drone_types.set(None)
+
+
+@receiver(pre_save, sender=DroneFlight)
+def remember_flight_rollup_bucket(sender, instance, **kwargs):
+    """Mémoriser le seau d'agrégat d'un vol existant avant sa modification"""
+    instance._previous_rollup = None
+    if instance._state.adding:
+        return
+
+    previous = DroneFlight.objects.filter(pk=instance.pk).values(
+        'flight_date', 'duration', 'location', 'drone__drone_type'
+    ).first()
+    if previous:
+        key = rollup_key(previous['flight_date'], previous['drone__drone_type'], previous['location'])
+        instance._previous_rollup = (key, previous['duration'])
+
+
+@receiver(post_save, sender=DroneFlight)
+def update_flight_rollup_on_save(sender, instance, created, raw=False, **kwargs):
+    """Reporter la création ou la modification d'un vol dans les agrégats quotidiens"""
+    if raw:
+        return
+
+    key = rollup_key(instance.flight_date, _flight_drone_type(instance), instance.location)
+    previous = getattr(instance, '_previous_rollup', None)
+
+    if previous:
+        previous_key, previous_duration = previous
+        if previous_key == key:
+            if previous_duration != instance.duration:
+                apply_flight_delta(key, 0, instance.duration - previous_duration)
+            return
+        apply_flight_delta(previous_key, -1, -previous_duration)
+
+    apply_flight_delta(key, 1, instance.duration)
+
+
+@receiver(post_delete, sender=DroneFlight)
+def update_flight_rollup_on_delete(sender, instance, **kwargs):
+    """Retirer un vol supprimé des agrégats quotidiens"""
+    drone_type = _flight_drone_type(instance)
+    if drone_type is None:
+        return
+    key = rollup_key(instance.flight_date, drone_type, instance.location)
+    apply_flight_delta(key, -1, -instance.duration)
+
+
+@receiver(pre_save, sender=Drone)
+def remember_drone_type(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Mémoriser le type d'un drone existant avant sa modification"""
+    instance._previous_drone_type = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and 'drone_type' not in update_fields:
+        return
+
+    instance._previous_drone_type = Drone.objects.filter(pk=instance.pk).values_list(
+        'drone_type', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=Drone)
+def move_flight_rollups_on_drone_type_change(sender, instance, raw=False, **kwargs):
+    """Reporter les vols d'un drone dans les seaux de son nouveau type"""
+    if raw:
+        return
+
+    previous = getattr(instance, '_previous_drone_type', None)
+    if previous and previous != instance.drone_type:
+        move_drone_flights(instance.pk, previous)
+
+
+@receiver(post_save, sender=CarouselImage)
+@receiver(post_save, sender=Drone)
+@receiver(post_save, sender=UserProfile)
+def generate_image_derivatives(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Décliner l'image téléversée en tailles et formats optimisés, hors requête"""
+    if raw:
+        return
+
+    image_field = IMAGE_FIELDS[instance._meta.label][0]
+    if update_fields is not None and image_field not in update_fields:
+        return
+    schedule_derivatives(instance)
+
+
+@receiver(pre_save, sender=CarouselImage)
+@receiver(pre_save, sender=Drone)
+@receiver(pre_save, sender=UserProfile)
+def remember_stored_image(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Mémoriser l'image (et ses déclinaisons) d'une instance existante avant sa modification"""
+    instance._previous_image = None
+    if raw or instance._state.adding:
+        return
+
+    image_field, variants_field = IMAGE_FIELDS[instance._meta.label]
+    if update_fields is not None and image_field not in update_fields:
+        return
+
+    previous = sender.objects.filter(pk=instance.pk).values(image_field, variants_field).first()
+    if previous:
+        instance._previous_image = (previous[image_field] or '', previous[variants_field])
+
+
+@receiver(post_save, sender=CarouselImage)
+@receiver(post_save, sender=Drone)
+@receiver(post_save, sender=UserProfile)
+def count_stored_image_references(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Reporter le changement d'image dans les compteurs de références des fichiers"""
+    if raw:
+        return
+
+    image_field = IMAGE_FIELDS[instance._meta.label][0]
+    if update_fields is not None and image_field not in update_fields:
+        return
+
+    name = getattr(instance, image_field).name or ''
+    previous_name, previous_variants = getattr(instance, '_previous_image', None) or ('', None)
+    if name == previous_name:
+        return
+
+    retain(name)
+    release(previous_name, variant_names(previous_variants))
+
+
+@receiver(post_delete, sender=CarouselImage)
+@receiver(post_delete, sender=Drone)
+@receiver(post_delete, sender=UserProfile)
+def release_stored_image(sender, instance, **kwargs):
+    """Retirer la référence d'une instance supprimée à son image"""
+    image_field, variants_field = IMAGE_FIELDS[instance._meta.label]
+    release(getattr(instance, image_field).name or '', variant_names(getattr(instance, variants_field)))
+
+
+@receiver(post_save, sender=CarouselImage)
+@receiver(post_delete, sender=CarouselImage)
+@receiver(derivatives_ready, sender=CarouselImage)
+def invalidate_carousel_snapshot(sender, **kwargs):
+    """Reconstruire l'instantané du carrousel après ajout, modification, réordonnancement ou suppression"""
+    if kwargs.get('raw'):
+        return
+    snapshots.invalidate(snapshots.CAROUSEL_SNAPSHOT)
+
+
+@receiver(post_save, sender=Airport)
+@receiver(post_delete, sender=Airport)
+def invalidate_airports_map_snapshot(sender, **kwargs):
+    """Reconstruire l'instantané de la carte des aéroports après création, approbation ou suppression"""
+    if kwargs.get('raw'):
+        return
+    snapshots.invalidate(snapshots.AIRPORTS_MAP_SNAPSHOT)
+
+
+@receiver(post_save, sender=NaturalReserve)
+@receiver(post_delete, sender=NaturalReserve)
+@receiver(post_save, sender=NationalPark)
+@receiver(post_delete, sender=NationalPark)
+def invalidate_protected_areas_map_snapshot(sender, **kwargs):
+    """Reconstruire l'instantané de la carte des zones protégées après création, approbation ou suppression"""
+    if kwargs.get('raw'):
+        return
+    snapshots.invalidate(snapshots.PROTECTED_AREAS_MAP_SNAPSHOT)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Relire l'utilisateur authentifié après modification (mot de passe, désactivation...) ou suppression"""
+    user_cache.invalidate(str(instance.pk))
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_cached_user_profile(sender, instance, **kwargs):
+    """Le profil est mis en cache avec son utilisateur"""
+    user_cache.invalidate(str(instance.user_id))
@@ -0,0 +1,225 @@
+"""
+Instantanés pré-encodés des réponses publiques.
+
+Un instantané est le corps JSON déjà encodé d'une réponse et son ETag,
+conservés dans le cache à deux niveaux (``authentication.caching`` : cache
+local du processus devant le cache partagé). Il est reconstruit à la
+demande après une invalidation ; une reconstruction lancée avant une
+invalidation n'est jamais servie, et une seule reconstruction a lieu à la
+fois quand l'instantané vient d'être invalidé sous charge.
+
+``aget_snapshot`` est l'équivalent pour les vues asynchrones (méthodes
+asynchrones du cache, constructeur utilisant l'ORM asynchrone).
+
+Un instantané peut porter d'autres représentations du même contenu
+(``alternates``, ex. le format binaire de la carte, ``map_payload``),
+encodées en même temps et invalidées avec lui ; ``snapshot_response``
+choisit selon l'en-tête ``Accept`` ou le paramètre ``?format=``.
+"""
+
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+from .caching import TieredCache
+
+CAROUSEL_SNAPSHOT = 'carousel'
+AIRPORTS_MAP_SNAPSHOT = 'airports-map'
+PROTECTED_AREAS_MAP_SNAPSHOT = 'protected-areas-map'
+
+# Durée de conservation d'un instantané (s) ; l'invalidation reste la règle
+SNAPSHOT_TIMEOUT = 24 * 3600
+
+
+# Valeurs du paramètre ``?format=`` (convention DRF)
+FORMAT_CONTENT_TYPES = {
+    'json': 'application/json',
+    'msgpack': 'application/msgpack',
+}
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    body: bytes
+    etag: str
+    content_type: str = 'application/json'
+    alternates: tuple = ()
+
+
+snapshot_cache = TieredCache('snapshots', timeout=SNAPSHOT_TIMEOUT, local_timeout=300)
+
+
+# Instantanés à invalider en fin de lot (``batched_invalidation``)
+_batched = ContextVar('snapshot_batched_invalidation', default=None)
+
+
+def invalidate(*names):
+    """Invalider des instantanés ; ils seront reconstruits à la prochaine lecture"""
+    pending = _batched.get()
+    if pending is not None:
+        pending.update(names)
+        return
+    snapshot_cache.invalidate(*names)
+
+
+@contextmanager
+def batched_invalidation():
+    """
+    Regrouper les invalidations d'un traitement par lots (une par ligne via
+    les signaux) en une seule par instantané, à la sortie du bloc
+    """
+    names = set()
+    token = _batched.set(names)
+    try:
+        yield
+    finally:
+        _batched.reset(token)
+        if names:
+            invalidate(*names)
+
+
+def make_snapshot(body, content_type='application/json', alternates=()):
+    """Créer un instantané à partir d'un corps déjà encodé"""
+    etag = '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+    return Snapshot(body=body, etag=etag, content_type=content_type, alternates=tuple(alternates))
+
+
+def get_snapshot(name, builder):
+    """
+    Retourner l'instantané courant, en le construisant avec ``builder`` si besoin
+    """
+    return snapshot_cache.get_or_set(name, builder)
+
+
+async def aget_snapshot(name, abuilder):
+    """
+    Version asynchrone de ``get_snapshot`` (``abuilder`` est une coroutine)
+    """
+    return await snapshot_cache.aget_or_set(name, abuilder)
+
+
+def negotiate(request, snapshot):
+    """Représentation demandée par le client (``?format=`` puis ``Accept``), JSON par défaut"""
+    representations = {snapshot.content_type: snapshot}
+    representations.update((alternate.content_type, alternate) for alternate in snapshot.alternates)
+    requested = FORMAT_CONTENT_TYPES.get(request.GET.get('format'))
+    if requested not in representations:
+        requested = request.get_preferred_type(list(representations))
+    return representations.get(requested, snapshot)
+
+
+def snapshot_response(request, snapshot):
+    """
+    Réponse HTTP d'un instantané dans la représentation demandée, ou 304 si
+    le client possède déjà cette version
+    """
+    representation = negotiate(request, snapshot) if snapshot.alternates else snapshot
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    etags = parse_etags(if_none_match) if if_none_match else []
+    if '*' in etags or representation.etag in etags or f'W/{representation.etag}' in etags:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(representation.body, content_type=representation.content_type)
+        response['Cache-Control'] = 'public, no-cache'
+        # Variantes compressées conservées par ETag (authentication/compression.py)
+        response.precompress = True
+    response['ETag'] = representation.etag
+    if snapshot.alternates:
+        patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def _carousel_images():
+    from .models import CarouselImage
+    return CarouselImage.objects.filter(is_active=True).order_by('order', 'created_at')
+
+
+def encode_carousel(images):
+    """Encoder la liste publique des images de carrousel actives"""
+    from rest_framework.renderers import JSONRenderer
+    from .serializers import CarouselImageListSerializer
+
+    data = CarouselImageListSerializer(images, many=True).data
+    return make_snapshot(JSONRenderer().render({
+        'images': data,
+        'count': len(data),
+        'status': 'success'
+    }))
+
+
+def build_carousel_snapshot():
+    return encode_carousel(list(_carousel_images()))
+
+
+async def abuild_carousel_snapshot():
+    return encode_carousel([image async for image in _carousel_images()])
+
+
+def _map_airports():
+    from .models import Airport
+    return Airport.objects.filter(is_active=True).order_by('airport_type', 'name')
+
+
+def encode_airports_map(airports):
+    """Encoder les aéroports et aérodromes approuvés pour la carte"""
+    from rest_framework.renderers import JSONRenderer
+    from .map_payload import MSGPACK_CONTENT_TYPE, encode_airports_payload
+    from .serializers import AirportSerializer
+
+    airports_data = [airport for airport in airports if airport.airport_type in ['international', 'domestic']]
+    aerodromes_data = [airport for airport in airports if airport.airport_type == 'aerodrome']
+    serialized_airports = AirportSerializer(airports_data, many=True).data
+    serialized_aerodromes = AirportSerializer(aerodromes_data, many=True).data
+    return make_snapshot(JSONRenderer().render({
+        'airports': serialized_airports,
+        'aerodromes': serialized_aerodromes,
+        'total_airports': len(airports_data),
+        'total_aerodromes': len(aerodromes_data),
+        'total_locations': len(airports)
+    }), alternates=[
+        make_snapshot(encode_airports_payload(serialized_airports, serialized_aerodromes), MSGPACK_CONTENT_TYPE)
+    ])
+
+
+async def abuild_airports_map_snapshot():
+    return encode_airports_map([airport async for airport in _map_airports()])
+
+
+def _map_protected_areas():
+    from .models import NationalPark, NaturalReserve
+    return (
+        NaturalReserve.objects.filter(is_active=True).order_by('name'),
+        NationalPark.objects.filter(is_active=True).order_by('name'),
+    )
+
+
+def encode_protected_areas_map(natural_reserves, national_parks):
+    """Encoder les zones protégées approuvées pour la carte"""
+    from rest_framework.renderers import JSONRenderer
+    from .map_payload import MSGPACK_CONTENT_TYPE, encode_protected_areas_payload
+    from .serializers import NationalParkSerializer, NaturalReserveSerializer
+
+    serialized_reserves = NaturalReserveSerializer(natural_reserves, many=True).data
+    serialized_parks = NationalParkSerializer(national_parks, many=True).data
+    return make_snapshot(JSONRenderer().render({
+        'natural_reserves': serialized_reserves,
+        'national_parks': serialized_parks,
+        'total_natural_reserves': len(natural_reserves),
+        'total_national_parks': len(national_parks),
+        'total_protected_areas': len(natural_reserves) + len(national_parks)
+    }), alternates=[
+        make_snapshot(encode_protected_areas_payload(serialized_reserves, serialized_parks), MSGPACK_CONTENT_TYPE)
+    ])
+
+
+async def abuild_protected_areas_map_snapshot():
+    reserves, parks = _map_protected_areas()
+    return encode_protected_areas_map(
+        [reserve async for reserve in reserves],
+        [park async for park in parks]
+    )
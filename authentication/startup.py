@@ -0,0 +1,179 @@
+"""
+Mesure du temps de démarrage (``python manage.py startup_profile``).
+
+Chaque cible est démarrée dans un nouvel interpréteur : ``asgi`` et ``wsgi``
+importent l'application et chargent l'URLconf (vues, sérialiseurs), comme un
+worker avant sa première requête ; un nom de commande charge Django, la
+commande et, si elle les demande, les vérifications système.
+
+Le temps est la médiane de plusieurs démarrages sans instrumentation ; un
+démarrage supplémentaire avec ``python -X importtime`` donne l'arbre des
+imports et le temps de chacun (propre et cumulé, en millisecondes).
+
+Budgets : ``STARTUP_BUDGETS`` (ms) par cible, ``'commands'`` pour les
+commandes sans budget propre. Les modules de ``STARTUP_LAZY_MODULES`` ne
+doivent pas être importés par les commandes sans vérifications système
+(``requires_system_checks = []``, tâches planifiées).
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+
+SERVER_TARGETS = ('asgi', 'wsgi')
+
+_SERVER_SCRIPT = """
+import os
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'AnacBackend.settings')
+import AnacBackend.{target}
+from django.urls import get_resolver
+get_resolver().url_patterns
+checks = True
+"""
+
+_COMMAND_SCRIPT = """
+import os
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'AnacBackend.settings')
+import django
+django.setup()
+from django.core.management import get_commands, load_command_class
+command = load_command_class(get_commands()[{target!r}], {target!r})
+checks = bool(command.requires_system_checks)
+if checks:
+    command.check()
+"""
+
+# Modules chargés et vérifications système exécutées, écrits à la fin du démarrage
+_REPORT_SCRIPT = """
+import json, sys
+print(json.dumps({'modules': sorted(sys.modules), 'checks': checks}))
+"""
+
+
+class ImportNode:
+    """Un module de l'arbre ``-X importtime`` (temps en microsecondes)"""
+    __slots__ = ('name', 'self_us', 'cumulative_us', 'children')
+
+    def __init__(self, name, self_us, cumulative_us, children=None):
+        self.name = name
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.children = children or []
+
+    def walk(self, depth=0):
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+    def as_dict(self):
+        return {
+            'module': self.name,
+            'self_ms': round(self.self_us / 1000, 2),
+            'cumulative_ms': round(self.cumulative_us / 1000, 2),
+            'children': [child.as_dict() for child in self.children],
+        }
+
+
+def parse_importtime(output):
+    """
+    Arbre des imports depuis la sortie de ``python -X importtime``
+
+    Les lignes sont écrites à la fin de chaque import (un module après ses
+    dépendances), avec deux espaces d'indentation par niveau.
+    """
+    pending = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # En-tête
+            continue
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        node = ImportNode(name.strip(), int(fields[0]), int(fields[1]), pending.pop(depth + 1, []))
+        pending.setdefault(depth, []).append(node)
+    return pending.get(0, [])
+
+
+def target_script(target):
+    if target in SERVER_TARGETS:
+        return _SERVER_SCRIPT.format(target=target)
+    return _COMMAND_SCRIPT.format(target=target)
+
+
+def _run(target, importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', target_script(target) + _REPORT_SCRIPT]
+    started = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True, cwd=settings.BASE_DIR, env=os.environ.copy())
+    elapsed = (time.perf_counter() - started) * 1000
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'échec du démarrage')
+    return elapsed, json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def budget(target):
+    budgets = getattr(settings, 'STARTUP_BUDGETS', {})
+    if target in SERVER_TARGETS:
+        return budgets.get(target)
+    return budgets.get(target, budgets.get('commands'))
+
+
+def profile(target, repeat=5):
+    """
+    Temps de démarrage de ``target`` (médiane de ``repeat`` démarrages, ms),
+    arbre des imports et modules à chargement différé importés
+    """
+    timings = []
+    for _ in range(repeat):
+        elapsed, report, _stderr = _run(target)
+        timings.append(elapsed)
+    _elapsed, _report, stderr = _run(target, importtime=True)
+
+    # Les vérifications système chargent l'URLconf, donc les vues et les sérialiseurs
+    eager = []
+    if not report['checks']:
+        lazy = getattr(settings, 'STARTUP_LAZY_MODULES', [])
+        eager = [name for name in lazy if name in report['modules']]
+
+    return {
+        'target': target,
+        'startup_ms': round(statistics.median(timings), 1),
+        'timings_ms': [round(timing, 1) for timing in timings],
+        'budget_ms': budget(target),
+        'modules': len(report['modules']),
+        'eager_lazy_modules': eager,
+        'imports': parse_importtime(stderr),
+    }
+
+
+def over_budget(result, factor=1):
+    limit = result['budget_ms']
+    return limit is not None and result['startup_ms'] > limit * factor
+
+
+def format_tree(roots, min_ms=1.0, max_depth=4):
+    """Lignes de l'arbre des imports : modules d'au moins ``min_ms`` cumulées"""
+    lines = []
+    for root in sorted(roots, key=lambda node: node.cumulative_us, reverse=True):
+        for depth, node in root.walk():
+            if depth > max_depth or node.cumulative_us < min_ms * 1000:
+                continue
+            lines.append(
+                f'{node.cumulative_us / 1000:9.1f} {node.self_us / 1000:8.1f}  {"  " * depth}{node.name}'
+            )
+    return lines
+
+
+def top_modules(roots, count=15):
+    """Modules au temps propre le plus élevé"""
+    nodes = [node for root in roots for _depth, node in root.walk()]
+    return sorted(nodes, key=lambda node: node.self_us, reverse=True)[:count]
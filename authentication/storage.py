@@ -0,0 +1,147 @@
+"""
+Stockage des médias adressé par contenu.
+
+Chaque fichier est enregistré sous l'empreinte SHA-256 de son contenu
+(``drones/<sha256>.jpg``) : deux téléversements identiques partagent le même
+fichier, et un nom ne change jamais de contenu, ce qui permet de le servir
+avec une durée de cache illimitée. Les références des modèles vers ces
+fichiers sont comptées dans ``StoredFile`` ; un fichier (et ses déclinaisons)
+est supprimé quand la dernière référence disparaît.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+logger = logging.getLogger(__name__)
+
+HASHED_NAME_RE = re.compile(r'(^|/)[0-9a-f]{64}(\.[A-Za-z0-9]+)?$')
+
+# Taille des blocs lus pour le calcul des empreintes
+HASH_BLOCK_SIZE = 64 * 1024
+
+
+def is_content_addressed(name):
+    """Le nom est-il une empreinte de contenu (fichier immuable) ?"""
+    return bool(HASHED_NAME_RE.search(name or ''))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stockage local qui nomme les fichiers d'après leur contenu et ne réécrit
+    jamais un fichier déjà présent
+    """
+
+    def hashed_name(self, name, digest):
+        """Nom final : même dossier et extension, nom de base remplacé par l'empreinte"""
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return '/'.join(part for part in (directory, f'{digest}{extension}') if part)
+
+    def content_hash(self, content):
+        hasher = hashlib.sha256()
+        for chunk in content.chunks(HASH_BLOCK_SIZE):
+            hasher.update(chunk if isinstance(chunk, bytes) else chunk.encode())
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        return hasher.hexdigest()
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, self.content_hash(content))
+        if self.exists(name):
+            return name
+
+        # Écriture sous un nom temporaire puis renommage atomique : un lecteur ne
+        # voit jamais un fichier partiel, et deux écritures concurrentes du même
+        # contenu aboutissent au même fichier
+        temporary = super()._save(f'{name}.{uuid.uuid4().hex}.tmp', content)
+        os.replace(self.path(temporary), self.path(name))
+        return name
+
+    def adopt(self, path, name):
+        """
+        Intégrer au stockage un fichier local déjà écrit (téléversement par
+        morceaux) en le renommant d'après son contenu ; retourne le nom final
+        """
+        hasher = hashlib.sha256()
+        with open(path, 'rb') as source:
+            for block in iter(lambda: source.read(HASH_BLOCK_SIZE), b''):
+                hasher.update(block)
+
+        name = self.hashed_name(name, hasher.hexdigest())
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            os.remove(path)
+            return name
+
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        os.replace(path, full_path)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+
+def retain(name):
+    """Ajouter une référence à un fichier stocké"""
+    from .models import StoredFile
+
+    if not name:
+        return
+
+    stored = StoredFile.objects.filter(name=name)
+    values = {'reference_count': models.F('reference_count') + 1, 'updated_at': timezone.now()}
+    if stored.update(**values):
+        return
+
+    try:
+        with transaction.atomic():
+            StoredFile.objects.create(name=name, reference_count=1)
+    except IntegrityError:
+        # Fichier référencé entre-temps par une requête concurrente
+        stored.update(**values)
+
+
+def release(name, derivative_names=(), storage=None):
+    """
+    Retirer une référence à un fichier stocké ; à la dernière, le fichier et
+    ses déclinaisons sont supprimés après la validation de la transaction
+
+    Les fichiers sans compteur (antérieurs au comptage) ne sont jamais supprimés.
+    """
+    from .models import StoredFile
+
+    if not name:
+        return
+
+    StoredFile.objects.filter(name=name).update(
+        reference_count=models.F('reference_count') - 1,
+        updated_at=timezone.now()
+    )
+    deleted, _ = StoredFile.objects.filter(name=name, reference_count__lte=0).delete()
+    if deleted:
+        names = [name, *derivative_names]
+        transaction.on_commit(lambda: _delete_unreferenced(names, storage))
+
+
+def _delete_unreferenced(names, storage=None):
+    from django.core.files.storage import default_storage
+    from .models import StoredFile
+
+    storage = storage or default_storage
+    # Le fichier a pu être de nouveau téléversé depuis la dernière référence
+    if StoredFile.objects.filter(name=names[0]).exists():
+        return
+
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception as e:
+            logger.error("Erreur lors de la suppression du fichier %s: %s", name, e)
@@ -0,0 +1,202 @@
+"""
+Journalisation structurée sans entrée-sortie dans les requêtes.
+
+``configure_logging`` (``LOGGING_CONFIG`` de ``config/production.py``)
+applique ``LOGGING`` puis place les gestionnaires nommés dans
+``LOGGING['queue']['handlers']`` (fichier, console) derrière une file : les
+threads des requêtes n'y déposent que l'enregistrement, un thread
+``QueueListener`` par processus formate et écrit. Si la file est pleine
+(disque bloqué), l'enregistrement est abandonné et compté dans
+``log_records_dropped_total`` plutôt que de bloquer la requête.
+
+Le message est formaté dans le thread d'écriture : les appels passent les
+valeurs en arguments (``logger.info("... %s", valeur)``) et non en f-string,
+et les données de requête passent par ``Payload`` (sérialisées, masquées
+et tronquées à ``LOG_PAYLOAD_MAX_CHARS`` au moment de l'écriture seulement).
+
+Les messages volumineux en nombre peuvent être échantillonnés par logger
+(``LOGGING['queue']['sampling']``) ou par appel (``extra={'sample_rate': 0.1}``) ;
+les erreurs ne le sont jamais.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.config
+import logging.handlers
+import queue
+import random
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+# Attributs d'un LogRecord standard (tout autre attribut vient de ``extra``)
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+# Clés masquées dans les données journalisées
+SENSITIVE_KEYS = ('password', 'token', 'secret')
+
+QUEUE_MAXSIZE = 10000
+
+
+def _masked(data):
+    if hasattr(data, 'dict') and callable(data.dict):
+        # QueryDict (formulaires, multipart)
+        data = data.dict()
+    if isinstance(data, dict):
+        return {
+            key: '***' if any(word in str(key).lower() for word in SENSITIVE_KEYS) else _masked(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, (list, tuple)):
+        return [_masked(value) for value in data]
+    return data
+
+
+class Payload:
+    """
+    Données de requête à journaliser : sérialisées, masquées et tronquées
+    seulement si l'enregistrement est écrit
+    """
+    __slots__ = ('data', 'limit')
+
+    def __init__(self, data, limit=None):
+        self.data = data
+        self.limit = limit
+
+    def __str__(self):
+        limit = self.limit or getattr(settings, 'LOG_PAYLOAD_MAX_CHARS', 2048)
+        try:
+            text = json.dumps(_masked(self.data), default=str, ensure_ascii=False)
+        except (TypeError, ValueError):
+            text = repr(self.data)
+        if len(text) > limit:
+            text = f'{text[:limit]}… ({len(text)} caractères)'
+        return text
+
+    __repr__ = __str__
+
+
+class JSONFormatter(logging.Formatter):
+    """Un objet JSON par ligne : horodatage UTC, niveau, logger, message, contexte et ``extra``"""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Ne garder qu'une part des enregistrements sous le niveau ERROR :
+    ``extra={'sample_rate': ...}`` de l'appel, sinon le taux du logger (ou de
+    son parent le plus proche) dans ``rates``
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = rates or {}
+
+    def rate(self, record):
+        rate = getattr(record, 'sample_rate', None)
+        if rate is not None:
+            return rate
+        name = record.name
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition('.')[0]
+        return 1
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        rate = self.rate(record)
+        if rate >= 1:
+            return True
+        if random.random() >= rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Déposer l'enregistrement dans la file sans le formater ; l'abandonner
+    si la file est pleine
+    """
+
+    def prepare(self, record):
+        # Formatage (message, exception) dans le thread d'écriture
+        return copy.copy(record)
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            from .metrics import registry
+            registry.increment('log_records_dropped_total', {})
+
+
+class BackgroundListener(logging.handlers.QueueListener):
+    """Thread d'écriture ; ``stop`` vide la file et peut être appelé plusieurs fois"""
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+
+def configure_logging(config):
+    """
+    ``LOGGING_CONFIG`` : ``dictConfig(config)``, puis les gestionnaires de
+    ``config['queue']['handlers']`` écrivent depuis un thread d'arrière-plan
+    """
+    config = dict(config)
+    options = config.pop('queue', None)
+    logging.config.dictConfig(config)
+    if not options:
+        return
+
+    names = set(options['handlers'])
+    maxsize = options.get('maxsize', QUEUE_MAXSIZE)
+    sampling = SamplingFilter(options.get('sampling'))
+    loggers = [logging.getLogger()] + [logging.getLogger(name) for name in config.get('loggers', {})]
+
+    # Une file et un thread d'écriture par ensemble de gestionnaires
+    queue_handlers = {}
+    for logger in loggers:
+        queued = [handler for handler in logger.handlers if handler.name in names]
+        if not queued:
+            continue
+        key = tuple(sorted(handler.name for handler in queued))
+        if key not in queue_handlers:
+            records = queue.Queue(maxsize)
+            queue_handlers[key] = NonBlockingQueueHandler(records)
+            queue_handlers[key].addFilter(sampling)
+            listener = queue_handlers[key].listener = BackgroundListener(
+                records, *queued, respect_handler_level=True
+            )
+            listener.start()
+            # Vider la file à l'arrêt du worker
+            atexit.register(listener.stop)
+        for handler in queued:
+            logger.removeHandler(handler)
+        logger.addHandler(queue_handlers[key])
@@ -0,0 +1,44 @@
+"""
+Outils de test : assertion sur le budget de requêtes SQL des vues
+"""
+
+from urllib.parse import urlsplit
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from .metrics import declared_query_budget
+
+
+def assert_query_budget(client, method, path, budget=None, using='default', **extra):
+    """
+    Exécuter une requête avec le client de test et échouer si elle dépasse
+    son budget de requêtes SQL (celui déclaré par ``query_budget`` par défaut)
+
+    Retourne la réponse.
+    """
+    if budget is None:
+        budget = declared_query_budget(resolve(urlsplit(path).path), method)
+    if budget is None:
+        raise AssertionError(f"Aucun budget de requêtes déclaré pour {method} {path}")
+
+    with CaptureQueriesContext(connections[using]) as context:
+        response = getattr(client, method.lower())(path, **extra)
+
+    if len(context) > budget:
+        queries = '\n'.join(f"  {index}. {query['sql']}" for index, query in enumerate(context.captured_queries, 1))
+        raise AssertionError(
+            f"{method} {path} : {len(context)} requêtes SQL pour un budget de {budget}\n{queries}"
+        )
+    return response
+
+
+class QueryBudgetMixin:
+    """Mixin de TestCase : ``self.assertQueryBudget('GET', '/api/drones/')``"""
+
+    def assertQueryBudget(self, method, path, budget=None, **extra):
+        try:
+            return assert_query_budget(self.client, method, path, budget, **extra)
+        except AssertionError as e:
+            self.fail(str(e))
@@ -0,0 +1,198 @@
+"""
+Jeu de données réaliste pour les tests de performance.
+
+Les volumes de référence (1 000 utilisateurs, 10 000 drones, 1 000 000 de
+vols, 300 zones protégées complexes) sont multipliés par
+``ANAC_TEST_SCALE`` (0.01 par défaut, 1 pour les volumes complets) :
+
+    ANAC_TEST_SCALE=1 python manage.py test authentication
+
+Les lignes sont insérées avec ``bulk_create`` (sans signaux) puis les
+agrégats de vols sont reconstruits.
+"""
+
+import math
+import os
+import random
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.hashers import make_password
+
+from authentication.models import (
+    Airport, CarouselImage, Drone, DroneFlight, NationalPark, NaturalReserve, User, UserProfile
+)
+from authentication.reporting import rebuild_rollups
+
+FULL_VOLUMES = {
+    'users': 1000,
+    'drones': 10_000,
+    'flights': 1_000_000,
+    'polygons': 300,
+}
+
+MINIMUM_VOLUMES = {
+    'users': 5,
+    'drones': 20,
+    'flights': 500,
+    'polygons': 20,
+}
+
+# Nombre de sommets des polygones des zones protégées
+POLYGON_VERTICES = (200, 1500)
+
+PASSWORD = 'Anac-Test-2024!'
+
+BATCH_SIZE = 5000
+
+LOCATIONS = ['Abidjan', 'Yamoussoukro', 'Bouaké', 'San-Pédro', 'Korhogo', 'Daloa', 'Man', 'Gagnoa']
+
+# Emprise approximative de la Côte d'Ivoire
+LATITUDES = (4.4, 10.7)
+LONGITUDES = (-8.5, -2.6)
+
+
+def seed_scale():
+    return float(os.environ.get('ANAC_TEST_SCALE', '0.01'))
+
+
+def seed_volumes(scale=None):
+    """Volumes à insérer pour l'échelle demandée"""
+    scale = seed_scale() if scale is None else scale
+    return {
+        name: max(MINIMUM_VOLUMES[name], int(count * scale))
+        for name, count in FULL_VOLUMES.items()
+    }
+
+
+def _polygon(rng, vertices):
+    """Polygone étoilé irrégulier (non convexe) de ``vertices`` sommets"""
+    center_lat = rng.uniform(*LATITUDES)
+    center_lng = rng.uniform(*LONGITUDES)
+    radius = rng.uniform(0.05, 0.6)
+    points = []
+    for index in range(vertices):
+        angle = 2 * math.pi * index / vertices
+        distance = radius * (0.6 + 0.4 * rng.random())
+        points.append([
+            round(center_lat + distance * math.sin(angle), 6),
+            round(center_lng + distance * math.cos(angle), 6),
+        ])
+    return points
+
+
+def _flights(rng, drones, count):
+    start = datetime(2023, 1, 1, tzinfo=dt_timezone.utc)
+    for index in range(count):
+        drone = drones[index % len(drones)]
+        yield DroneFlight(
+            drone_id=drone.pk,
+            pilot_id=drone.user_id,
+            flight_date=start + timedelta(minutes=rng.randrange(0, 2 * 365 * 24 * 60)),
+            duration=rng.randint(5, 90),
+            location=rng.choice(LOCATIONS),
+            purpose='Inspection',
+            distance_flown=round(rng.uniform(0.5, 25.0), 3),
+            max_altitude=float(rng.randint(20, 120)),
+        )
+
+
+def _bulk_create(model, objects):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+
+def seed_dataset(scale=None, seed=42):
+    """
+    Insérer le jeu de données et retourner les objets utiles aux tests :
+    ``owner`` (premier utilisateur), ``staff``, ``drones`` (drones du
+    propriétaire), ``volumes``
+    """
+    rng = random.Random(seed)
+    volumes = seed_volumes(scale)
+    password = make_password(PASSWORD)
+
+    users = [
+        User(
+            email=f'pilote{index}@anac.test', username=f'pilote{index}', password=password,
+            first_name='Pilote', last_name=str(index), is_verified=True
+        )
+        for index in range(volumes['users'])
+    ]
+    User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+    UserProfile.objects.bulk_create(
+        [UserProfile(user=user, city=rng.choice(LOCATIONS), country="Côte d'Ivoire") for user in users],
+        batch_size=BATCH_SIZE
+    )
+    staff = User.objects.create_superuser(
+        email='admin@anac.test', username='admin', password=PASSWORD, first_name='Admin', last_name='ANAC'
+    )
+    UserProfile.objects.create(user=staff)
+
+    drone_types = [value for value, _ in Drone.DRONE_TYPES]
+    drones = [
+        Drone(
+            user=users[index % len(users)],
+            name=f'Drone {index}',
+            model='Mavic 3',
+            brand='DJI',
+            drone_type=drone_types[index % len(drone_types)],
+            purchase_date=date(2022, 1, 1) + timedelta(days=rng.randrange(0, 700)),
+            next_maintenance=date(2024, 1, 1) + timedelta(days=rng.randrange(0, 900)),
+            maintenance_interval_hours=rng.choice([None, 50, 100]),
+        )
+        for index in range(volumes['drones'])
+    ]
+    Drone.objects.bulk_create(drones, batch_size=BATCH_SIZE)
+
+    _bulk_create(DroneFlight, _flights(rng, drones, volumes['flights']))
+    rebuild_rollups()
+
+    reserves, parks = [], []
+    for index in range(volumes['polygons']):
+        fields = {
+            'name': f'Zone protégée {index}',
+            'area': f'{rng.randint(1000, 500_000)} ha',
+            'coordinates': _polygon(rng, rng.randint(*POLYGON_VERTICES)),
+            'is_active': True,
+        }
+        if index % 2:
+            parks.append(NationalPark(park_id=f'PN-{index}', **fields))
+        else:
+            reserves.append(NaturalReserve(reserve_id=f'RN-{index}', **fields))
+    NaturalReserve.objects.bulk_create(reserves, batch_size=100)
+    NationalPark.objects.bulk_create(parks, batch_size=100)
+
+    airport_types = ['international', 'domestic', 'aerodrome']
+    Airport.objects.bulk_create([
+        Airport(
+            airport_id=f'AP{index}',
+            name=f'Aéroport {index}',
+            code=f'A{index:02d}',
+            airport_type=airport_types[index % len(airport_types)],
+            city=rng.choice(LOCATIONS),
+            latitude=round(rng.uniform(*LATITUDES), 6),
+            longitude=round(rng.uniform(*LONGITUDES), 6),
+            radius=5,
+            is_active=True,
+        )
+        for index in range(30)
+    ])
+
+    CarouselImage.objects.bulk_create([
+        CarouselImage(title=f'Image {index}', image=f'carousel/image{index}.jpg', order=index)
+        for index in range(10)
+    ])
+
+    owner = users[0]
+    return {
+        'owner': owner,
+        'staff': staff,
+        'drones': [drone for drone in drones if drone.user_id == owner.pk],
+        'volumes': volumes,
+    }
@@ -0,0 +1,68 @@
+"""
+Listes de l'administration : nombre de requêtes SQL borné quel que soit le
+nombre de lignes affichées, et comptage plafonné (``paginators``).
+"""
+
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from authentication.models import JWTBlacklistedToken, User
+from authentication.paginators import EstimatedCountPaginator
+from authentication.testing import QueryBudgetMixin
+
+from .seeding import PASSWORD, seed_dataset
+
+# Session, utilisateur, comptage plafonné, page, filtres : indépendant du nombre de lignes
+ADMIN_CHANGELIST_QUERIES = 7
+
+CHANGELISTS = [
+    'authentication_user',
+    'authentication_userprofile',
+    'authentication_passwordresettoken',
+    'authentication_drone',
+    'authentication_maintenanceduedrone',
+    'authentication_droneflight',
+    'authentication_flightdailyrollup',
+    'authentication_jwtblacklistedtoken',
+]
+
+
+class AdminChangelistTests(QueryBudgetMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        data = seed_dataset(scale=0)
+        cls.staff = data['staff']
+        expires = timezone.now() + timedelta(days=1)
+        JWTBlacklistedToken.objects.bulk_create([
+            JWTBlacklistedToken(token=f'token-{index}', expires_at=expires, user_id=cls.staff.pk, token_type='access')
+            for index in range(30)
+        ])
+
+    def setUp(self):
+        self.client.login(email=self.staff.email, password=PASSWORD)
+
+    def test_changelist_query_budget(self):
+        for name in CHANGELISTS:
+            with self.subTest(changelist=name):
+                response = self.assertQueryBudget(
+                    'GET', reverse(f'admin:{name}_changelist'), ADMIN_CHANGELIST_QUERIES
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_filtered_changelist_query_budget(self):
+        path = reverse('admin:authentication_droneflight_changelist')
+        response = self.assertQueryBudget(
+            'GET', f'{path}?drone__drone_type__exact=quadcopter&flight_date__gte=2020-01-01T00%3A00%3A00%2B00%3A00', ADMIN_CHANGELIST_QUERIES
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(ADMIN_COUNT_LIMIT=3)
+    def test_count_is_capped(self):
+        self.assertGreater(User.objects.count(), 3)
+        paginator = EstimatedCountPaginator(User.objects.order_by('pk'), 2)
+        self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.num_pages, 2)
@@ -0,0 +1,139 @@
+"""
+Vues asynchrones (``async_views``) : authentification par les classes DRF
+configurées (cookie JWT, session, HTTP Basic), vols de l'utilisateur,
+instantanés publics et écritures confiées aux vues DRF synchrones.
+"""
+
+import base64
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from authentication.caching import clear_local_caches
+from authentication.models import CarouselImage, DroneFlight, User
+from authentication.tests.test_drones import fly, login, make_drone, make_user
+
+
+def basic(email, password):
+    return 'Basic ' + base64.b64encode(f'{email}:{password}'.encode()).decode()
+
+
+class AsyncAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user('asynchrone')
+
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        self.path = reverse('authentication:check_auth')
+
+    def assertAuthenticated(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['email'], self.user.email)
+
+    def test_jwt_cookie(self):
+        login(self.client, self.user)
+        self.assertAuthenticated(self.client.get(self.path))
+
+    def test_session(self):
+        self.client.force_login(self.user)
+        self.assertAuthenticated(self.client.get(self.path))
+
+    def test_basic(self):
+        self.assertAuthenticated(self.client.get(self.path, HTTP_AUTHORIZATION=basic(self.user.email, 'x')))
+
+    def test_rejected(self):
+        anonymous = self.client.get(self.path)
+        self.assertEqual(anonymous.status_code, 401)
+        self.assertEqual(anonymous['WWW-Authenticate'], 'Bearer realm="api"')
+
+        with self.assertLogs('authentication.async_views', 'WARNING'):
+            wrong = self.client.get(self.path, HTTP_AUTHORIZATION=basic(self.user.email, 'faux'))
+        self.assertEqual(wrong.status_code, 401)
+
+        self.client.cookies['access_token'] = 'pas-un-jeton'
+        with self.assertLogs('authentication.async_views', 'WARNING'):
+            self.assertEqual(self.client.get(self.path).status_code, 401)
+
+    def test_inactive_user(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        login(self.client, self.user)
+        self.assertEqual(self.client.get(self.path).status_code, 401)
+
+    @override_settings(REST_FRAMEWORK={
+        'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.SessionAuthentication'],
+    })
+    def test_only_configured_classes(self):
+        login(self.client, self.user)
+        self.assertEqual(self.client.get(self.path).status_code, 401)
+        self.assertEqual(
+            self.client.get(self.path, HTTP_AUTHORIZATION=basic(self.user.email, 'x')).status_code, 401
+        )
+
+
+class AsyncFlightTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('pilote')
+        cls.drone = make_drone(cls.owner, 'Asynchrone')
+        for day in range(1, 13):
+            fly(cls.drone, (2024, 5, day), day)
+        fly(make_drone(make_user('voisin'), 'Voisin'), (2024, 5, 20), 5)
+
+    def setUp(self):
+        login(self.client, self.owner)
+
+    def test_flight_list(self):
+        response = self.client.get(reverse('droneflight-list'), {'ordering': 'duration'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([flight['duration'] for flight in response.json()], list(range(1, 13)))
+
+    def test_recent_flights(self):
+        response = self.client.get(reverse('droneflight-recent-flights'))
+
+        self.assertEqual(response.status_code, 200)
+        flights = response.json()['recent_flights']
+        self.assertEqual([flight['duration'] for flight in flights], list(range(12, 2, -1)))
+
+    def test_anonymous(self):
+        self.client.cookies.clear()
+        self.assertEqual(self.client.get(reverse('droneflight-list')).status_code, 401)
+        self.assertEqual(self.client.get(reverse('droneflight-recent-flights')).status_code, 401)
+
+    def test_post_uses_the_sync_view(self):
+        response = self.client.post(reverse('droneflight-list'), {
+            'drone': str(self.drone.pk), 'flight_date': '2024-06-01T10:00:00Z', 'duration': 30,
+            'location': 'Yamoussoukro',
+        }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(DroneFlight.objects.filter(location='Yamoussoukro', pilot=self.owner).exists())
+        self.assertEqual(self.client.put(reverse('droneflight-recent-flights')).status_code, 405)
+
+
+class AsyncSnapshotTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+
+    def test_public_snapshots(self):
+        CarouselImage.objects.create(title='Accueil', image='carousel/a.jpg')
+
+        carousel = self.client.get(reverse('authentication:carousel-list'))
+        self.assertEqual(carousel.status_code, 200)
+        self.assertEqual([image['title'] for image in carousel.json()['images']], ['Accueil'])
+        self.assertEqual(self.client.get(reverse('authentication:get_airports_for_map')).status_code, 200)
+        self.assertEqual(self.client.head(reverse('authentication:get_airports_for_map')).status_code, 200)
+        self.assertEqual(self.client.post(reverse('authentication:get_airports_for_map')).status_code, 405)
+
+    def test_carousel_creation_uses_the_sync_view(self):
+        response = self.client.post(reverse('authentication:carousel-list'), {'title': 'Refusée'})
+
+        self.assertIn(response.status_code, (401, 403))
+        self.assertFalse(CarouselImage.objects.exists())
@@ -0,0 +1,228 @@
+"""
+Cache à deux niveaux (``authentication/caching.py``) : succès locaux,
+invalidation entre processus, valeurs calculées avant une invalidation,
+recomputation unique sous charge et métriques par niveau.
+
+Deux instances du même espace de noms simulent deux processus partageant
+le cache par défaut. Utilisateurs mis en cache sans le hachage du mot de
+passe, en lecture seule.
+"""
+
+import asyncio
+import copy
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from authentication import caching
+from authentication.authentication import aget_cached_user, get_cached_user
+from authentication.caching import TieredCache, clear_local_caches, user_cache
+from authentication.jwt_utils import JWTTokenManager
+from authentication.metrics import collect_cache_metrics, registry
+from authentication.models import User, UserProfile
+from authentication.serializers import UserDetailSerializer
+
+
+class TieredCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.namespace = f'test-{uuid.uuid4().hex}'
+        self.addCleanup(caching._caches.pop, self.namespace, None)
+
+    def tiered(self, **kwargs):
+        return TieredCache(self.namespace, **kwargs)
+
+    def counting_builder(self, value='valeur', delay=0):
+        calls = []
+
+        def builder():
+            calls.append(1)
+            time.sleep(delay)
+            return value
+        return builder, calls
+
+    def test_second_read_is_a_local_hit(self):
+        tiered = self.tiered()
+        builder, calls = self.counting_builder()
+
+        self.assertEqual(tiered.get_or_set('cle', builder), 'valeur')
+        self.assertEqual(tiered.get_or_set('cle', builder), 'valeur')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((tiered.local.hits, tiered.local.misses), (1, 1))
+        self.assertEqual((tiered.shared_hits, tiered.shared_misses), (0, 1))
+
+    def test_other_process_reads_shared_tier(self):
+        first, second = self.tiered(), self.tiered()
+        builder, calls = self.counting_builder()
+
+        first.get_or_set('cle', builder)
+        self.assertEqual(second.get_or_set('cle', builder), 'valeur')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(second.shared_hits, 1)
+
+    @override_settings(LOCAL_CACHE_SYNC_INTERVAL=0)
+    def test_invalidation_reaches_other_processes(self):
+        first, second = self.tiered(), self.tiered()
+        first.get_or_set('cle', lambda: 'ancienne')
+        second.get_or_set('cle', lambda: 'ancienne')
+
+        first.invalidate('cle')
+        self.assertEqual(first.get_or_set('cle', lambda: 'nouvelle'), 'nouvelle')
+        self.assertEqual(second.get_or_set('cle', lambda: 'autre'), 'nouvelle')
+
+    def test_value_built_before_invalidation_is_never_served(self):
+        tiered = self.tiered()
+
+        def stale_builder():
+            # Écriture concurrente pendant le calcul
+            tiered.invalidate('cle')
+            return 'périmée'
+
+        self.assertEqual(tiered.get_or_set('cle', stale_builder), 'périmée')
+        self.assertEqual(len(tiered.local), 0)
+        self.assertEqual(self.tiered().get_or_set('cle', lambda: 'fraîche'), 'fraîche')
+
+    def test_single_flight_in_process(self):
+        tiered = self.tiered()
+        builder, calls = self.counting_builder(delay=0.1)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(tiered.get_or_set('cle', builder)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['valeur'] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_other_process_waits_for_the_build(self):
+        first, second = self.tiered(), self.tiered()
+        builder, calls = self.counting_builder(delay=0.2)
+
+        thread = threading.Thread(target=first.get_or_set, args=('cle', builder))
+        thread.start()
+        time.sleep(0.05)
+        self.assertEqual(second.get_or_set('cle', builder), 'valeur')
+        thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(second.stampede_waits, 1)
+
+    def test_async_single_flight(self):
+        tiered = self.tiered()
+        calls = []
+
+        async def abuilder():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'valeur'
+
+        async def main():
+            return await asyncio.gather(*[tiered.aget_or_set('cle', abuilder) for _ in range(5)])
+
+        self.assertEqual(asyncio.run(main()), ['valeur'] * 5)
+        self.assertEqual(len(calls), 1)
+
+    def test_mutable_values_are_copied(self):
+        tiered = self.tiered(copy=copy.deepcopy)
+        value = tiered.get_or_set('cle', lambda: {'nom': 'Drone'})
+        value['nom'] = 'modifié'
+        self.assertEqual(tiered.get_or_set('cle', lambda: {}), {'nom': 'Drone'})
+
+    def test_local_tier_is_bounded(self):
+        tiered = self.tiered(max_entries=2)
+        for key in ['a', 'b', 'c']:
+            tiered.get_or_set(key, lambda: key)
+        self.assertEqual(len(tiered.local), 2)
+
+    def test_hit_ratio_metrics_per_tier(self):
+        tiered = self.tiered()
+        for _ in range(4):
+            tiered.get_or_set('cle', lambda: 'valeur')
+        collect_cache_metrics()
+
+        output = registry.render()
+        self.assertIn(f'cache_hit_ratio{{cache="{self.namespace}",tier="local"}} 0.75', output)
+        self.assertIn(f'cache_hit_ratio{{cache="{self.namespace}",tier="shared"}} 0', output)
+        self.assertIn(f'cache_builds_total{{cache="{self.namespace}"}} 1', output)
+
+
+class CachedUserTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='cache@anac.test', username='cache', password='ancien-secret-42', first_name='C', last_name='C'
+        )
+        UserProfile.objects.create(user=cls.user, city='Abidjan', avatar='avatars/a.jpg')
+
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+
+    def test_password_hash_is_not_cached(self):
+        get_cached_user(self.user.pk)
+
+        entry = cache.get(user_cache._data_key(str(self.user.pk)))
+        self.assertIsNotNone(entry)
+        self.assertNotIn(self.user.password, repr(entry))
+
+    def test_cached_user_with_profile(self):
+        get_cached_user(self.user.pk)
+
+        with self.assertNumQueries(0):
+            user = get_cached_user(self.user.pk)
+            data = UserDetailSerializer(user).data
+        self.assertEqual(data['email'], 'cache@anac.test')
+        self.assertEqual(data['profile']['city'], 'Abidjan')
+        self.assertEqual(data['profile']['avatar'], '/media/avatars/a.jpg')
+        self.assertEqual(user.get_deferred_fields(), {'password'})
+        # Hachage lu en base à la demande
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password('ancien-secret-42'))
+
+    def test_each_call_returns_a_new_instance(self):
+        first = get_cached_user(self.user.pk)
+        first.first_name = 'Modifié'
+        first.profile.city = 'Bouaké'
+
+        second = asyncio.run(aget_cached_user(self.user.pk))
+        self.assertIsNot(second, first)
+        self.assertEqual((second.first_name, second.profile.city), ('C', 'Abidjan'))
+
+    def test_user_without_profile(self):
+        other = User.objects.create_user(
+            email='sans@anac.test', username='sans', password='x', first_name='S', last_name='S'
+        )
+        get_cached_user(other.pk)
+
+        self.assertFalse(hasattr(get_cached_user(other.pk), 'profile'))
+        self.assertIsNone(UserDetailSerializer(get_cached_user(other.pk)).data['profile'])
+
+    def test_writes_reload_the_user(self):
+        self.client.cookies['access_token'] = JWTTokenManager.create_tokens_for_user(self.user)['access']
+        self.client.get(reverse('authentication:profile'))
+        # Modification faite ailleurs, que le cache local ne voit pas encore
+        User.objects.filter(pk=self.user.pk).update(phone='0102030405')
+
+        response = self.client.patch(
+            reverse('authentication:profile'), {'first_name': 'Nouveau'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(reverse('authentication:change_password'), {
+            'old_password': 'ancien-secret-42', 'new_password': 'nouveau-secret-42',
+            'confirm_new_password': 'nouveau-secret-42',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.first_name, self.user.phone), ('Nouveau', '0102030405'))
+        self.assertTrue(self.user.check_password('nouveau-secret-42'))
@@ -0,0 +1,104 @@
+"""
+Liste publique du carrousel servie depuis un instantané pré-encodé
+(``snapshots``) : encodée une fois par version, ETag et 304, invalidée
+par les signaux à chaque modification.
+"""
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from authentication import snapshots
+from authentication.caching import clear_local_caches
+from authentication.models import CarouselImage, User
+
+
+class CarouselSnapshotTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.second = CarouselImage.objects.create(title='Seconde', image='carousel/b.jpg', order=2)
+        cls.first = CarouselImage.objects.create(title='Première', image='carousel/a.jpg', order=1)
+        CarouselImage.objects.create(title='Masquée', image='carousel/c.jpg', order=0, is_active=False)
+
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        self.path = reverse('authentication:carousel-list')
+
+    def titles(self, response):
+        return [image['title'] for image in response.json()['images']]
+
+    def test_active_images_in_order(self):
+        response = self.client.get(self.path)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.titles(response), ['Première', 'Seconde'])
+        self.assertEqual(response.json()['count'], 2)
+        self.assertEqual(response['Cache-Control'], 'public, no-cache')
+        self.assertTrue(response['ETag'].startswith('"'))
+
+    def test_encoded_once_per_version(self):
+        with mock.patch.object(snapshots, 'encode_carousel', wraps=snapshots.encode_carousel) as encode:
+            first = self.client.get(self.path)
+            second = self.client.get(self.path)
+
+        self.assertEqual(encode.call_count, 1)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_not_modified(self):
+        etag = self.client.get(self.path)['ETag']
+
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.client.get(self.path, HTTP_IF_NONE_MATCH='"autre"').status_code, 200)
+
+    def test_changes_invalidate_the_snapshot(self):
+        etag = self.client.get(self.path)['ETag']
+
+        self.second.order = 0
+        self.second.save()
+        reordered = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(reordered.status_code, 200)
+        self.assertEqual(self.titles(reordered), ['Seconde', 'Première'])
+
+        self.first.delete()
+        self.assertEqual(self.titles(self.client.get(self.path)), ['Seconde'])
+
+        CarouselImage.objects.create(title='Nouvelle', image='carousel/d.jpg', order=5)
+        self.assertEqual(self.titles(self.client.get(self.path)), ['Seconde', 'Nouvelle'])
+
+    def test_batched_invalidation(self):
+        with mock.patch.object(snapshots.snapshot_cache, 'invalidate') as invalidate:
+            with snapshots.batched_invalidation():
+                for image in CarouselImage.objects.all():
+                    image.save()
+                invalidate.assert_not_called()
+
+        invalidate.assert_called_once_with(snapshots.CAROUSEL_SNAPSHOT)
+
+    def test_admin_list_editable_invalidates_once(self):
+        staff = User.objects.create_superuser(
+            email='carrousel@anac.test', username='carrousel', password='x', first_name='A', last_name='B'
+        )
+        self.client.force_login(staff)
+        images = list(CarouselImage.objects.order_by('order', 'created_at'))
+        data = {
+            'form-TOTAL_FORMS': str(len(images)), 'form-INITIAL_FORMS': str(len(images)), '_save': 'Enregistrer',
+        }
+        for index, image in enumerate(images):
+            data.update({
+                f'form-{index}-id': str(image.pk), f'form-{index}-order': str(10 - index),
+                f'form-{index}-is_active': 'on',
+            })
+
+        with mock.patch.object(snapshots.snapshot_cache, 'invalidate') as invalidate:
+            response = self.client.post(reverse('admin:authentication_carouselimage_changelist'), data)
+
+        self.assertEqual(response.status_code, 302)
+        invalidate.assert_called_once_with(snapshots.CAROUSEL_SNAPSHOT)
+        self.assertEqual(CarouselImage.objects.filter(is_active=True).count(), 3)
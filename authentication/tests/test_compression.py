@@ -0,0 +1,180 @@
+"""
+Compression des réponses (``authentication/compression.py``) : négociation
+du codage, variantes des instantanés compressées une fois par ETag,
+compression à la volée des autres réponses, aller-retour avec les vraies
+bibliothèques brotli et zstandard lorsqu'elles sont installées.
+"""
+
+import gzip
+import importlib.util
+import zlib
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from authentication import compression
+from authentication.caching import clear_local_caches
+from authentication.compression import CompressionMiddleware, choose_encoding
+from authentication.models import NaturalReserve
+
+LARGE = {'items': [{'name': f'Zone {index}', 'area': '100 km²'} for index in range(200)]}
+
+
+def fake_codecs():
+    # brotli et zstd simulés : préfixe distinctif sur un corps compressé par zlib
+    return {
+        'gzip': lambda data, level: gzip.compress(data, compresslevel=level, mtime=0),
+        'br': lambda data, level: b'br' + zlib.compress(data, level=min(level, 9)),
+        'zstd': lambda data, level: b'zs' + zlib.compress(data, level=min(level, 9)),
+    }
+
+
+class NegotiationTests(SimpleTestCase):
+
+    def test_choose_encoding(self):
+        cases = {
+            '': None,
+            'identity': None,
+            'gzip': 'gzip',
+            'gzip, deflate, br, zstd': 'zstd',
+            'gzip, br': 'br',
+            'br;q=0.5, gzip': 'gzip',
+            'zstd;q=0, *': 'br',
+            '*;q=0': None,
+            'deflate': None,
+        }
+        with mock.patch.object(compression, 'available_codecs', fake_codecs):
+            for header, expected in cases.items():
+                with self.subTest(header=header):
+                    self.assertEqual(choose_encoding(header), expected)
+
+    def test_gzip_only_without_optional_packages(self):
+        with mock.patch.object(compression, 'available_codecs', lambda: {'gzip': None}):
+            self.assertEqual(choose_encoding('zstd, br, gzip;q=0.1'), 'gzip')
+            self.assertIsNone(choose_encoding('zstd, br'))
+
+
+class RealCodecTests(SimpleTestCase):
+
+    def setUp(self):
+        compression.available_codecs.cache_clear()
+        self.addCleanup(compression.available_codecs.cache_clear)
+        self.factory = RequestFactory()
+        self.content = JsonResponse(LARGE).content
+
+    def respond(self, accept_encoding):
+        middleware = CompressionMiddleware(lambda request: JsonResponse(LARGE))
+        return middleware(self.factory.get('/api/', HTTP_ACCEPT_ENCODING=accept_encoding))
+
+    @skipUnless(importlib.util.find_spec('brotli'), 'brotli non installé')
+    def test_brotli_round_trip(self):
+        import brotli
+
+        response = self.respond('gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.content)
+        for precompressed in (False, True):
+            data = compression.compress('br', self.content, precompressed=precompressed)
+            self.assertEqual(brotli.decompress(data), self.content)
+
+    @skipUnless(importlib.util.find_spec('zstandard'), 'zstandard non installé')
+    def test_zstd_round_trip(self):
+        import zstandard
+
+        response = self.respond('gzip, br, zstd')
+        self.assertEqual(response['Content-Encoding'], 'zstd')
+        self.assertEqual(zstandard.ZstdDecompressor().decompress(response.content), self.content)
+        for precompressed in (False, True):
+            data = compression.compress('zstd', self.content, precompressed=precompressed)
+            self.assertEqual(zstandard.ZstdDecompressor().decompress(data), self.content)
+
+
+class DynamicCompressionTests(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def respond(self, response, accept_encoding='gzip'):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(self.factory.get('/api/', HTTP_ACCEPT_ENCODING=accept_encoding))
+
+    def test_large_json_is_compressed(self):
+        content = JsonResponse(LARGE).content
+        response = self.respond(JsonResponse(LARGE))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content), content)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+
+    def test_async_stack(self):
+        async def get_response(request):
+            return JsonResponse(LARGE)
+
+        middleware = CompressionMiddleware(get_response)
+        request = self.factory.get('/api/', HTTP_ACCEPT_ENCODING='gzip')
+        response = async_to_sync(middleware)(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_left_uncompressed(self):
+        with_cookie = JsonResponse(LARGE)
+        with_cookie.set_cookie('access_token', 'secret')
+        cases = {
+            'small': (JsonResponse({'ok': True}), 'gzip'),
+            'not accepted': (JsonResponse(LARGE), 'identity'),
+            'cookie': (with_cookie, 'gzip'),
+            'html': (HttpResponse('<p>csrf</p>' * 500), 'gzip'),
+            'image': (HttpResponse(b'\x89PNG' * 1000, content_type='image/png'), 'gzip'),
+            'error': (JsonResponse(LARGE, status=400), 'gzip'),
+        }
+        for name, (response, accept_encoding) in cases.items():
+            with self.subTest(name):
+                self.assertFalse(self.respond(response, accept_encoding).has_header('Content-Encoding'))
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200)
+class PrecompressedSnapshotTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(3):
+            NaturalReserve.objects.create(
+                reserve_id=f'r-{index}', name=f'Réserve {index}', area='10 km²', is_active=True,
+                coordinates=[[5.0 + index, -4.0], [5.0 + index, -3.0], [5.5 + index, -3.0], [5.0 + index, -4.0]],
+            )
+
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        self.path = reverse('authentication:get_protected_areas_for_map')
+
+    def test_each_variant_is_compressed_once_per_etag(self):
+        plain = self.client.get(self.path)
+        with mock.patch.object(compression, 'compress', wraps=compression.compress) as compress:
+            first = self.client.get(self.path, HTTP_ACCEPT_ENCODING='gzip')
+            second = self.client.get(self.path, HTTP_ACCEPT_ENCODING='gzip')
+            binary = self.client.get(self.path, HTTP_ACCEPT_ENCODING='gzip', HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(gzip.decompress(first.content), plain.content)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(binary['Content-Encoding'], 'gzip')
+        # Une compression par représentation (JSON, MessagePack), au niveau maximal
+        self.assertEqual(compress.call_count, 2)
+        self.assertTrue(all(call.kwargs == {'precompressed': True} for call in compress.call_args_list))
+
+        self.assertEqual(first['ETag'], f'W/{plain["ETag"]}')
+        not_modified = self.client.get(self.path, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_new_data_version_is_compressed_again(self):
+        first = self.client.get(self.path, HTTP_ACCEPT_ENCODING='gzip')
+        NaturalReserve.objects.filter(reserve_id='r-0').update(name='Renommée')
+        NaturalReserve.objects.get(reserve_id='r-1').save()
+        second = self.client.get(self.path, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertIn('Renommée', gzip.decompress(second.content).decode())
@@ -0,0 +1,247 @@
+"""
+Drones : statut de maintenance calculé en base (``DroneQuerySet``), liste
+allégée et sélection de champs (``?fields=``), transitions de statut et de
+maintenance en un seul UPDATE conditionnel.
+"""
+
+from datetime import date, datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from authentication.jwt_utils import JWTTokenManager
+from authentication.models import Drone, DroneFlight, User
+
+TODAY = date(2024, 6, 1)
+
+
+def make_user(name):
+    return User.objects.create_user(
+        email=f'{name}@anac.test', username=name, password='x', first_name=name, last_name='Pilote'
+    )
+
+
+def login(client, user):
+    """Connexion par cookie JWT, comme le frontend"""
+    client.cookies['access_token'] = JWTTokenManager.create_tokens_for_user(user)['access']
+
+
+def make_drone(user, name, **fields):
+    return Drone.objects.create(user=user, name=name, model='Mavic 3', drone_type='quadcopter', **fields)
+
+
+def fly(drone, day, minutes):
+    return DroneFlight.objects.create(
+        drone=drone, pilot=drone.user, flight_date=datetime(*day, 12, tzinfo=dt_timezone.utc),
+        duration=minutes, location='Abidjan',
+    )
+
+
+class MaintenanceStatusTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('proprietaire')
+        cls.other = make_user('autre')
+        # Échéance passée
+        cls.overdue = make_drone(cls.owner, 'En retard', next_maintenance=date(2024, 5, 31))
+        # Échéance le jour même
+        cls.due_today = make_drone(cls.owner, 'Aujourd\'hui', next_maintenance=TODAY)
+        # Intervalle de 2 h dépassé par les vols postérieurs à la dernière maintenance
+        cls.hours = make_drone(
+            cls.owner, 'Heures', last_maintenance=date(2024, 3, 1), maintenance_interval_hours=2,
+            purchase_date=date(2024, 5, 22),
+        )
+        fly(cls.hours, (2024, 2, 1), 600)
+        fly(cls.hours, (2024, 3, 1), 60)
+        fly(cls.hours, (2024, 4, 1), 60)
+        # Intervalle non atteint, échéance future
+        cls.fine = make_drone(
+            cls.owner, 'À jour', next_maintenance=date(2024, 7, 1), maintenance_interval_hours=10
+        )
+        fly(cls.fine, (2024, 4, 1), 90)
+        cls.foreign = make_drone(cls.other, 'Autre', next_maintenance=date(2024, 1, 1))
+
+    def test_annotations(self):
+        drones = {drone.pk: drone for drone in Drone.objects.with_maintenance_status(TODAY)}
+
+        self.assertEqual(drones[self.hours.pk].flight_minutes_since_maintenance, 120)
+        self.assertEqual(drones[self.fine.pk].flight_minutes_since_maintenance, 90)
+        self.assertEqual(drones[self.overdue.pk].flight_minutes_since_maintenance, 0)
+        self.assertEqual(drones[self.hours.pk].age_in_days, 10)
+        self.assertIsNone(drones[self.fine.pk].age_in_days)
+
+    def test_maintenance_due(self):
+        due = set(Drone.objects.filter(user=self.owner).maintenance_due(TODAY).values_list('pk', flat=True))
+        self.assertEqual(due, {self.overdue.pk, self.due_today.pk, self.hours.pk})
+
+    def test_property_without_annotation(self):
+        due = set(Drone.objects.maintenance_due().values_list('pk', flat=True))
+        for drone in Drone.objects.with_maintenance_status():
+            with self.subTest(drone=drone.name):
+                self.assertEqual(drone.is_maintenance_due, drone.pk in due)
+
+        # Instances non annotées : échéance seule, aucune requête par drone
+        drones = list(Drone.objects.all())
+        with self.assertNumQueries(0):
+            due_by_date = {drone.pk for drone in drones if drone.is_maintenance_due}
+        self.assertEqual(due_by_date, due - {self.hours.pk})
+
+    def test_nested_drones_are_annotated(self):
+        # Vols : drones préchargés avec with_maintenance_status, heures de vol comprises
+        login(self.client, self.owner)
+        flights = self.client.get(reverse('droneflight-list')).json()
+
+        hours = [flight['drone'] for flight in flights if flight['drone']['name'] == 'Heures']
+        self.assertTrue(hours)
+        self.assertTrue(all(drone['is_maintenance_due'] for drone in hours))
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            list(Drone.objects.maintenance_due(TODAY))
+
+    def test_endpoint_lists_own_due_drones(self):
+        make_drone(self.owner, 'Lointaine', next_maintenance=date(2999, 1, 1))
+        login(self.client, self.owner)
+        response = self.client.get(reverse('drone-maintenance-due'))
+
+        self.assertEqual(response.status_code, 200)
+        names = {drone['name'] for drone in response.json()['drones']}
+        self.assertIn('En retard', names)
+        self.assertNotIn('Lointaine', names)
+        self.assertNotIn('Autre', names)
+
+    def test_nightly_command(self):
+        out = StringIO()
+        call_command('compute_maintenance_due', '--date', TODAY.isoformat(), stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('proprietaire@anac.test : 3 drone(s)', output)
+        self.assertIn('autre@anac.test : 1 drone(s)', output)
+        self.assertIn('2.0 h de vol', output)
+
+
+class DroneFieldSelectionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('selection')
+        cls.drones = [make_drone(cls.owner, f'Drone {index}', status='active') for index in range(5)]
+
+    def setUp(self):
+        login(self.client, self.owner)
+
+    def test_list_omits_owner(self):
+        response = self.client.get(reverse('drone-list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 5)
+        self.assertNotIn('user', response.json()[0])
+        self.assertIn('is_maintenance_due', response.json()[0])
+
+    def test_detail_keeps_owner(self):
+        response = self.client.get(reverse('drone-detail', args=[self.drones[0].pk]))
+        self.assertEqual(response.json()['user']['email'], 'selection@anac.test')
+
+    def test_selected_fields(self):
+        response = self.client.get(reverse('drone-list'), {'fields': 'id, name,status'})
+        self.assertEqual(set(response.json()[0]), {'id', 'name', 'status'})
+
+        detail = self.client.get(reverse('drone-detail', args=[self.drones[0].pk]), {'fields': 'name,user'})
+        self.assertEqual(set(detail.json()), {'name', 'user'})
+
+    def test_unknown_fields_return_everything(self):
+        full = self.client.get(reverse('drone-list')).json()[0]
+        response = self.client.get(reverse('drone-list'), {'fields': 'password,inconnu'})
+        self.assertEqual(set(response.json()[0]), set(full))
+
+    def test_list_queries_do_not_grow_with_drones(self):
+        path = reverse('drone-list')
+        self.client.get(path)
+        with self.assertNumQueries(1):
+            self.client.get(path)
+        for index in range(5, 20):
+            make_drone(self.owner, f'Drone {index}')
+        with self.assertNumQueries(1):
+            response = self.client.get(path)
+        self.assertEqual(len(response.json()), 20)
+
+
+class ConditionalUpdateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('transitions')
+        cls.other = make_user('voisin')
+        cls.drones = [make_drone(cls.owner, f'Drone {index}', status='active') for index in range(3)]
+        cls.foreign = make_drone(cls.other, 'Voisin', status='active')
+
+    def setUp(self):
+        login(self.client, self.owner)
+
+    def post(self, name, data, pk=None):
+        path = reverse(f'drone-{name}', args=[pk] if pk else [])
+        return self.client.post(path, data, content_type='application/json')
+
+    def test_update_status_only_when_changed(self):
+        drone = self.drones[0]
+        before = Drone.objects.get(pk=drone.pk).updated_at
+
+        unchanged = self.post('update-status', {'status': 'active'}, drone.pk)
+        self.assertEqual(unchanged.json()['updated'], 0)
+        self.assertEqual(Drone.objects.get(pk=drone.pk).updated_at, before)
+
+        with self.assertNumQueries(1):
+            changed = self.post('update-status', {'status': 'maintenance'}, drone.pk)
+        self.assertEqual(changed.json()['updated'], 1)
+        self.assertEqual(Drone.objects.get(pk=drone.pk).status, 'maintenance')
+
+    def test_single_update_errors(self):
+        self.assertEqual(self.post('update-status', {'status': 'volant'}, self.drones[0].pk).status_code, 400)
+        self.assertEqual(self.post('update-status', {'status': 'retired'}, self.foreign.pk).status_code, 404)
+        self.assertEqual(self.post('update-status', {'status': 'retired'}, 'pas-un-uuid').status_code, 404)
+        self.assertEqual(
+            self.post('schedule-maintenance', {'maintenance_date': '01/07/2024'}, self.drones[0].pk).status_code, 400
+        )
+        self.assertEqual(Drone.objects.get(pk=self.foreign.pk).status, 'active')
+
+    def test_schedule_maintenance(self):
+        drone = self.drones[1]
+        response = self.post('schedule-maintenance', {'maintenance_date': '2024-07-01'}, drone.pk)
+        self.assertEqual(response.json()['updated'], 1)
+        self.assertEqual(Drone.objects.get(pk=drone.pk).next_maintenance, date(2024, 7, 1))
+
+        again = self.post('schedule-maintenance', {'maintenance_date': '2024-07-01'}, drone.pk)
+        self.assertEqual(again.json()['updated'], 0)
+
+    def test_bulk_updates_only_own_changed_drones(self):
+        Drone.objects.filter(pk=self.drones[0].pk).update(status='inactive')
+        ids = [str(drone.pk) for drone in self.drones + [self.foreign]]
+
+        with self.assertNumQueries(1):
+            response = self.post('bulk-update-status', {'ids': ids, 'status': 'inactive'})
+
+        self.assertEqual(response.json()['requested'], 4)
+        self.assertEqual(response.json()['updated'], 2)
+        self.assertEqual(Drone.objects.filter(user=self.owner, status='inactive').count(), 3)
+        self.assertEqual(Drone.objects.get(pk=self.foreign.pk).status, 'active')
+
+    def test_bulk_schedule_maintenance(self):
+        ids = [str(drone.pk) for drone in self.drones]
+        response = self.post('bulk-schedule-maintenance', {'ids': ids, 'maintenance_date': '2024-09-01'})
+
+        self.assertEqual(response.json()['updated'], 3)
+        self.assertEqual(set(Drone.objects.filter(user=self.owner).values_list('next_maintenance', flat=True)), {date(2024, 9, 1)})
+
+    def test_bulk_validation(self):
+        cases = {
+            'no ids': {'ids': [], 'status': 'active'},
+            'not a list': {'ids': str(self.drones[0].pk), 'status': 'active'},
+            'bad id': {'ids': ['pas-un-uuid'], 'status': 'active'},
+            'too many': {'ids': [str(self.drones[0].pk)] * 501, 'status': 'active'},
+        }
+        for name, data in cases.items():
+            with self.subTest(name):
+                self.assertEqual(self.post('bulk-update-status', data).status_code, 400)
@@ -0,0 +1,166 @@
+"""
+Détection des quasi-doublons à la soumission des zones et aéroports
+(``authentication/geometry.py``) : recouvrement, distance des centroïdes,
+recherche des candidats par index, les plus proches d'abord ; hauteur des
+zones bornée aussi hors de l'API.
+"""
+
+import math
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from authentication.geometry import (
+    circle_overlap_ratio, find_duplicate_airports, find_duplicate_zones, overlap_ratio, polygon_centroid,
+    polygon_points
+)
+from authentication.models import Airport, NationalPark, NaturalReserve, User
+
+SQUARE = [[5.0, -4.0], [5.0, -3.0], [6.0, -3.0], [6.0, -4.0]]
+
+
+def shifted(polygon, lat=0.0, lng=0.0):
+    return [[point[0] + lat, point[1] + lng] for point in polygon]
+
+
+class OverlapTests(SimpleTestCase):
+
+    def test_polygon_overlap_ratio(self):
+        square = polygon_points(SQUARE)
+        self.assertAlmostEqual(overlap_ratio(square, square), 1.0, places=2)
+        self.assertAlmostEqual(overlap_ratio(square, polygon_points(shifted(SQUARE, lat=0.5))), 0.5, places=2)
+        self.assertEqual(overlap_ratio(square, polygon_points(shifted(SQUARE, lat=2))), 0.0)
+
+    def test_concave_polygon_overlap(self):
+        # « U » : l'encoche ne compte pas dans l'intersection
+        u_shape = polygon_points([[5, -4], [6, -4], [6, -3.6], [5.4, -3.6], [5.4, -3.4], [6, -3.4], [6, -3], [5, -3]])
+        notch = polygon_points([[5.5, -3.6], [6, -3.6], [6, -3.4], [5.5, -3.4]])
+        self.assertLess(overlap_ratio(u_shape, notch), 0.05)
+
+    def test_centroid(self):
+        lat, lng = polygon_centroid(polygon_points(SQUARE))
+        self.assertAlmostEqual(lat, 5.5)
+        self.assertAlmostEqual(lng, -3.5)
+
+    def test_circle_overlap_ratio(self):
+        self.assertEqual(circle_overlap_ratio(0, 5, 5), 1.0)
+        self.assertEqual(circle_overlap_ratio(20, 5, 5), 0.0)
+        self.assertEqual(circle_overlap_ratio(1, 2, 5), 1.0)
+        # Deux cercles unité à distance 1 : 2π/3 - √3/2 sur π
+        self.assertAlmostEqual(circle_overlap_ratio(1, 1, 1), (2 * math.pi / 3 - math.sqrt(3) / 2) / math.pi)
+
+
+class DuplicateDetectionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='zones@anac.test', username='zones', password='x', first_name='Z', last_name='Z'
+        )
+        NationalPark.objects.create(park_id='p-1', name='Parc existant', area='100 km²', coordinates=SQUARE, is_active=True)
+        # Zones éloignées : le tableau des zones grossit sans changer les candidats
+        NaturalReserve.objects.bulk_create([
+            NaturalReserve(
+                reserve_id=f'far-{index}', name=f'Lointaine {index}', area='1 km²',
+                coordinates=shifted(SQUARE, lat=-20 + index * 0.01),
+                min_latitude=-15 + index * 0.01, max_latitude=-14 + index * 0.01, min_longitude=-4, max_longitude=-3,
+            )
+            for index in range(500)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_submitted_near_duplicate_is_flagged(self):
+        response = self.client.post(reverse('authentication:create_natural_reserve'), {
+            'reserve_id': 'r-new', 'name': 'Copie', 'area': '100 km²', 'coordinates': shifted(SQUARE, lat=0.05),
+        }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        duplicates = NaturalReserve.objects.get(reserve_id='r-new').possible_duplicates
+        self.assertEqual([duplicate['identifier'] for duplicate in duplicates], ['p-1'])
+        self.assertGreater(duplicates[0]['overlap'], 0.9)
+
+    def test_distinct_zone_is_not_flagged(self):
+        self.assertEqual(find_duplicate_zones(shifted(SQUARE, lat=1.5)), [])
+
+    def test_candidates_use_the_bounding_box_index(self):
+        with self.assertNumQueries(2):
+            find_duplicate_zones(SQUARE)
+
+        queryset = NaturalReserve.objects.filter(
+            min_latitude__gte=2, min_latitude__lte=6, max_latitude__gte=5, min_longitude__lte=-3, max_longitude__gte=-4
+        )
+        plan = queryset.explain()
+        if connection.vendor == 'sqlite':
+            self.assertIn('USING INDEX natural_res_min_lat', plan)
+
+    def test_span_is_bounded(self):
+        response = self.client.post(reverse('authentication:create_national_park'), {
+            'park_id': 'p-big', 'name': 'Trop grand', 'area': '1 km²',
+            'coordinates': [[0, -4], [0, -3], [8, -3]],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_closest_candidates_are_compared_first(self):
+        # Plus de candidats que la limite, tous avant le doublon dans l'ordre des noms
+        for index in range(6):
+            NaturalReserve.objects.create(
+                reserve_id=f'coin-{index}', name=f'A coin {index}', area='1 km²',
+                coordinates=shifted(SQUARE, lat=0.9, lng=0.9),
+            )
+        NaturalReserve.objects.create(reserve_id='r-copy', name='Z copie', area='1 km²', coordinates=SQUARE)
+
+        with mock.patch('authentication.geometry.DUPLICATE_MAX_CANDIDATES', 5):
+            duplicates = find_duplicate_zones(shifted(SQUARE, lat=0.02))
+        self.assertEqual([duplicate['identifier'] for duplicate in duplicates], ['r-copy', 'p-1'])
+
+    def test_closest_airports_are_compared_first(self):
+        common = {'airport_type': 'aerodrome', 'city': 'Abidjan', 'radius': '5.00', 'description': ''}
+        for index in range(6):
+            Airport.objects.create(
+                airport_id=f'a-{index}', name=f'A {index}', latitude=5.4 + index * 0.01, longitude=-3.9, **common
+            )
+        Airport.objects.create(airport_id='z', name='Z', latitude=5.2614, longitude=-3.9258, **common)
+
+        with mock.patch('authentication.geometry.DUPLICATE_MAX_CANDIDATES', 5):
+            duplicates = find_duplicate_airports(5.2620, -3.9250, 5)
+        self.assertEqual([duplicate['identifier'] for duplicate in duplicates], ['z'])
+
+    def test_span_is_validated_outside_the_api(self):
+        tall = [[0, -4], [0, -3], [8, -3]]
+        park = NationalPark(park_id='p-admin', name='Trop grand', area='1 km²', coordinates=tall)
+        with self.assertRaises(ValidationError) as error:
+            park.full_clean()
+        self.assertIn('coordinates', error.exception.message_dict)
+
+        # Peuplement et scripts : create() contourne full_clean
+        with self.assertRaises(ValidationError):
+            NaturalReserve.objects.create(reserve_id='r-seed', name='Trop grand', area='1 km²', coordinates=tall)
+        self.assertFalse(NaturalReserve.objects.filter(reserve_id='r-seed').exists())
+
+        staff = User.objects.create_superuser(
+            email='admin-zones@anac.test', username='admin-zones', password='x', first_name='A', last_name='A'
+        )
+        self.client.force_login(staff)
+        response = self.client.post(reverse('admin:authentication_nationalpark_add'), {
+            'park_id': 'p-form', 'name': 'Formulaire', 'type': 'national_park', 'area': '1 km²',
+            'coordinates': '[[0, -4], [0, -3], [8, -3]]',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('coordinates', response.context['adminform'].form.errors)
+        self.assertFalse(NationalPark.objects.filter(park_id='p-form').exists())
+
+    def test_airport_duplicate(self):
+        common = {'airport_type': 'aerodrome', 'city': 'Abidjan', 'radius': '5.00', 'description': ''}
+        Airport.objects.create(airport_id='abj', name='Existant', latitude=5.2614, longitude=-3.9258, **common)
+        response = self.client.post(reverse('authentication:create_airport'), {
+            'airport_id': 'abj2', 'name': 'Doublon', 'code': '', 'latitude': '5.2620', 'longitude': '-3.9250', **common
+        }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        duplicates = Airport.objects.get(airport_id='abj2').possible_duplicates
+        self.assertEqual([duplicate['identifier'] for duplicate in duplicates], ['abj'])
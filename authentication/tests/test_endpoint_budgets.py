@@ -0,0 +1,346 @@
+"""
+Budgets de requêtes SQL et de latence de toutes les routes de l'API.
+
+Chaque route de ``authentication/urls.py`` et ``AnacBackend/urls.py`` est
+appelée plusieurs fois sur le jeu de données de ``seeding`` : le nombre de
+requêtes SQL ne doit jamais dépasser son budget (un N+1 le fait croître avec
+les volumes) et le 95e centile de la latence doit rester sous sa limite.
+
+Variables d'environnement :
+    ANAC_TEST_SCALE           échelle du jeu de données (voir ``seeding``)
+    ANAC_TEST_RUNS            nombre d'appels par route (défaut : 10)
+    ANAC_TEST_LATENCY_FACTOR  multiplicateur des limites de latence (défaut : 1)
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import Client, TestCase, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, resolve
+from PIL import Image
+
+from authentication.caching import clear_local_caches
+from authentication.jwt_utils import JWTTokenManager
+from authentication.loadtest import percentile
+from authentication.metrics import declared_query_budget
+from authentication.models import CarouselImage, DroneFlight
+from authentication.testing import assert_query_budget
+from authentication.uploads import start_upload
+
+from .seeding import PASSWORD, seed_dataset
+
+RUNS = int(os.environ.get('ANAC_TEST_RUNS', '10'))
+LATENCY_FACTOR = float(os.environ.get('ANAC_TEST_LATENCY_FACTOR', '1'))
+
+# Routes sans budget : administration Django et racines des routeurs DRF
+EXCLUDED_NAMESPACES = {'admin'}
+EXCLUDED_ROUTES = {'api-root', 'authentication:api-root'}
+
+
+@dataclass
+class Endpoint:
+    """Appel d'une route ; ``path`` et ``data`` peuvent dépendre du numéro d'appel"""
+    method: str
+    path: Any
+    queries: Optional[int] = None  # None : budget déclaré par la vue (query_budget)
+    p95_ms: float = 250
+    client: str = 'owner'
+    data: Any = None
+    content_type: str = 'application/json'
+    headers: Optional[Callable] = None
+    status: int = 200
+
+
+def png_bytes(size=(64, 48), color=(30, 120, 200)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def iter_route_names(patterns=None, namespace=None):
+    """Noms (avec espace de noms) de toutes les routes déclarées"""
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            child_namespace = pattern.namespace or namespace
+            if child_namespace in EXCLUDED_NAMESPACES:
+                continue
+            if namespace and pattern.namespace:
+                child_namespace = f'{namespace}:{pattern.namespace}'
+            yield from iter_route_names(pattern.url_patterns, child_namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield f'{namespace}:{pattern.name}' if namespace else pattern.name
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    IMAGE_DERIVATIVE_WORKERS=0,
+    METRICS_TOKEN='jeton-de-test',
+)
+class EndpointBudgetTests(TestCase):
+    """Budgets de requêtes et de latence de chaque route"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._media_root = tempfile.mkdtemp()
+        cls._media_override = override_settings(MEDIA_ROOT=cls._media_root)
+        cls._media_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._media_override.disable()
+        shutil.rmtree(cls._media_root, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset()
+        cls.owner = cls.dataset['owner']
+        cls.staff = cls.dataset['staff']
+        cls.drone = cls.dataset['drones'][0]
+        cls.flight = DroneFlight.objects.filter(drone=cls.drone).first()
+        cls.carousel_image = CarouselImage.objects.first()
+
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        self.tokens = JWTTokenManager.create_tokens_for_user(self.owner)
+        self.clients = {
+            'anonymous': Client(),
+            'owner': self._client_for(self.owner),
+            'staff': self._client_for(self.staff),
+        }
+        self.media_name = default_storage.save('drones/test.png', ContentFile(png_bytes()))
+
+    def _client_for(self, user):
+        client = Client()
+        tokens = JWTTokenManager.create_tokens_for_user(user)
+        client.cookies['access_token'] = tokens['access']
+        client.cookies['refresh_token'] = tokens['refresh']
+        return client
+
+    def _fresh_client(self, name):
+        """
+        Client de l'appel : neuf pour les appels anonymes (la connexion et
+        l'inscription posent des cookies) et pour 'session' (la déconnexion
+        les efface)
+        """
+        if name == 'anonymous':
+            return Client()
+        if name == 'session':
+            return self._client_for(self.owner)
+        return self.clients[name]
+
+    # Valeurs dépendant du numéro d'appel
+
+    def _upload_chunk_path(self, run):
+        data = png_bytes(color=(run, 10, 10))
+        session = start_upload(self.owner, 'drone_photo', self.drone.pk, 'photo.png', 'image/png', len(data))
+        self._chunk = data
+        return f'/api/auth/uploads/{session.pk}/'
+
+    def _chunk_headers(self, run):
+        return {'HTTP_CONTENT_RANGE': f'bytes 0-{len(self._chunk) - 1}/{len(self._chunk)}'}
+
+    def _polygon(self, run):
+        shift = run * 0.01
+        return [[5.3 + shift, -4.0], [5.4 + shift, -4.1], [5.35 + shift, -3.9], [5.31 + shift, -3.95]]
+
+    def endpoints(self):
+        drone_ids = [str(drone.pk) for drone in self.dataset['drones']]
+        drone_path = f'/api/drones/{self.drone.pk}/'
+        return {
+            # AnacBackend/urls.py
+            'token_obtain_pair': Endpoint(
+                'POST', '/api/token/', 2, client='anonymous',
+                data={'email': self.owner.email, 'password': PASSWORD}
+            ),
+            'token_refresh': Endpoint(
+                'POST', '/api/token/refresh/', 0, client='anonymous',
+                data=lambda run: {'refresh': self.tokens['refresh']}
+            ),
+            'token_verify': Endpoint(
+                'POST', '/api/token/verify/', 0, client='anonymous',
+                data=lambda run: {'token': self.tokens['access']}
+            ),
+            'public_endpoint': Endpoint('GET', '/api/public/', 1),
+            'protected_endpoint': Endpoint('GET', '/api/protected/', 1),
+            'user_profile': Endpoint('POST', '/api/profile/', 1),
+            'metrics': Endpoint('GET', '/api/metrics', 1, client='staff'),
+            'media': Endpoint('GET', lambda run: f'/media/{self.media_name}', 0, client='anonymous'),
+            'drone-list': Endpoint('GET', '/api/drones/'),
+            'drone-detail': Endpoint('GET', drone_path, 2),
+            'drone-update-status': Endpoint(
+                'POST', f'{drone_path}update_status/', 3,
+                data=lambda run: {'status': ['active', 'maintenance'][run % 2]}
+            ),
+            'drone-schedule-maintenance': Endpoint(
+                'POST', f'{drone_path}schedule_maintenance/', 3,
+                data=lambda run: {'maintenance_date': f'2030-01-{run % 28 + 1:02d}'}
+            ),
+            'drone-bulk-update-status': Endpoint(
+                'POST', '/api/drones/bulk_update_status/', 2,
+                data=lambda run: {'ids': drone_ids, 'status': ['active', 'inactive'][run % 2]}
+            ),
+            'drone-bulk-schedule-maintenance': Endpoint(
+                'POST', '/api/drones/bulk_schedule_maintenance/', 2,
+                data=lambda run: {'ids': drone_ids, 'maintenance_date': f'2031-02-{run % 28 + 1:02d}'}
+            ),
+            'drone-maintenance-due': Endpoint('GET', '/api/drones/maintenance_due/'),
+            'droneflight-list': Endpoint('GET', '/api/flights/', p95_ms=1000),
+            'droneflight-detail': Endpoint('GET', f'/api/flights/{self.flight.pk}/', 3),
+            'droneflight-drone-stats': Endpoint('GET', '/api/flights/drone_stats/', p95_ms=1000),
+            'droneflight-recent-flights': Endpoint('GET', '/api/flights/recent_flights/'),
+
+            # authentication/urls.py
+            'authentication:register': Endpoint(
+                'POST', '/api/auth/register/', 5, client='anonymous', status=201,
+                data=lambda run: {
+                    'email': f'nouveau{run}@anac.test', 'first_name': 'Nouveau', 'last_name': 'Pilote',
+                    'password': PASSWORD, 'confirm_password': PASSWORD,
+                }
+            ),
+            'authentication:login': Endpoint(
+                'POST', '/api/auth/login/', 4, client='anonymous',
+                data={'email': self.owner.email, 'password': PASSWORD}
+            ),
+            'authentication:logout': Endpoint('POST', '/api/auth/logout/', 1, client='session'),
+            'authentication:profile': Endpoint('GET', '/api/auth/profile/', 2),
+            # Utilisateur relu en base avec son hachage (absent du cache) avant l'écriture
+            'authentication:change_password': Endpoint(
+                'POST', '/api/auth/change-password/', 3,
+                data={'old_password': PASSWORD, 'new_password': PASSWORD, 'confirm_new_password': PASSWORD}
+            ),
+            'authentication:password_reset': Endpoint(
+                'POST', '/api/auth/password-reset/', 9, client='anonymous',
+                data={'email': self.owner.email}
+            ),
+            'authentication:check_auth': Endpoint('GET', '/api/auth/check-auth/', 2),
+            'authentication:refresh_token': Endpoint('POST', '/api/auth/refresh-token/', 1),
+            'authentication:carousel-list': Endpoint('GET', '/api/auth/carousel/', client='anonymous'),
+            'authentication:carousel-detail': Endpoint(
+                'GET', f'/api/auth/carousel/{self.carousel_image.pk}/', 1, client='anonymous'
+            ),
+            'authentication:start_chunked_upload': Endpoint(
+                'POST', '/api/auth/uploads/', 3, status=201,
+                data={
+                    'target': 'drone_photo', 'object_id': str(self.drone.pk), 'filename': 'photo.png',
+                    'content_type': 'image/png', 'total_size': 4096,
+                }
+            ),
+            # Dernier morceau : session verrouillée, finalisation, remplacement de la
+            # photo et compteurs de références
+            'authentication:chunked_upload': Endpoint(
+                'PUT', self._upload_chunk_path, 16,
+                data=lambda run: self._chunk, content_type='application/octet-stream',
+                headers=self._chunk_headers
+            ),
+            'authentication:get_airports_for_map': Endpoint('GET', '/api/auth/airports/map/', client='anonymous'),
+            'authentication:create_airport': Endpoint(
+                'POST', '/api/auth/airports/create/', 3, status=201,
+                data=lambda run: {
+                    'airport_id': f'NEW{run}', 'name': f'Aérodrome {run}', 'code': '', 'airport_type': 'aerodrome',
+                    'city': 'Abidjan', 'latitude': 5.3, 'longitude': -4.0, 'radius': 2,
+                }
+            ),
+            'authentication:get_protected_areas_for_map': Endpoint(
+                'GET', '/api/auth/protected-areas/map/', client='anonymous', p95_ms=1000
+            ),
+            # Création : recherche des quasi-doublons (une requête par modèle de zone)
+            'authentication:create_natural_reserve': Endpoint(
+                'POST', '/api/auth/protected-areas/reserves/create/', 4, status=201,
+                data=lambda run: {
+                    'reserve_id': f'RN-NEW-{run}', 'name': 'Réserve', 'area': '10 ha',
+                    'coordinates': self._polygon(run),
+                }
+            ),
+            'authentication:create_national_park': Endpoint(
+                'POST', '/api/auth/protected-areas/parks/create/', 4, status=201,
+                data=lambda run: {
+                    'park_id': f'PN-NEW-{run}', 'name': 'Parc', 'area': '10 ha',
+                    'coordinates': self._polygon(run),
+                }
+            ),
+            'authentication:flight_report': Endpoint('GET', '/api/auth/reports/flights/?group_by=month,drone_type', client='staff'),
+            'authentication:flight_report_export': Endpoint(
+                'GET', '/api/auth/reports/flights/export/?group_by=location', client='staff'
+            ),
+        }
+
+    def measure(self, endpoint):
+        """Appeler la route ``RUNS`` fois et retourner les durées (ms)"""
+        durations = []
+        for run in range(RUNS):
+            client = self._fresh_client(endpoint.client)
+            path = endpoint.path(run) if callable(endpoint.path) else endpoint.path
+            data = endpoint.data(run) if callable(endpoint.data) else endpoint.data
+            extra = endpoint.headers(run) if endpoint.headers else {}
+            if data is not None:
+                extra.update(data=data, content_type=endpoint.content_type)
+
+            start = time.perf_counter()
+            response = assert_query_budget(client, endpoint.method, path, endpoint.queries, **extra)
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+            durations.append((time.perf_counter() - start) * 1000)
+
+            self.assertEqual(
+                response.status_code, endpoint.status,
+                f"{endpoint.method} {path} : statut {response.status_code}"
+            )
+        return durations
+
+    def test_every_route_has_a_budget(self):
+        covered = {resolve(endpoint.path(0) if callable(endpoint.path) else endpoint.path.split('?')[0]).view_name
+                   for endpoint in self.endpoints().values()}
+        missing = sorted(set(iter_route_names()) - covered - EXCLUDED_ROUTES)
+        self.assertEqual(missing, [], f"Routes sans budget de requêtes ni de latence : {missing}")
+
+    def test_declared_budgets_match_views(self):
+        for name, endpoint in self.endpoints().items():
+            if endpoint.queries is None:
+                path = endpoint.path(0) if callable(endpoint.path) else endpoint.path.split('?')[0]
+                with self.subTest(route=name):
+                    self.assertIsNotNone(
+                        declared_query_budget(resolve(path), endpoint.method),
+                        f"{name} : aucun budget déclaré par la vue"
+                    )
+
+    def test_query_and_latency_budgets(self):
+        for name, endpoint in self.endpoints().items():
+            with self.subTest(route=name):
+                durations = self.measure(endpoint)
+                p95 = percentile(durations, 95)
+                limit = endpoint.p95_ms * LATENCY_FACTOR
+                self.assertLessEqual(
+                    p95, limit,
+                    f"{name} : p95 de {p95:.1f} ms pour une limite de {limit:.0f} ms"
+                )
+
+    def test_query_counts_do_not_depend_on_volume(self):
+        """Le nombre de requêtes des listes ne varie pas avec le nombre de lignes"""
+        client = self.clients['owner']
+        baseline = {}
+        for path in ['/api/drones/', '/api/flights/', '/api/flights/recent_flights/', '/api/flights/drone_stats/']:
+            response = assert_query_budget(client, 'GET', path)
+            self.assertEqual(response.status_code, 200)
+            baseline[path] = response
+
+        extra_flights = [
+            DroneFlight(drone=drone, pilot=self.owner, flight_date=self.flight.flight_date, duration=10, location='Abidjan')
+            for drone in self.dataset['drones']
+            for _ in range(20)
+        ]
+        DroneFlight.objects.bulk_create(extra_flights)
+
+        for path in baseline:
+            with self.subTest(path=path):
+                assert_query_budget(client, 'GET', path)
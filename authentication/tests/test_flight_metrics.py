@@ -0,0 +1,100 @@
+"""
+Métriques dérivées des traces de vol (``flight_metrics``) : distance,
+altitude et temps en zone réglementée sur une trace connue ; validation de
+la trace saisie dans l'administration.
+"""
+
+import json
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from authentication.flight_metrics import compute_flight_metrics, parse_track
+from authentication.models import Drone, DroneFlight, User
+
+# Longueur d'un degré de méridien (km) pour EARTH_RADIUS_KM
+KM_PER_DEGREE = 111.1951
+
+# Vers le nord le long du méridien -4 : 0,1° parcouru en 3 minutes
+TRACK = [
+    [5.00, -4.0, 0, 0],
+    [5.05, -4.0, 50, 60],
+    [5.10, -4.0, 120, 120],
+    [5.10, -4.0, 80, 180],
+]
+
+# Zone de 3 km autour du point de départ : seul le premier point y est
+ZONES = np.array([[5.0, -4.0, 3.0]])
+
+
+class FlightMetricsTests(SimpleTestCase):
+
+    def test_known_track(self):
+        metrics = compute_flight_metrics(TRACK, duration_minutes=3, restricted_zones=ZONES)
+
+        self.assertAlmostEqual(metrics['distance_flown'], 0.1 * KM_PER_DEGREE, places=2)
+        self.assertAlmostEqual(metrics['max_distance_from_home'], 0.1 * KM_PER_DEGREE, places=2)
+        self.assertEqual(metrics['max_altitude'], 120.0)
+        self.assertEqual(metrics['restricted_zone_time'], 60)
+
+    def test_times_spread_over_duration(self):
+        # Sans horodatage : 3 points répartis sur 4 minutes, 2 intervalles en zone
+        track = [[5.0, -4.0], [5.001, -4.0], [5.002, -4.0]]
+        metrics = compute_flight_metrics(track, duration_minutes=4, restricted_zones=ZONES)
+
+        self.assertIsNone(metrics['max_altitude'])
+        self.assertEqual(metrics['restricted_zone_time'], 240)
+
+    def test_no_zone(self):
+        metrics = compute_flight_metrics(TRACK, restricted_zones=np.empty((0, 3)))
+        self.assertEqual(metrics['restricted_zone_time'], 0)
+
+    def test_invalid_tracks(self):
+        invalid = {
+            'single point': [[5.0, -4.0]],
+            'latitude': [[95.0, -4.0], [5.0, -4.0]],
+            'mixed widths': [[5.0, -4.0], [5.0, -4.0, 10]],
+            'time goes back': [[5.0, -4.0, 0, 10], [5.0, -4.0, 0, 5]],
+            'not numeric': [[5.0, 'x'], [5.0, -4.0]],
+        }
+        for name, track in invalid.items():
+            with self.subTest(name):
+                with self.assertRaises(ValueError):
+                    parse_track(track)
+
+
+class DroneFlightAdminTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_superuser(
+            email='vols@anac.test', username='vols', password='x', first_name='V', last_name='V'
+        )
+        cls.drone = Drone.objects.create(user=cls.staff, name='Mavic', model='Mavic 3', drone_type='quadcopter')
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def submit(self, track):
+        return self.client.post(reverse('admin:authentication_droneflight_add'), {
+            'drone': self.drone.pk, 'pilot': self.staff.pk,
+            'flight_date_0': '2024-03-01', 'flight_date_1': '10:00:00',
+            'duration': 3, 'location': 'Abidjan', 'track': json.dumps(track),
+        })
+
+    def test_invalid_track_is_a_form_error(self):
+        response = self.submit([[95.0, -4.0], [5.0, -4.0]])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('latitude', str(response.context['adminform'].form.errors['track']))
+        self.assertFalse(DroneFlight.objects.exists())
+
+    def test_valid_track_metrics_are_computed(self):
+        response = self.submit(TRACK)
+
+        self.assertEqual(response.status_code, 302)
+        flight = DroneFlight.objects.get()
+        self.assertAlmostEqual(flight.distance_flown, 0.1 * KM_PER_DEGREE, places=2)
+        self.assertEqual(flight.max_altitude, 120.0)
+        self.assertEqual(flight.restricted_zone_time, 0)
@@ -0,0 +1,117 @@
+"""
+Agrégats quotidiens des vols tenus à jour par les signaux (``reporting``) :
+après chaque opération, la table doit être identique à une reconstruction
+complète par ``rebuild_flight_rollups``.
+"""
+
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from authentication.models import Drone, DroneFlight, FlightDailyRollup, User
+
+
+def rollup_state():
+    """Seaux non vides : (jour, type, lieu) -> (vols, minutes)"""
+    return {
+        (row.day, row.drone_type, row.location): (row.flight_count, row.total_minutes)
+        for row in FlightDailyRollup.objects.filter(flight_count__gt=0)
+    }
+
+
+class FlightRollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pilot = User.objects.create_user(
+            email='agregats@anac.test', username='agregats', password='x', first_name='A', last_name='A'
+        )
+        cls.quad = Drone.objects.create(user=cls.pilot, name='Quad', model='M3', drone_type='quadcopter')
+        cls.wing = Drone.objects.create(user=cls.pilot, name='Aile', model='E1', drone_type='fixed_wing')
+
+    def fly(self, drone, day=1, minutes=20, location='Abidjan'):
+        return DroneFlight.objects.create(
+            drone=drone, pilot=self.pilot, flight_date=datetime(2024, 5, day, 10, tzinfo=dt_timezone.utc),
+            duration=minutes, location=location,
+        )
+
+    def assertMatchesRebuild(self):
+        incremental = rollup_state()
+        call_command('rebuild_flight_rollups', stdout=StringIO())
+        self.assertEqual(incremental, rollup_state())
+
+    def test_create(self):
+        self.fly(self.quad)
+        self.fly(self.quad, minutes=40, location='  Abidjan ')
+        self.fly(self.wing, day=2)
+
+        day = datetime(2024, 5, 1).date()
+        self.assertEqual(rollup_state()[(day, 'quadcopter', 'Abidjan')], (2, 60))
+        self.assertMatchesRebuild()
+
+    def test_update(self):
+        flight = self.fly(self.quad)
+        self.fly(self.quad, location='Bouaké')
+
+        flight.duration = 35
+        flight.save()
+        self.assertMatchesRebuild()
+
+        flight.location = 'Bouaké'
+        flight.flight_date = datetime(2024, 5, 3, 10, tzinfo=dt_timezone.utc)
+        flight.save()
+        self.assertMatchesRebuild()
+
+        flight.drone = self.wing
+        flight.save()
+        self.assertMatchesRebuild()
+
+    def test_delete(self):
+        flight = self.fly(self.quad)
+        self.fly(self.quad)
+        self.fly(self.wing)
+
+        flight.delete()
+        self.assertMatchesRebuild()
+        self.wing.delete()
+        self.assertMatchesRebuild()
+
+    def test_drone_type_change(self):
+        self.fly(self.quad)
+        self.fly(self.quad, day=2, location='Man')
+        self.fly(self.wing)
+
+        self.quad.drone_type = 'hexacopter'
+        self.quad.save()
+
+        state = rollup_state()
+        self.assertNotIn('quadcopter', {drone_type for _, drone_type, _ in state})
+        self.assertMatchesRebuild()
+
+    def test_drone_save_without_type_change(self):
+        self.fly(self.quad)
+        before = rollup_state()
+
+        self.quad.name = 'Renommé'
+        self.quad.save()
+        self.quad.drone_type = 'other'
+        self.quad.save(update_fields=['name'])
+
+        self.assertEqual(rollup_state(), before)
+
+    def test_cascade_delete_reads_no_drone_type(self):
+        for day in range(1, 6):
+            self.fly(self.quad, day=day)
+            self.fly(self.wing, day=day)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.pilot.delete()
+
+        # Aucune lecture du type drone par drone (_flight_drone_type)
+        self.assertFalse([query for query in queries if query['sql'].startswith('SELECT "drone"."drone_type"')])
+        self.assertEqual(rollup_state(), {})
+        self.assertMatchesRebuild()
@@ -0,0 +1,165 @@
+"""
+Validation et réparation des contours soumis (``geometry.repair_ring``) :
+anneau fermé, sens trigonométrique, recoupements détectés par balayage.
+"""
+
+import time
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from authentication.geometry import polygon_points, repair_ring
+from authentication.models import NaturalReserve, User
+
+SQUARE = [[5.0, -4.0], [5.0, -3.0], [6.0, -3.0], [6.0, -4.0]]
+
+# Contour de la réserve d'Azagny (seed_protected_areas) : fermé, sens horaire
+AZAGNY = [
+    [5.0, -4.9], [5.3, -4.8], [5.4, -4.6], [5.3, -4.4], [5.1, -4.3],
+    [4.9, -4.4], [4.8, -4.6], [4.9, -4.8], [5.0, -4.9],
+]
+
+# Limite de temps de la validation d'un contour de 100 000 sommets (s)
+LARGE_RING_SECONDS = 5
+
+
+def signed_area(ring):
+    points = np.asarray(ring)
+    x, y = points[:, 1], points[:, 0]
+    return float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+
+
+def is_simple(points):
+    """
+    Référence O(n²) : aucun retour sur le côté précédent, aucun contact
+    entre côtés non consécutifs
+    """
+    n = len(points)
+
+    def side(a, b, c):
+        return (b[1] - a[1]) * (c[0] - a[0]) - (b[0] - a[0]) * (c[1] - a[1])
+
+    def within(a, b, c):
+        return min(a[0], b[0]) <= c[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= c[1] <= max(a[1], b[1])
+
+    for i in range(n):
+        a, b, c = points[i - 1], points[i], points[(i + 1) % n]
+        folds_back = (b[0] - a[0]) * (c[0] - b[0]) + (b[1] - a[1]) * (c[1] - b[1]) < 0
+        if side(a, b, c) == 0 and folds_back:
+            return False
+    for i in range(n):
+        for j in range(i + 2, n):
+            if i == 0 and j == n - 1:
+                continue
+            a, b, c, d = points[i], points[(i + 1) % n], points[j], points[(j + 1) % n]
+            d1, d2, d3, d4 = side(a, b, c), side(a, b, d), side(c, d, a), side(c, d, b)
+            if d1 * d2 < 0 and d3 * d4 < 0:
+                return False
+            if (d1 == 0 and within(a, b, c)) or (d2 == 0 and within(a, b, d)) \
+                    or (d3 == 0 and within(c, d, a)) or (d4 == 0 and within(c, d, b)):
+                return False
+    return True
+
+
+class RepairRingTests(SimpleTestCase):
+
+    def test_ring_is_closed_and_counterclockwise(self):
+        ring = repair_ring(AZAGNY)
+        self.assertEqual(ring[0], ring[-1])
+        self.assertEqual(len(ring), len(AZAGNY))
+        self.assertGreater(signed_area(ring), 0)
+        self.assertEqual(repair_ring(ring), ring)
+
+    def test_open_ring_keeps_its_first_point(self):
+        self.assertEqual(repair_ring(SQUARE), SQUARE + [SQUARE[0]])
+
+    def test_repeated_vertices_are_removed(self):
+        repeated = [SQUARE[0], SQUARE[1], SQUARE[1], SQUARE[2], SQUARE[3], SQUARE[3], SQUARE[0]]
+        self.assertEqual(repair_ring(repeated), SQUARE + [SQUARE[0]])
+
+    def test_invalid_rings_are_rejected(self):
+        invalid = {
+            'bowtie': [[0, 0], [1, 1], [0, 1], [1, 0]],
+            'revisited vertex': [[0, 0], [0, 2], [1, 1], [2, 2], [2, 0], [1, 1]],
+            'vertex on a side': [[0, 0], [0, 2], [2, 2], [2, 0], [0, 1]],
+            'spike': [[0, 0], [0, 2], [0, 3], [0, 1], [1, 1]],
+            'flat': [[0, 0], [0, 1], [0, 2]],
+            'two points': [[0, 0], [0, 1], [0, 1], [0, 0]],
+            'latitude': [[95, 0], [0, 1], [1, 1]],
+            'not a pair': [[0, 0, 0], [0, 1, 0], [1, 1, 0]],
+        }
+        for name, coordinates in invalid.items():
+            with self.subTest(name):
+                with self.assertRaises(ValueError):
+                    repair_ring(coordinates)
+
+    def test_sweep_matches_brute_force(self):
+        # Petits contours entiers : sommets alignés, côtés verticaux et contacts nombreux
+        rng = np.random.default_rng(7)
+        checked = 0
+        for _ in range(3000):
+            points = rng.integers(0, 5, (rng.integers(4, 10), 2)).astype(float)
+            points = points[~(points == np.roll(points, -1, axis=0)).all(axis=1)]
+            if len(points) < 4:
+                continue
+            checked += 1
+            with self.subTest(points=points.tolist()):
+                try:
+                    repair_ring(points.tolist())
+                except ValueError:
+                    accepted = False
+                else:
+                    accepted = True
+                self.assertEqual(accepted, is_simple(points.tolist()))
+        self.assertGreater(checked, 1000)
+
+    def test_large_ring(self):
+        # Frontière irrégulière de 100 000 sommets (étoilée : simple par construction)
+        rng = np.random.default_rng(3)
+        angles = np.sort(rng.uniform(0, 2 * np.pi, 100_000))
+        radius = 1 + 0.2 * rng.uniform(-1, 1, len(angles))
+        coordinates = np.c_[5 + radius * np.sin(angles), -4 + radius * np.cos(angles)].tolist()
+
+        start = time.perf_counter()
+        ring = repair_ring(coordinates)
+        self.assertLess(time.perf_counter() - start, LARGE_RING_SECONDS)
+        self.assertEqual(len(ring), 100_001)
+
+        # Deux sommets échangés : le contour se recoupe
+        coordinates[500], coordinates[50_000] = coordinates[50_000], coordinates[500]
+        with self.assertRaises(ValueError):
+            repair_ring(coordinates)
+
+    def test_polygon_points_is_unchanged_for_stored_rings(self):
+        self.assertEqual(polygon_points(repair_ring(SQUARE)).shape, (5, 2))
+
+
+class SubmittedPolygonTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='contours@anac.test', username='contours', password='x', first_name='C', last_name='C'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def submit(self, coordinates):
+        return self.client.post(reverse('authentication:create_natural_reserve'), {
+            'reserve_id': 'r-contour', 'name': 'Contour', 'area': '10 km²', 'coordinates': coordinates,
+        }, content_type='application/json')
+
+    def test_submitted_ring_is_repaired(self):
+        response = self.submit(AZAGNY)
+        self.assertEqual(response.status_code, 201)
+        stored = NaturalReserve.objects.get(reserve_id='r-contour').coordinates
+        self.assertEqual(stored, repair_ring(AZAGNY))
+        self.assertGreater(signed_area(stored), 0)
+
+    def test_self_intersecting_ring_is_rejected(self):
+        response = self.submit([[5, -4], [6, -3], [5, -3], [6, -4]])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('recoupe', response.json()['details']['coordinates'][0])
+        self.assertFalse(NaturalReserve.objects.exists())
@@ -0,0 +1,109 @@
+"""
+Déclinaisons des images téléversées (``images``) : largeurs, dimensions et
+tailles enregistrées, formats (AVIF via pillow-avif-plugin), ``srcset``.
+"""
+
+import io
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from authentication.images import DERIVATIVE_WIDTHS, available_formats, build_srcset, generate_derivatives
+from authentication.models import CarouselImage
+
+
+def png_bytes(size, mode='RGB'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, (30, 120, 200, 128)[:len(mode)]).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class DerivativeTests(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.storage = FileSystemStorage(location=self.root, base_url='/media/')
+
+    def generate(self, size, mode='RGB'):
+        name = self.storage.save('carousel/vue.png', ContentFile(png_bytes(size, mode)))
+        return generate_derivatives(name, storage=self.storage)
+
+    def test_widths_dimensions_and_sizes(self):
+        data = self.generate((2000, 1000))
+        formats = available_formats()
+
+        self.assertEqual(data['source'], 'carousel/vue.png')
+        self.assertEqual(len(data['variants']), len(DERIVATIVE_WIDTHS) * len(formats))
+        self.assertEqual(sorted({variant['width'] for variant in data['variants']}), list(DERIVATIVE_WIDTHS))
+        for variant in data['variants']:
+            with self.subTest(name=variant['name']):
+                self.assertEqual(variant['height'], variant['width'] // 2)
+                self.assertEqual(variant['size'], self.storage.size(variant['name']))
+                with self.storage.open(variant['name']) as stored:
+                    image = Image.open(stored)
+                    self.assertEqual(image.size, (variant['width'], variant['height']))
+                    self.assertEqual(image.format, {'jpeg': 'JPEG', 'webp': 'WEBP', 'avif': 'AVIF'}[variant['format']])
+
+    def test_regeneration_keeps_existing_variants(self):
+        first = self.generate((1000, 500))
+        with mock.patch.object(self.storage, 'delete') as delete:
+            second = generate_derivatives(first['source'], storage=self.storage)
+
+        delete.assert_not_called()
+        self.assertEqual(len(second['variants']), len(first['variants']))
+        for variant in first['variants']:
+            self.assertTrue(self.storage.exists(variant['name']))
+
+    def test_small_image_is_not_enlarged(self):
+        data = self.generate((200, 150), mode='RGBA')
+        self.assertEqual({(variant['width'], variant['height']) for variant in data['variants']}, {(200, 150)})
+
+    @unittest.skipUnless('avif' in available_formats(), 'pillow-avif-plugin non installé')
+    def test_avif_is_generated(self):
+        data = self.generate((800, 600))
+        avif = [variant for variant in data['variants'] if variant['format'] == 'avif']
+        self.assertEqual([variant['width'] for variant in avif], [320, 640])
+        self.assertTrue(all(variant['name'].endswith('.avif') for variant in avif))
+
+    def test_srcset(self):
+        data = self.generate((1000, 500))
+        srcset = build_srcset(data, storage=self.storage)
+
+        self.assertEqual(set(srcset), set(available_formats()))
+        self.assertEqual(
+            srcset['webp'],
+            '/media/derivatives/carousel/vue_320w.webp 320w, /media/derivatives/carousel/vue_640w.webp 640w',
+        )
+        self.assertEqual(build_srcset({}), {})
+
+
+@override_settings(IMAGE_DERIVATIVE_WORKERS=0)
+class DerivativeSchedulingTests(TestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def test_variants_recorded_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = CarouselImage.objects.create(
+                title='Accueil', image=ContentFile(png_bytes((700, 350)), name='accueil.png')
+            )
+
+        image.refresh_from_db()
+        self.assertEqual(image.image_variants['source'], image.image.name)
+        self.assertEqual({variant['width'] for variant in image.image_variants['variants']}, {320, 640})
+        for variant in image.image_variants['variants']:
+            self.assertTrue(default_storage.exists(variant['name']))
+        self.assertIn(' 640w', image.image_srcset['jpeg'])
+        self.assertTrue(image.image_srcset['jpeg'].startswith('/media/derivatives/carousel/'))
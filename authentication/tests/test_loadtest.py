@@ -0,0 +1,205 @@
+"""
+Générateur de charge (``loadtest``) : validation des scénarios, centiles,
+variables, cookies de l'utilisateur virtuel, rapport et comparaison, et
+commande ``loadtest`` contre l'application ASGI.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+from authentication.loadtest import (
+    LOGIN_PATH, LoadTest, Recorder, ScenarioError, Session, build_report, compare_reports, extract,
+    is_expected, load_scenario, percentile, render, requires_auth
+)
+
+SCENARIO = {
+    'name': 'essai',
+    'setup': [
+        {'name': 'drones', 'method': 'GET', 'path': '/api/drones/', 'auth': True, 'extract': {'drone_id': '0.id'}}
+    ],
+    'groups': [
+        {'name': 'public', 'weight': 1, 'requests': [
+            {'name': 'carte', 'method': 'GET', 'path': '/carte/'},
+        ]},
+        {'name': 'prive', 'weight': 1, 'requests': [
+            {'name': 'drone', 'method': 'GET', 'path': '/api/drones/{drone_id}/', 'auth': True},
+        ]},
+    ],
+}
+
+
+class FakeTransport:
+    """Transport en mémoire : journal des requêtes et réponses prévues par chemin"""
+
+    def __init__(self, log):
+        self.log = log
+
+    async def close(self):
+        pass
+
+    async def request(self, method, path, headers, body):
+        self.log.append((method, path, dict(headers)))
+        if path == LOGIN_PATH:
+            return 200, [('set-cookie', 'access_token=jeton; Path=/; HttpOnly')], b'{}'
+        if path == '/api/drones/':
+            return 200, [], json.dumps([{'id': 'abc'}]).encode()
+        if path == '/carte/':
+            return 503, [], b''
+        return 200, [], b'{}'
+
+
+class HelperTests(SimpleTestCase):
+
+    def write(self, scenario):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'scenario.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(scenario, f)
+        return path
+
+    def test_load_scenario(self):
+        self.assertEqual(load_scenario(self.write(SCENARIO))['name'], 'essai')
+        invalid = {
+            'aucun groupe': {'groups': []},
+            'aucune requête': {'groups': [{'name': 'vide', 'requests': []}]},
+            'sans chemin': {'groups': [{'name': 'g', 'requests': [{'name': 'a'}]}]},
+            'en double': {'groups': [{'name': 'g', 'requests': [
+                {'name': 'a', 'path': '/a/'}, {'name': 'a', 'path': '/b/'}
+            ]}]},
+        }
+        for case, scenario in invalid.items():
+            with self.subTest(case=case), self.assertRaises(ScenarioError):
+                load_scenario(self.write(scenario))
+
+    def test_requires_auth(self):
+        self.assertTrue(requires_auth(SCENARIO))
+        self.assertFalse(requires_auth({'groups': [SCENARIO['groups'][0]]}))
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+
+    def test_extract_and_render(self):
+        self.assertEqual(extract({'vols': [{'id': 4}]}, 'vols.0.id'), 4)
+        self.assertEqual(
+            render({'chemin': '/d/{id}/', 'liste': ['{user}'], 'n': 3}, {'id': 4, 'user': 1}),
+            {'chemin': '/d/4/', 'liste': ['1'], 'n': 3}
+        )
+
+    def test_is_expected(self):
+        self.assertTrue(is_expected({}, 302))
+        self.assertFalse(is_expected({}, 404))
+        self.assertTrue(is_expected({'status': 401}, 401))
+        self.assertTrue(is_expected({'status': [200, 409]}, 409))
+        self.assertFalse(is_expected({'status': [200, 409]}, 500))
+
+    def test_session_cookies(self):
+        log = []
+        session = Session(FakeTransport(log))
+        session._store_cookies([('set-cookie', 'access_token=a; Path=/'), ('set-cookie', 'refresh_token=r')])
+        session._store_cookies([('set-cookie', 'refresh_token=""; Max-Age=0; Path=/')])
+        self.assertEqual(session.cookies, {'access_token': 'a'})
+
+        asyncio.run(session.request('GET', '/public/'))
+        asyncio.run(session.request('GET', '/prive/', auth=True))
+        self.assertNotIn('Cookie', log[0][2])
+        self.assertEqual(log[1][2]['Cookie'], 'access_token=a')
+
+    def test_report_and_comparison(self):
+        recorder = Recorder()
+        for latency in (10, 20, 30, 40):
+            recorder.record('public', 'carte', latency, '200', True)
+        recorder.record('prive', 'drone', 50, '500', False)
+
+        report = build_report({'name': 'essai'}, recorder, 2.0, {})
+        self.assertEqual(report['totals']['requests'], 5)
+        self.assertEqual(report['totals']['errors'], 1)
+        self.assertEqual(report['groups']['public']['throughput_rps'], 2.0)
+        self.assertEqual(report['endpoints']['carte']['latency_ms']['p50'], 20)
+        self.assertEqual(report['endpoints']['drone']['status_codes'], {'500': 1})
+        self.assertEqual(report['endpoints']['drone']['error_rate'], 1.0)
+
+        baseline = json.loads(json.dumps(report))
+        baseline['endpoints']['carte']['throughput_rps'] = 1.0
+        del baseline['endpoints']['drone']
+        self.assertEqual(compare_reports(baseline, report), [('carte', 1.0, 0.0, 0.0), ('drone', None, None, None)])
+
+
+class LoadTestRunTests(SimpleTestCase):
+
+    def run_load_test(self, **kwargs):
+        log = []
+        load_test = LoadTest(
+            SCENARIO, lambda: FakeTransport(log), concurrency=2, max_requests=40, seed=3,
+            credentials={'email': 'charge@anac.test', 'password': 'x'}, **kwargs
+        )
+        return asyncio.run(load_test.run()), log
+
+    def test_run(self):
+        report, log = self.run_load_test()
+
+        self.assertEqual(report['totals']['requests'], 40)
+        self.assertEqual(set(report['endpoints']), {'carte', 'drone'})
+        # La carte répond 503 : toutes ses requêtes sont des erreurs
+        self.assertEqual(report['endpoints']['carte']['error_rate'], 1.0)
+        self.assertEqual(report['endpoints']['drone']['errors'], 0)
+        self.assertIn(('GET', '/api/drones/abc/'), [(method, path) for method, path, _ in log])
+        # Setup et deux utilisateurs virtuels : trois connexions
+        self.assertEqual(sum(path == LOGIN_PATH for _, path, _ in log), 3)
+        self.assertEqual(report['config']['seed'], 3)
+
+    def test_same_seed_same_mix(self):
+        first, _ = self.run_load_test()
+        second, _ = self.run_load_test()
+
+        self.assertEqual(
+            {name: endpoint['requests'] for name, endpoint in first['endpoints'].items()},
+            {name: endpoint['requests'] for name, endpoint in second['endpoints'].items()},
+        )
+
+
+class LoadTestCommandTests(SimpleTestCase):
+
+    def test_public_scenario_against_asgi(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        scenario = os.path.join(directory, 'scenario.json')
+        output = os.path.join(directory, 'rapport.json')
+        with open(scenario, 'w', encoding='utf-8') as f:
+            json.dump({'name': 'public', 'groups': [{'name': 'public', 'requests': [
+                {'name': 'absente', 'method': 'GET', 'path': '/api/inexistante/', 'status': 404},
+            ]}]}, f)
+
+        call_command(
+            'loadtest', scenario=scenario, requests=5, concurrency=2, output=output, stderr=StringIO()
+        )
+
+        with open(output, encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual(report['config']['target'], 'asgi')
+        self.assertEqual(report['endpoints']['absente']['requests'], 5)
+        self.assertEqual(report['endpoints']['absente']['status_codes'], {'404': 5})
+        self.assertEqual(report['totals']['errors'], 0)
+
+    def test_authenticated_scenario_needs_credentials(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        scenario = os.path.join(directory, 'scenario.json')
+        with open(scenario, 'w', encoding='utf-8') as f:
+            json.dump(SCENARIO, f)
+
+        with self.assertRaisesMessage(CommandError, '--email et --password sont requis'):
+            call_command('loadtest', scenario=scenario, email=None, password=None)
+        with self.assertRaisesMessage(CommandError, 'Scénario invalide'):
+            call_command('loadtest', scenario=os.path.join(directory, 'absent.json'))
@@ -0,0 +1,98 @@
+"""
+Format binaire de la carte (``map_payload``) : négociation sur les routes
+de la carte, contours en écarts, taille par rapport au JSON.
+"""
+
+import math
+
+import msgpack
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from authentication.caching import clear_local_caches
+from authentication.map_payload import COORDINATE_SCALE, decode_ring, encode_ring
+from authentication.models import Airport, NaturalReserve
+
+
+def boundary(vertices, lat=5.0, lng=-4.0):
+    """Contour dense et irrégulier, coordonnées à 6 décimales comme en base"""
+    return [
+        [
+            round(lat + (0.3 + 0.01 * math.sin(index / 50)) * math.sin(2 * math.pi * index / vertices), 6),
+            round(lng + (0.3 + 0.01 * math.cos(index / 50)) * math.cos(2 * math.pi * index / vertices), 6),
+        ]
+        for index in range(vertices)
+    ]
+
+
+class RingEncodingTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        ring = boundary(500) + [[-89.999999, 179.999999], [89.999999, -179.999999]]
+        self.assertEqual(decode_ring(encode_ring(ring)), ring)
+        self.assertEqual(encode_ring([]), b'')
+
+    def test_deltas_are_small(self):
+        # Premier point en absolu, puis 1 octet par écart de moins de 64 unités
+        encoded = encode_ring([[0, 0], [0.000001, -0.000001], [0.000064, 0]])
+        self.assertEqual(encoded, bytes([0, 0, 2, 1, 0x7E, 2]))
+
+
+class MapPayloadTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Airport.objects.create(
+            airport_id='abj', name='Félix Houphouët-Boigny', code='ABJ', airport_type='international',
+            city='Abidjan', latitude='5.261400', longitude='-3.925800', radius='8.00', is_active=True,
+        )
+        cls.reserve = NaturalReserve.objects.create(
+            reserve_id='r-dense', name='Réserve', area='100 km²', coordinates=boundary(5000), is_active=True
+        )
+
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+
+    def test_protected_areas_payload(self):
+        path = reverse('authentication:get_protected_areas_for_map')
+        json_response = self.client.get(path)
+        response = self.client.get(path, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertIn('Accept', response['Vary'])
+        self.assertNotEqual(response['ETag'], json_response['ETag'])
+        # 4 octets par sommet au lieu d'une vingtaine en JSON
+        self.assertLess(len(response.content) * 4, len(json_response.content))
+
+        payload = msgpack.unpackb(response.content)
+        self.assertEqual(payload['scale'], COORDINATE_SCALE)
+        self.assertEqual(payload['total_protected_areas'], 1)
+        reserve = dict(zip(payload['natural_reserve_fields'], payload['natural_reserves'][0]))
+        self.assertEqual(reserve['reserve_id'], 'r-dense')
+        self.assertEqual(reserve['id'], str(self.reserve.pk))
+        self.assertEqual(decode_ring(reserve['coordinates']), json_response.json()['natural_reserves'][0]['coordinates'])
+
+    def test_airports_payload(self):
+        response = self.client.get(reverse('authentication:get_airports_for_map'), {'format': 'msgpack'})
+
+        payload = msgpack.unpackb(response.content)
+        airport = dict(zip(payload['airport_fields'], payload['airports'][0]))
+        self.assertEqual((airport['id'], airport['radius']), ('abj', 8.0))
+        self.assertEqual((airport['latitude'], airport['longitude']), (5261400, -3925800))
+        self.assertEqual(payload['total_locations'], 1)
+
+    def test_json_stays_the_default(self):
+        path = reverse('authentication:get_airports_for_map')
+        for accept in ('', '*/*', 'application/json', 'application/json, application/msgpack;q=0.5'):
+            with self.subTest(accept=accept):
+                response = self.client.get(path, HTTP_ACCEPT=accept)
+                self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_not_modified_per_representation(self):
+        path = reverse('authentication:get_airports_for_map')
+        etag = self.client.get(path, HTTP_ACCEPT='application/msgpack')['ETag']
+
+        self.assertEqual(self.client.get(path, HTTP_ACCEPT='application/msgpack', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 200)
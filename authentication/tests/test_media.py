@@ -0,0 +1,140 @@
+"""
+Service des médias (``media.serve_media``) : plages d'octets, ``If-Range``,
+plages non satisfaisables, requêtes conditionnelles, cache des fichiers
+immuables et délégation à nginx (``X-Accel-Redirect``).
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+from django.utils.http import http_date
+
+from authentication.media import IMMUTABLE_CACHE_CONTROL, RangeNotSatisfiable, parse_range
+
+CONTENT = bytes(range(256)) * 40
+
+
+class ParseRangeTests(SimpleTestCase):
+
+    def test_ranges(self):
+        cases = {
+            None: None,
+            'bytes=0-99': (0, 99),
+            'bytes=100-': (100, 999),
+            'bytes=-10': (990, 999),
+            'bytes=-5000': (0, 999),
+            'bytes=900-5000': (900, 999),
+            'bytes=0-1,5-6': None,
+            'bytes=5-2': None,
+            'octets=0-1': None,
+            'bytes=a-b': None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(parse_range(header, 1000), expected)
+
+    def test_unsatisfiable(self):
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range('bytes=1000-', 1000)
+
+
+class ServeMediaTests(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.root, MEDIA_ACCEL_REDIRECT_PREFIX=None, MEDIA_CACHE_MAX_AGE=600)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.hashed = f'drones/{hashlib.sha256(CONTENT).hexdigest()}.png'
+        self.plain = 'carousel/ancien.png'
+        for name in (self.hashed, self.plain, 'drones/envoi.png.part'):
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as media_file:
+                media_file.write(CONTENT)
+
+    def get(self, name, **headers):
+        return self.client.get(f'/media/{name}', **headers)
+
+    def test_full_file(self):
+        response = self.get(self.hashed)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response['ETag'], f'"{hashlib.sha256(CONTENT).hexdigest()}"')
+        self.assertEqual(self.get(self.plain)['Cache-Control'], 'public, max-age=600')
+
+    def test_range(self):
+        response = self.get(self.hashed, HTTP_RANGE='bytes=100-199')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[100:200])
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(CONTENT)}')
+        self.assertEqual(response['Content-Length'], '100')
+
+        suffix = self.get(self.hashed, HTTP_RANGE='bytes=-16')
+        self.assertEqual(b''.join(suffix.streaming_content), CONTENT[-16:])
+
+    def test_unsatisfiable_range(self):
+        response = self.get(self.hashed, HTTP_RANGE=f'bytes={len(CONTENT)}-')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_if_range(self):
+        etag = self.get(self.plain)['ETag']
+
+        matching = self.get(self.plain, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(matching.status_code, 206)
+
+        changed = self.get(self.plain, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"ancienne-version"')
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(b''.join(changed.streaming_content), CONTENT)
+
+        mtime = os.stat(os.path.join(self.root, self.plain)).st_mtime
+        self.assertEqual(self.get(self.plain, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=http_date(mtime)).status_code, 206)
+        self.assertEqual(
+            self.get(self.plain, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=http_date(mtime - 60)).status_code, 200
+        )
+
+    def test_conditional_requests(self):
+        first = self.get(self.plain)
+
+        self.assertEqual(self.get(self.plain, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        self.assertEqual(self.get(self.plain, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304)
+        self.assertEqual(self.get(self.plain, HTTP_IF_NONE_MATCH='"autre"').status_code, 200)
+
+    def test_head(self):
+        response = self.client.head(f'/media/{self.hashed}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response.content, b'')
+
+    def test_not_served(self):
+        for name in ('drones/envoi.png.part', 'drones/absent.png', 'drones', '../settings.py'):
+            with self.subTest(name=name):
+                self.assertEqual(self.get(name).status_code, 404)
+        self.assertEqual(self.client.post(f'/media/{self.hashed}').status_code, 405)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_accel_redirect(self):
+        response = self.get(self.hashed, HTTP_RANGE='bytes=0-9')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.hashed}')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+
+        etag = response['ETag']
+        self.assertEqual(self.get(self.hashed, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.get('drones/absent.png').status_code, 404)
@@ -0,0 +1,111 @@
+"""
+Instrumentation des requêtes (``metrics``) : agrégats par vue, budgets de
+requêtes SQL, en-tête Server-Timing et export Prometheus.
+"""
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from authentication.jwt_utils import JWTTokenManager
+from authentication.metrics import (
+    PROMETHEUS_CONTENT_TYPE, MetricsRegistry, RequestTimings, declared_query_budget, registry
+)
+from authentication.models import Drone, User
+
+
+def sample(text, line_start):
+    """Valeur de la première ligne d'export commençant par ``line_start``"""
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+
+class RegistryTests(SimpleTestCase):
+
+    def test_render(self):
+        metrics = MetricsRegistry()
+        timings = RequestTimings()
+        timings.queries = 3
+        timings.db_time = 0.02
+        metrics.record('drone-list', 'GET', 200, timings, 0.03, budget=2)
+        metrics.record('drone-list', 'GET', 200, RequestTimings(), 0.3, budget=2)
+        metrics.increment('api_compressed_responses_total', {'encoding': 'gzip', 'mode': 'a"b\\c'})
+
+        text = metrics.render()
+        labels = '{method="GET",view="drone-list"}'
+        self.assertIn('# TYPE api_requests_total counter', text)
+        self.assertEqual(sample(text, 'api_requests_total{method="GET",status="200",view="drone-list"}'), 2)
+        self.assertEqual(sample(text, 'api_request_duration_seconds_bucket{method="GET",view="drone-list",le="0.05"}'), 1)
+        self.assertEqual(sample(text, 'api_request_duration_seconds_bucket{method="GET",view="drone-list",le="+Inf"}'), 2)
+        self.assertEqual(sample(text, f'api_request_duration_seconds_count{labels}'), 2)
+        self.assertAlmostEqual(sample(text, f'api_request_duration_seconds_sum{labels}'), 0.33)
+        self.assertEqual(sample(text, f'api_query_budget_exceeded_total{labels}'), 1)
+        self.assertIn('mode="a\\"b\\\\c"', text)
+
+    def test_declared_budgets(self):
+        self.assertEqual(declared_query_budget(resolve('/api/drones/'), 'GET'), 2)
+        self.assertEqual(declared_query_budget(resolve('/api/drones/maintenance_due/'), 'GET'), 2)
+        self.assertIsNone(declared_query_budget(resolve('/api/drones/'), 'POST'))
+        self.assertIsNone(declared_query_budget(None, 'GET'))
+
+
+@override_settings(METRICS_TOKEN='jeton-metriques')
+class RequestMetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='mesures@anac.test', username='mesures', password='x', first_name='M', last_name='M'
+        )
+        Drone.objects.create(user=cls.owner, name='Mesuré', model='M3', drone_type='quadcopter')
+
+    def setUp(self):
+        registry.reset()
+        self.addCleanup(registry.reset)
+        self.client.cookies['access_token'] = JWTTokenManager.create_tokens_for_user(self.owner)['access']
+
+    def export(self):
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer jeton-metriques')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], PROMETHEUS_CONTENT_TYPE)
+        return response.content.decode()
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.get('/api/drones/')
+        self.client.get('/api/drones/')
+        self.client.get('/api/drones/00000000-0000-0000-0000-000000000000/')
+
+        text = self.export()
+        self.assertEqual(sample(text, 'api_requests_total{method="GET",status="200",view="drone-list"}'), 2)
+        self.assertEqual(sample(text, 'api_requests_total{method="GET",status="404",view="drone-detail"}'), 1)
+        self.assertGreaterEqual(sample(text, 'api_db_queries_sum{method="GET",view="drone-list"}'), 2)
+        self.assertIsNotNone(sample(text, 'api_serialization_duration_seconds_count{method="GET",view="drone-list"}'))
+        self.assertNotIn('/api/drones/00000000', text)
+
+    def test_budget_exceeded_is_counted_and_logged(self):
+        # Connexion par session : une requête de plus que le budget de la liste
+        self.client.cookies.clear()
+        self.client.force_login(self.owner)
+        with self.assertLogs('authentication.metrics', 'WARNING') as logs:
+            self.client.get('/api/drones/')
+
+        self.assertIn('Budget de requêtes dépassé pour drone-list', logs.output[0])
+        self.assertEqual(sample(self.export(), 'api_query_budget_exceeded_total{method="GET",view="drone-list"}'), 1)
+
+    @override_settings(METRICS_SERVER_TIMING=True)
+    def test_server_timing(self):
+        header = self.client.get('/api/drones/')['Server-Timing']
+
+        self.assertRegex(header, r'^db;desc="\d+ SQL";dur=[\d.]+, auth;dur=[\d.]+, serialize;dur=[\d.]+, total;dur=[\d.]+$')
+
+    def test_export_requires_token_or_staff(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(
+            self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer mauvais').status_code, 403
+        )
+        staff = User.objects.create_superuser(
+            email='chef@anac.test', username='chef', password='x', first_name='C', last_name='C'
+        )
+        self.client.cookies['access_token'] = JWTTokenManager.create_tokens_for_user(staff)['access']
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
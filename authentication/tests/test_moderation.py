@@ -0,0 +1,109 @@
+"""
+File de modération des aéroports et zones protégées : approbation en une
+requête, invalidation de la carte une fois par lot, aperçus et
+chevauchements calculés sans charger les polygones.
+"""
+
+from unittest import mock
+
+from django.contrib.admin import helpers
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from authentication import snapshots
+from authentication.models import Airport, NationalPark, NaturalReserve, User
+
+SQUARE = [[5.0, -4.0], [5.0, -3.0], [6.0, -3.0], [6.0, -4.0]]
+
+
+def shifted(polygon, lat=0.0, lng=0.0):
+    return [[point[0] + lat, point[1] + lng] for point in polygon]
+
+
+class ModerationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_superuser(
+            email='moderation@anac.test', username='moderation', password='x', first_name='A', last_name='B'
+        )
+        cls.approved = NationalPark.objects.create(
+            park_id='p-ok', name='Parc approuvé', area='100 km²', coordinates=SQUARE, is_active=True
+        )
+        cls.pending = [
+            NaturalReserve.objects.create(
+                reserve_id=f'r-{index}', name=f'Réserve {index}', area='10 km²',
+                coordinates=shifted(SQUARE, lat=0.5 + 2 * index)
+            )
+            for index in range(3)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def post_action(self, model, action, objects):
+        path = reverse(f'admin:authentication_{model._meta.model_name}_changelist')
+        return self.client.post(path, {
+            'action': action,
+            helpers.ACTION_CHECKBOX_NAME: [str(obj.pk) for obj in objects],
+        })
+
+    def test_geometry_summary_is_stored(self):
+        reserve = self.pending[0]
+        self.assertEqual(
+            (reserve.min_latitude, reserve.max_latitude, reserve.min_longitude, reserve.max_longitude),
+            (5.5, 6.5, -4.0, -3.0)
+        )
+        self.assertEqual(reserve.vertex_count, 4)
+        # Nord en haut : la latitude maximale est à y = 0
+        self.assertEqual(reserve.geometry_preview, '0.0,100.0 100.0,100.0 100.0,0.0 0.0,0.0')
+
+    def test_overlap_with_approved_area(self):
+        overlaps = dict(
+            NaturalReserve.objects.with_overlap_warning().values_list('reserve_id', 'overlaps_approved')
+        )
+        self.assertEqual(overlaps, {'r-0': True, 'r-1': False, 'r-2': False})
+
+    def test_approve_is_one_update_and_one_invalidation(self):
+        with mock.patch.object(snapshots.snapshot_cache, 'invalidate') as invalidate:
+            with CaptureQueriesContext(connection) as context:
+                response = self.post_action(NaturalReserve, 'approve_selected', self.pending)
+
+        self.assertEqual(response.status_code, 302)
+        updates = [query['sql'] for query in context.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('coordinates', updates[0])
+        invalidate.assert_called_once_with(snapshots.PROTECTED_AREAS_MAP_SNAPSHOT)
+        self.assertEqual(NaturalReserve.objects.filter(is_active=True).count(), 3)
+
+    def test_reject_invalidates_once_per_batch(self):
+        with mock.patch.object(snapshots.snapshot_cache, 'invalidate') as invalidate:
+            self.post_action(NaturalReserve, 'reject_selected', self.pending)
+
+        invalidate.assert_called_once_with(snapshots.PROTECTED_AREAS_MAP_SNAPSHOT)
+        self.assertFalse(NaturalReserve.objects.exists())
+
+    def test_airport_overlap_and_approval(self):
+        common = {'airport_type': 'aerodrome', 'city': 'Abidjan', 'radius': 5}
+        Airport.objects.create(airport_id='a1', name='Approuvé', latitude=5.25, longitude=-3.92, is_active=True, **common)
+        near = Airport.objects.create(airport_id='a2', name='Proche', latitude=5.30, longitude=-3.90, **common)
+        far = Airport.objects.create(airport_id='a3', name='Loin', latitude=7.00, longitude=-5.00, **common)
+
+        overlaps = dict(Airport.objects.with_overlap_warning().values_list('airport_id', 'overlaps_approved'))
+        self.assertEqual(overlaps, {'a1': False, 'a2': True, 'a3': False})
+
+        with mock.patch.object(snapshots.snapshot_cache, 'invalidate') as invalidate:
+            self.post_action(Airport, 'approve_selected', [near, far])
+        invalidate.assert_called_once_with(snapshots.AIRPORTS_MAP_SNAPSHOT)
+        self.assertEqual(Airport.objects.filter(is_active=True).count(), 3)
+
+    def test_changelist_does_not_load_polygons(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('admin:authentication_naturalreserve_changelist'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<polygon points=')
+        self.assertContains(response, 'Chevauche une zone approuvée', count=1)
+        self.assertFalse(any('"natural_reserve"."coordinates"' in query['sql'] for query in context.captured_queries))
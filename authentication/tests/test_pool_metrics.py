@@ -0,0 +1,81 @@
+"""
+Pools de connexions psycopg : vérification de santé transmise au pool par
+``CONN_HEALTH_CHECKS`` et métriques ``db_pool_*`` relevées à chaque export.
+"""
+
+from unittest import mock
+
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from psycopg_pool import ConnectionPool
+
+from authentication.metrics import collect_pool_metrics, connection_pools, registry
+from authentication.tests.test_metrics import sample
+
+STATS = {
+    'pool_min': 2, 'pool_max': 10, 'pool_size': 6, 'pool_available': 1, 'requests_waiting': 3,
+    'requests_num': 120, 'requests_queued': 7, 'requests_wait_ms': 2500, 'requests_errors': 1,
+    'connections_lost': 2,
+}
+
+
+class FakePool:
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def get_stats(self):
+        return self.stats
+
+
+class PoolHealthCheckTests(SimpleTestCase):
+
+    def pool(self, health_checks):
+        # Réglages de config/production.py ; le pool n'est pas ouvert
+        handler = ConnectionHandler({'default': {
+            'ENGINE': 'django.db.backends.postgresql', 'NAME': 'anac_db', 'HOST': 'localhost',
+            'CONN_HEALTH_CHECKS': health_checks, 'OPTIONS': {'pool': {'min_size': 2, 'max_size': 10}},
+        }})
+        wrapper = handler['default']
+        self.addCleanup(type(wrapper)._connection_pools.pop, 'default', None)
+        return wrapper.pool
+
+    def test_health_checks_reach_the_pool(self):
+        self.assertEqual(self.pool(True)._check, ConnectionPool.check_connection)
+
+    def test_without_health_checks(self):
+        self.assertIsNone(self.pool(False)._check)
+
+
+@override_settings(METRICS_TOKEN='jeton-metriques')
+class PoolMetricsTests(SimpleTestCase):
+
+    def setUp(self):
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+    def test_collect(self):
+        with mock.patch('authentication.metrics.connection_pools', return_value={
+            'default': FakePool(STATS), 'replica_1': FakePool({'pool_max': 0}),
+        }):
+            collect_pool_metrics()
+
+        text = registry.render()
+        self.assertEqual(sample(text, 'db_pool_max_connections{alias="default"}'), 10)
+        self.assertEqual(sample(text, 'db_pool_waiting_requests{alias="default"}'), 3)
+        self.assertEqual(sample(text, 'db_pool_queued_requests_total{alias="default"}'), 7)
+        self.assertEqual(sample(text, 'db_pool_wait_seconds_total{alias="default"}'), 2.5)
+        self.assertEqual(sample(text, 'db_pool_connections_lost_total{alias="default"}'), 2)
+        self.assertEqual(sample(text, 'db_pool_connection_errors_total{alias="default"}'), 0)
+        self.assertEqual(sample(text, 'db_pool_utilization{alias="default"}'), 0.5)
+        self.assertEqual(sample(text, 'db_pool_utilization{alias="replica_1"}'), 0)
+
+    def test_export(self):
+        with mock.patch('authentication.metrics.connection_pools', return_value={'default': FakePool(STATS)}):
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer jeton-metriques')
+
+        self.assertEqual(sample(response.content.decode(), 'db_pool_connections{alias="default"}'), 6)
+
+    def test_no_pool_with_sqlite(self):
+        self.assertEqual(connection_pools(), {})
@@ -0,0 +1,154 @@
+"""
+Routage des lectures vers les réplicas (``authentication/routers.py``).
+
+Les décisions du routeur sont vérifiées sans réplica réel ; le routage de
+bout en bout avec deux bases SQLite locales s'exécute avec
+``DB_REPLICA_NAME=replica.sqlite3`` (le réplica est alors le miroir de
+la base de test).
+"""
+
+import math
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.db import transaction
+from django.test import Client, SimpleTestCase, TransactionTestCase, override_settings
+
+from authentication.jwt_utils import JWTTokenManager
+from authentication.models import Drone, User, UserProfile
+from authentication.routers import (
+    STICKY_COOKIE, ReplicaRouter, RoutingState, _state, read_from_replica, replica_lag
+)
+
+
+class ReplicaTestMixin:
+    replica = 'replica'
+
+    def setUp(self):
+        super().setUp()
+        replica_lag.set_lag(self.replica, 0.0)
+        self.addCleanup(replica_lag.reset)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_MAX_LAG=5)
+class ReplicaRouterTests(ReplicaTestMixin, SimpleTestCase):
+    router = ReplicaRouter()
+
+    def routed_read(self, state=None):
+        if state is None:
+            return self.router.db_for_read(Drone)
+        token = _state.set(state)
+        try:
+            return self.router.db_for_read(Drone)
+        finally:
+            _state.reset(token)
+
+    def test_reads_stay_on_primary_by_default(self):
+        self.assertIsNone(self.routed_read())
+        self.assertIsNone(self.routed_read(RoutingState()))
+
+    def test_designated_reads_use_replica(self):
+        self.assertEqual(self.routed_read(RoutingState(replica=True)), self.replica)
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(Drone), self.replica)
+        self.assertIsNone(self.router.db_for_read(Drone))
+
+    def test_sticky_client_reads_primary(self):
+        self.assertIsNone(self.routed_read(RoutingState(sticky=True, replica=True)))
+
+    def test_reads_after_write_use_primary(self):
+        state = RoutingState(replica=True)
+        token = _state.set(state)
+        try:
+            self.assertEqual(self.router.db_for_read(Drone), self.replica)
+            self.assertEqual(self.router.db_for_write(Drone), 'default')
+            self.assertIsNone(self.router.db_for_read(Drone))
+        finally:
+            _state.reset(token)
+
+    def test_lagging_or_unknown_replica_falls_back_to_primary(self):
+        for lag in [6.0, math.inf, None]:
+            with self.subTest(lag=lag):
+                replica_lag.set_lag(self.replica, lag)
+                self.assertIsNone(self.routed_read(RoutingState(replica=True)))
+
+    def test_related_reads_follow_instance(self):
+        drone = Drone()
+        drone._state.db = 'default'
+        token = _state.set(RoutingState(replica=True))
+        try:
+            self.assertIsNone(self.router.db_for_read(Drone, instance=drone))
+        finally:
+            _state.reset(token)
+
+    def test_replicas_are_never_migrated(self):
+        self.assertFalse(self.router.allow_migrate(self.replica, 'authentication'))
+        self.assertIsNone(self.router.allow_migrate('default', 'authentication'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReadYourWritesTests(ReplicaTestMixin, TransactionTestCase):
+    """Un client qui vient d'écrire relit ses propres données sur le primaire"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email='pilote@anac.test', password='Anac-Test-2024!', username='pilote',
+            first_name='Pilote', last_name='Test'
+        )
+        UserProfile.objects.create(user=self.user)
+        self.client = Client()
+        self.client.cookies['access_token'] = JWTTokenManager.create_tokens_for_user(self.user)['access']
+
+    def test_reads_in_transaction_use_primary(self):
+        with transaction.atomic():
+            token = _state.set(RoutingState(replica=True))
+            try:
+                self.assertIsNone(ReplicaRouter().db_for_read(Drone))
+            finally:
+                _state.reset(token)
+
+    def test_create_then_list_reads_primary(self):
+        with mock.patch('authentication.routers.healthy_replica', return_value=None) as chosen:
+            response = self.client.get('/api/drones/')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(chosen.called)
+            self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+            response = self.client.post('/api/drones/', {
+                'name': 'Drone lu sur le primaire', 'model': 'Mavic 3', 'drone_type': 'quadcopter'
+            }, content_type='application/json')
+            self.assertEqual(response.status_code, 201)
+            self.assertIn(STICKY_COOKIE, response.cookies)
+
+            chosen.reset_mock()
+            response = self.client.get('/api/drones/')
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(chosen.called)
+            self.assertEqual([drone['name'] for drone in response.json()], ['Drone lu sur le primaire'])
+
+    def test_writes_without_replicas_set_no_cookie(self):
+        with self.settings(DATABASE_REPLICAS=[]):
+            response = self.client.post('/api/drones/', {
+                'name': 'Drone', 'model': 'Mavic 3', 'drone_type': 'quadcopter'
+            }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+
+@skipUnless('replica' in settings.DATABASES, 'réplica local non configuré (DB_REPLICA_NAME)')
+class LocalReplicaTests(ReplicaTestMixin, TransactionTestCase):
+    databases = '__all__'
+
+    def test_designated_queryset_reads_replica(self):
+        user = User.objects.create_user(
+            email='pilote@anac.test', password='Anac-Test-2024!', username='pilote',
+            first_name='Pilote', last_name='Test'
+        )
+        Drone.objects.create(user=user, name='Drone', model='Mavic 3', drone_type='quadcopter')
+
+        with read_from_replica():
+            drones = Drone.objects.filter(user=user)
+            self.assertEqual(drones.db, 'replica')
+            self.assertEqual(drones.count(), 1)
+        self.assertEqual(Drone.objects.filter(user=user).db, 'default')
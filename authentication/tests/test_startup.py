@@ -0,0 +1,53 @@
+"""
+Temps de démarrage (``authentication/startup.py``) : lecture de la sortie de
+``python -X importtime``, budgets de ``STARTUP_BUDGETS`` et modules à
+chargement différé non importés par les tâches planifiées.
+
+Les budgets sont multipliés par ``STARTUP_BUDGET_FACTOR`` (variable
+d'environnement, défaut : 2) pour les machines d'intégration plus lentes.
+"""
+
+import os
+
+from django.test import SimpleTestCase
+
+from authentication.startup import format_tree, over_budget, parse_importtime, profile
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     encodings.aliases
+import time:       300 |        420 |   encodings
+import time:        50 |         50 |   codecs
+import time:      1000 |       1470 | django
+import time:        80 |         80 | json
+"""
+
+
+class ImportTimeParserTests(SimpleTestCase):
+
+    def test_tree_follows_indentation(self):
+        roots = parse_importtime(IMPORTTIME_OUTPUT)
+        self.assertEqual([root.name for root in roots], ['django', 'json'])
+        django = roots[0]
+        self.assertEqual((django.self_us, django.cumulative_us), (1000, 1470))
+        self.assertEqual([child.name for child in django.children], ['encodings', 'codecs'])
+        self.assertEqual(django.children[0].children[0].name, 'encodings.aliases')
+
+    def test_tree_is_filtered_by_cumulative_time(self):
+        lines = format_tree(parse_importtime(IMPORTTIME_OUTPUT), min_ms=0.1)
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].endswith(' django'))
+        self.assertTrue(lines[2].endswith('    encodings.aliases'))
+
+
+class StartupBudgetTests(SimpleTestCase):
+    factor = float(os.environ.get('STARTUP_BUDGET_FACTOR', 2))
+
+    def test_asgi_application_within_budget(self):
+        result = profile('asgi', repeat=3)
+        self.assertFalse(over_budget(result, self.factor), result['timings_ms'])
+
+    def test_scheduled_command_stays_lazy(self):
+        result = profile('purge_upload_sessions', repeat=3)
+        self.assertEqual(result['eager_lazy_modules'], [])
+        self.assertFalse(over_budget(result, self.factor), result['timings_ms'])
@@ -0,0 +1,106 @@
+"""
+Stockage adressé par contenu et comptage des références (``storage``) :
+dédoublonnage, suppression du fichier et de ses déclinaisons à la dernière
+référence, fichiers antérieurs au comptage conservés.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from authentication.models import CarouselImage, StoredFile
+from authentication.storage import is_content_addressed, release
+
+
+def references(name):
+    return StoredFile.objects.filter(name=name).values_list('reference_count', flat=True).first()
+
+
+class ContentAddressedStorageTests(TestCase):
+
+    def setUp(self):
+        # Contenus factices : pas de déclinaisons
+        patcher = mock.patch('authentication.signals.schedule_derivatives')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def create(self, content, title='Image'):
+        return CarouselImage.objects.create(title=title, image=ContentFile(content, name='Vue.JPG'))
+
+    def test_name_is_the_content_hash(self):
+        name = default_storage.save('carousel/photo.JPG', ContentFile(b'contenu'))
+
+        self.assertEqual(name, f'carousel/{hashlib.sha256(b"contenu").hexdigest()}.jpg')
+        self.assertTrue(is_content_addressed(name))
+        self.assertFalse(is_content_addressed('carousel/photo.jpg'))
+        self.assertEqual(default_storage.save('carousel/copie.jpg', ContentFile(b'contenu')), name)
+        self.assertEqual(os.listdir(default_storage.path('carousel')), [os.path.basename(name)])
+
+    def test_identical_uploads_share_one_file(self):
+        first = self.create(b'meme contenu')
+        second = self.create(b'meme contenu')
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(references(first.image.name), 2)
+
+    def test_file_deleted_with_last_reference(self):
+        first = self.create(b'partage')
+        second = self.create(b'partage')
+        name = first.image.name
+        derivative = default_storage.save('derivatives/carousel/partage_320w.webp', ContentFile(b'webp'))
+        CarouselImage.objects.filter(pk=second.pk).update(image_variants={'variants': [{'name': derivative}]})
+        second.refresh_from_db()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(references(name), 1)
+        self.assertTrue(default_storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertIsNone(references(name))
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(default_storage.exists(derivative))
+
+    def test_replaced_image_is_released(self):
+        image = self.create(b'ancienne')
+        old_name = image.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.image = ContentFile(b'nouvelle', name='nouvelle.jpg')
+            image.save()
+
+        self.assertIsNone(references(old_name))
+        self.assertFalse(default_storage.exists(old_name))
+        self.assertEqual(references(image.image.name), 1)
+
+    def test_file_stored_again_before_commit_is_kept(self):
+        image = self.create(b'revenant')
+        name = image.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.delete()
+            self.create(b'revenant')
+
+        self.assertEqual(references(name), 1)
+        self.assertTrue(default_storage.exists(name))
+
+    def test_uncounted_files_are_never_deleted(self):
+        name = default_storage.save('carousel/ancien.jpg', ContentFile(b'avant le comptage'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            release(name)
+
+        self.assertTrue(default_storage.exists(name))
+        self.assertFalse(StoredFile.objects.exists())
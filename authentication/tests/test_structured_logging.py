@@ -0,0 +1,112 @@
+"""
+Journalisation structurée (``authentication/structured_logging.py``) :
+format JSON, données de requête tronquées et masquées, échantillonnage et
+écriture par un thread d'arrière-plan.
+"""
+
+import json
+import logging
+import os
+import queue
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from django.utils.log import configure_logging as django_configure_logging
+
+from authentication.metrics import registry
+from authentication.structured_logging import (
+    JSONFormatter, NonBlockingQueueHandler, Payload, SamplingFilter, configure_logging
+)
+
+
+def make_record(level=logging.INFO, name='authentication.views', msg='message %s', args=('valeur',), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class PayloadTests(SimpleTestCase):
+
+    @override_settings(LOG_PAYLOAD_MAX_CHARS=40)
+    def test_payload_is_masked_and_truncated(self):
+        text = str(Payload({'password': 'secret', 'name': 'x' * 100}))
+        self.assertIn('"password": "***"', text)
+        self.assertNotIn('secret', text)
+        self.assertTrue(text.endswith('caractères)'))
+        self.assertLess(len(text), 80)
+
+    def test_payload_is_formatted_lazily(self):
+        class Data(dict):
+            formatted = 0
+
+            def items(self):
+                Data.formatted += 1
+                return super().items()
+
+        logger = logging.getLogger('authentication.tests.lazy')
+        logger.setLevel(logging.WARNING)
+        logger.info("Données: %s", Payload(Data(name='Drone')))
+        self.assertEqual(Data.formatted, 0)
+
+
+class JSONFormatterTests(SimpleTestCase):
+
+    def test_record_is_one_json_object(self):
+        entry = json.loads(JSONFormatter().format(make_record(drone_id=12)))
+        self.assertEqual(entry['message'], 'message valeur')
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['logger'], 'authentication.views')
+        self.assertEqual(entry['drone_id'], 12)
+
+
+class SamplingFilterTests(SimpleTestCase):
+
+    def test_rates_apply_below_error(self):
+        sampling = SamplingFilter({'authentication': 0})
+        self.assertFalse(sampling.filter(make_record(level=logging.WARNING)))
+        self.assertTrue(sampling.filter(make_record(level=logging.ERROR)))
+        self.assertTrue(sampling.filter(make_record(name='django.request')))
+
+    def test_call_rate_overrides_logger_rate(self):
+        sampling = SamplingFilter({'authentication': 0})
+        record = make_record(sample_rate=1)
+        self.assertTrue(sampling.filter(record))
+
+
+class QueuePipelineTests(SimpleTestCase):
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        registry.reset()
+        handler = NonBlockingQueueHandler(queue.Queue(1))
+        handler.handle(make_record())
+        handler.handle(make_record())
+        self.assertIn('log_records_dropped_total 1', registry.render())
+
+    def test_configured_handlers_write_from_background_thread(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        path = os.path.join(directory, 'anac.log')
+        logger = logging.getLogger('authentication.tests.pipeline')
+        self.addCleanup(logger.handlers.clear)
+        # configure_logging remplace la configuration du processus
+        self.addCleanup(django_configure_logging, settings.LOGGING_CONFIG, settings.LOGGING)
+
+        configure_logging({
+            'version': 1,
+            'disable_existing_loggers': False,
+            'formatters': {'json': {'()': 'authentication.structured_logging.JSONFormatter'}},
+            'handlers': {'file': {'class': 'logging.FileHandler', 'filename': path, 'formatter': 'json'}},
+            'loggers': {'authentication.tests.pipeline': {'handlers': ['file'], 'level': 'INFO', 'propagate': False}},
+            'queue': {'handlers': ['file']},
+        })
+        self.assertIsInstance(logger.handlers[0], NonBlockingQueueHandler)
+
+        logger.info("Vol créé avec succès: %s", 42)
+        # Arrêt du thread d'écriture : la file est vidée
+        listener = logger.handlers[0].listener
+        listener.stop()
+        self.addCleanup(listener.handlers[0].close)
+        with open(path) as log_file:
+            self.assertEqual(json.loads(log_file.readline())['message'], 'Vol créé avec succès: 42')
@@ -0,0 +1,170 @@
+"""
+Téléversement reprenable par morceaux (``uploads``) : reprise après
+interruption, plages hors séquence, empreinte des morceaux, finalisation
+et purge des sessions abandonnées.
+"""
+
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from authentication.jwt_utils import JWTTokenManager
+from authentication.models import Drone, UploadSession, User
+from authentication.uploads import UploadError, composite_checksum, part_path, receive_chunk
+
+CHUNK = 4096
+
+
+def noisy_png():
+    """PNG peu compressible de plusieurs morceaux"""
+    pixels = np.random.default_rng(5).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@override_settings(IMAGE_DERIVATIVE_WORKERS=0)
+class ChunkedUploadTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='envois@anac.test', username='envois', password='x', first_name='E', last_name='E'
+        )
+        cls.drone = Drone.objects.create(user=cls.owner, name='Photo', model='M3', drone_type='quadcopter')
+        cls.data = noisy_png()
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.client.cookies['access_token'] = JWTTokenManager.create_tokens_for_user(self.owner)['access']
+
+    def start(self, total_size=None):
+        response = self.client.post(reverse('authentication:start_chunked_upload'), {
+            'target': 'drone_photo', 'object_id': str(self.drone.pk), 'filename': 'photo.png',
+            'content_type': 'image/png', 'total_size': total_size or len(self.data),
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        return reverse('authentication:chunked_upload', args=[response.json()['upload']['id']])
+
+    def put(self, path, start, end, body=None, **headers):
+        body = self.data[start:end + 1] if body is None else body
+        headers.setdefault('HTTP_CONTENT_RANGE', f'bytes {start}-{end}/{len(self.data)}')
+        return self.client.put(path, body, content_type='application/octet-stream', **headers)
+
+    def send_from(self, path, offset):
+        response = None
+        while offset < len(self.data):
+            end = min(offset + CHUNK, len(self.data)) - 1
+            response = self.put(path, offset, end)
+            self.assertEqual(response.status_code, 200)
+            offset = end + 1
+        return response
+
+    def test_upload_in_chunks(self):
+        path = self.start()
+        response = self.send_from(path, 0)
+
+        upload = response.json()['upload']
+        self.assertEqual(upload['status'], 'complete')
+        session = UploadSession.objects.get()
+        self.assertEqual(len(session.chunk_digests), -(-len(self.data) // CHUNK))
+        self.assertEqual(upload['checksum'], composite_checksum(session.chunk_digests))
+
+        self.drone.refresh_from_db()
+        with self.drone.photo.open('rb') as photo:
+            self.assertEqual(photo.read(), self.data)
+        self.assertEqual(self.drone.photo.name, f'drones/{hashlib.sha256(self.data).hexdigest()}.png')
+
+    def test_resume_after_interruption(self):
+        path = self.start()
+        self.put(path, 0, CHUNK - 1)
+        # Connexion coupée : le flux s'arrête avant la fin de la plage annoncée
+        with self.assertRaisesMessage(UploadError, 'incomplet'):
+            receive_chunk(
+                UploadSession.objects.get(), io.BytesIO(self.data[CHUNK:CHUNK + 100]), CHUNK,
+                f'bytes {CHUNK}-{2 * CHUNK - 1}/{len(self.data)}'
+            )
+
+        state = self.client.get(path).json()['upload']
+        self.assertEqual(state['received_bytes'], CHUNK)
+        self.assertEqual(os.path.getsize(part_path(UploadSession.objects.get())), CHUNK)
+
+        self.assertEqual(self.send_from(path, state['received_bytes']).json()['upload']['status'], 'complete')
+
+    def test_out_of_order_ranges(self):
+        path = self.start()
+        ahead = self.put(path, CHUNK, 2 * CHUNK - 1)
+        self.assertEqual(ahead.status_code, 409)
+        self.assertEqual(ahead.json()['received_bytes'], 0)
+
+        self.put(path, 0, CHUNK - 1)
+        repeated = self.put(path, 0, CHUNK - 1)
+        self.assertEqual(repeated.status_code, 409)
+        self.assertEqual(repeated.json()['received_bytes'], CHUNK)
+
+        beyond = self.client.put(
+            path, b'x', content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {len(self.data)}-{len(self.data)}/{len(self.data)}'
+        )
+        self.assertEqual(beyond.status_code, 416)
+        self.assertEqual(self.put(path, CHUNK, CHUNK + 9, HTTP_CONTENT_RANGE='octets 1-2/3').status_code, 400)
+        self.assertEqual(UploadSession.objects.get().received_bytes, CHUNK)
+
+    def test_digest_mismatch(self):
+        path = self.start()
+        chunk = self.data[:CHUNK]
+
+        wrong = self.put(path, 0, CHUNK - 1, HTTP_X_CHUNK_SHA256='0' * 64)
+        self.assertEqual(wrong.status_code, 400)
+        self.assertEqual(UploadSession.objects.get().received_bytes, 0)
+        self.assertEqual(os.path.getsize(part_path(UploadSession.objects.get())), 0)
+
+        right = self.put(path, 0, CHUNK - 1, HTTP_X_CHUNK_SHA256=hashlib.sha256(chunk).hexdigest().upper())
+        self.assertEqual(right.status_code, 200)
+
+    def test_wrong_signature(self):
+        path = self.start()
+        response = self.put(path, 0, 99, body=b'GIF89a' + bytes(94))
+        self.assertEqual(response.status_code, 415)
+
+    def test_abort(self):
+        path = self.start()
+        self.put(path, 0, CHUNK - 1)
+        partial = part_path(UploadSession.objects.get())
+
+        response = self.client.delete(path)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.content, b'')
+        self.assertFalse(os.path.exists(partial))
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_purge(self):
+        stale_path = self.start()
+        self.put(stale_path, 0, CHUNK - 1)
+        self.send_from(self.start(), 0)
+        stale = UploadSession.objects.get(status='pending')
+        UploadSession.objects.update(updated_at=timezone.now() - timedelta(hours=30))
+        self.start()
+
+        out = StringIO()
+        call_command('purge_upload_sessions', stdout=out)
+
+        self.assertIn('1 téléversement(s) abandonné(s) supprimé(s), 1 session(s) terminée(s)', out.getvalue())
+        remaining = UploadSession.objects.get()
+        self.assertEqual((remaining.status, remaining.received_bytes), ('pending', 0))
+        self.assertFalse(os.path.exists(part_path(stale)))
@@ -0,0 +1,305 @@
+"""
+Téléversement reprenable, par morceaux, des images volumineuses.
+
+Le client ouvre une session (cible, objet, nom, type et taille du fichier),
+puis envoie le fichier en morceaux successifs (``PUT`` avec l'en-tête
+``Content-Range: bytes <début>-<fin>/<total>``). Chaque morceau est lu par
+blocs depuis le flux de la requête et écrit directement dans un fichier
+partiel placé à côté de son emplacement final : il n'est ni mis en mémoire
+ni recopié depuis un fichier temporaire. L'empreinte SHA-256 de chaque morceau
+est calculée au fil de l'eau ; l'empreinte du fichier est celle de la
+concaténation des empreintes des morceaux (suffixée du nombre de morceaux).
+
+Les limites de taille et de type sont vérifiées sur les en-têtes avant toute
+lecture du corps, et la signature du fichier est contrôlée dès le premier bloc.
+Un envoi interrompu reprend à ``received_bytes``.
+"""
+
+import hashlib
+import logging
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import UploadSession
+
+logger = logging.getLogger(__name__)
+
+# Cibles prises en charge : cible -> (modèle, champ image)
+UPLOAD_TARGETS = {
+    'drone_photo': ('authentication.Drone', 'photo'),
+    'carousel_image': ('authentication.CarouselImage', 'image'),
+}
+
+# Signatures (octets initiaux) des types de contenu acceptés
+IMAGE_SIGNATURES = {
+    'image/jpeg': (b'\xff\xd8\xff',),
+    'image/png': (b'\x89PNG\r\n\x1a\n',),
+    'image/gif': (b'GIF87a', b'GIF89a'),
+    'image/webp': (b'RIFF',),
+}
+
+# Taille des blocs lus depuis le flux de la requête
+READ_BLOCK_SIZE = 64 * 1024
+
+PART_SUFFIX = '.part'
+
+
+class UploadError(Exception):
+    """Erreur de téléversement, avec le code HTTP à renvoyer"""
+
+    def __init__(self, message, status_code=400, **extra):
+        super().__init__(message)
+        self.status_code = status_code
+        self.extra = extra
+
+
+def max_upload_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', 50 * 1024 * 1024)
+
+
+def max_chunk_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024)
+
+
+def allowed_content_types():
+    return getattr(settings, 'CHUNKED_UPLOAD_CONTENT_TYPES', list(IMAGE_SIGNATURES))
+
+
+def part_path(session, storage=None):
+    """Chemin du fichier partiel ; le stockage doit être un système de fichiers local"""
+    storage = storage or default_storage
+    return f'{storage.path(session.storage_name)}.{session.pk.hex}{PART_SUFFIX}'
+
+
+def get_target_object(user, target, object_id):
+    """
+    Objet dont le champ image recevra le fichier, après contrôle des droits
+    (propriétaire du drone, personnel pour le carrousel)
+    """
+    if target not in UPLOAD_TARGETS:
+        raise UploadError(f"Cible invalide (valeurs possibles: {', '.join(UPLOAD_TARGETS)})")
+
+    model_label, field_name = UPLOAD_TARGETS[target]
+    model = apps.get_model(model_label)
+    queryset = model.objects.all()
+    if target == 'drone_photo':
+        queryset = queryset.filter(user=user)
+    elif not user.is_staff:
+        raise UploadError('Accès non autorisé', status_code=403)
+
+    instance = queryset.filter(pk=object_id).first()
+    if instance is None:
+        raise UploadError('Objet cible non trouvé', status_code=404)
+    return instance, field_name
+
+
+def start_upload(user, target, object_id, filename, content_type, total_size, storage=None):
+    """
+    Ouvrir une session de téléversement et réserver l'emplacement du fichier final
+    """
+    storage = storage or default_storage
+
+    if content_type not in allowed_content_types():
+        raise UploadError(f"Type de contenu non autorisé: {content_type}", status_code=415)
+    if total_size <= 0:
+        raise UploadError('La taille du fichier doit être positive')
+    if total_size > max_upload_size():
+        raise UploadError(
+            f"Le fichier dépasse la taille maximale de {max_upload_size()} octets", status_code=413
+        )
+
+    instance, field_name = get_target_object(user, target, object_id)
+    field = instance._meta.get_field(field_name)
+    storage_name = storage.get_available_name(field.generate_filename(instance, filename))
+
+    session = UploadSession.objects.create(
+        user=user,
+        target=target,
+        object_id=instance.pk,
+        filename=os.path.basename(filename),
+        content_type=content_type,
+        total_size=total_size,
+        storage_name=storage_name,
+    )
+
+    path = part_path(session, storage)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    return session
+
+
+def parse_content_range(header):
+    """
+    Lire ``bytes <début>-<fin>/<total>`` et retourner (début, fin, total)
+    """
+    try:
+        unit, _, value = (header or '').strip().partition(' ')
+        byte_range, _, total = value.partition('/')
+        start, _, end = byte_range.partition('-')
+        start, end, total = int(start), int(end), int(total)
+    except ValueError:
+        raise UploadError("En-tête Content-Range invalide (attendu: bytes <début>-<fin>/<total>)")
+    if unit != 'bytes' or start < 0 or end < start:
+        raise UploadError("En-tête Content-Range invalide (attendu: bytes <début>-<fin>/<total>)")
+    return start, end, total
+
+
+def _check_signature(content_type, head):
+    signatures = IMAGE_SIGNATURES.get(content_type, ())
+    if not any(head.startswith(signature) for signature in signatures):
+        return False
+    if content_type == 'image/webp' and head[8:12] != b'WEBP':
+        return False
+    return True
+
+
+def receive_chunk(session, stream, content_length, content_range, expected_digest=None, storage=None):
+    """
+    Écrire un morceau à sa place dans le fichier partiel
+
+    Les en-têtes sont validés avant la lecture du corps ; un morceau incomplet
+    ou corrompu est retiré du fichier et l'offset de la session ne bouge pas.
+    La session est verrouillée (``select_for_update``) de la vérification de
+    l'offset jusqu'à son avancement : deux envois concurrents au même offset
+    sont traités l'un après l'autre, le second est refusé (409).
+    Retourne la session à jour (finalisée au dernier morceau).
+    """
+    start, end, total = parse_content_range(content_range)
+    length = end - start + 1
+
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+
+        if session.status != 'pending':
+            raise UploadError('Ce téléversement est terminé', status_code=409, received_bytes=session.received_bytes)
+        if total != session.total_size:
+            raise UploadError('La taille totale ne correspond pas à celle de la session')
+        if end >= session.total_size:
+            raise UploadError('Le morceau dépasse la fin du fichier', status_code=416)
+        if start != session.received_bytes:
+            raise UploadError(
+                'Le morceau ne commence pas à la position attendue',
+                status_code=409,
+                received_bytes=session.received_bytes
+            )
+        if content_length is None or content_length != length:
+            raise UploadError('Content-Length doit correspondre à la plage Content-Range')
+        if length > max_chunk_size():
+            raise UploadError(f"Un morceau ne peut pas dépasser {max_chunk_size()} octets", status_code=413)
+
+        chunk_digest = _write_chunk(session, stream, start, length, expected_digest, storage)
+
+        session.received_bytes = end + 1
+        session.chunk_digests = session.chunk_digests + [chunk_digest]
+        session.save(update_fields=['received_bytes', 'chunk_digests', 'updated_at'])
+
+    if session.received_bytes == session.total_size:
+        finalize_upload(session, storage)
+    return session
+
+
+def _write_chunk(session, stream, start, length, expected_digest=None, storage=None):
+    """Écrire le morceau depuis le flux à partir de ``start`` et retourner son empreinte"""
+    digest = hashlib.sha256()
+    remaining = length
+    with open(part_path(session, storage), 'r+b') as part:
+        part.seek(start)
+        # Retirer les octets d'un morceau précédent interrompu
+        part.truncate()
+        try:
+            while remaining:
+                block = stream.read(min(READ_BLOCK_SIZE, remaining))
+                if not block:
+                    raise UploadError('Corps de la requête incomplet')
+                if part.tell() == 0 and not _check_signature(session.content_type, block):
+                    raise UploadError(
+                        f"Le contenu du fichier ne correspond pas au type {session.content_type}",
+                        status_code=415
+                    )
+                digest.update(block)
+                part.write(block)
+                remaining -= len(block)
+
+            chunk_digest = digest.hexdigest()
+            if expected_digest and expected_digest.lower() != chunk_digest:
+                raise UploadError("L'empreinte SHA-256 du morceau ne correspond pas")
+
+            part.flush()
+            os.fsync(part.fileno())
+        except Exception:
+            part.seek(start)
+            part.truncate()
+            raise
+    return chunk_digest
+
+
+def composite_checksum(chunk_digests):
+    """Empreinte du fichier : SHA-256 des empreintes concaténées des morceaux"""
+    combined = hashlib.sha256(b''.join(bytes.fromhex(value) for value in chunk_digests))
+    return f'{combined.hexdigest()}-{len(chunk_digests)}'
+
+
+def finalize_upload(session, storage=None):
+    """
+    Valider l'image reçue, la renommer à son emplacement final et l'affecter
+    au champ de l'objet cible (ce qui déclenche la génération des déclinaisons)
+    """
+    from PIL import Image
+
+    storage = storage or default_storage
+    path = part_path(session, storage)
+
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Exception as e:
+        os.remove(path)
+        UploadSession.objects.filter(pk=session.pk).update(status='failed', updated_at=timezone.now())
+        session.refresh_from_db()
+        raise UploadError(f"Le fichier reçu n'est pas une image valide: {e}")
+
+    model_label, field_name = UPLOAD_TARGETS[session.target]
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=session.object_id).first()
+    if instance is None:
+        os.remove(path)
+        UploadSession.objects.filter(pk=session.pk).update(status='failed', updated_at=timezone.now())
+        session.refresh_from_db()
+        raise UploadError('Objet cible non trouvé', status_code=404)
+
+    if hasattr(storage, 'adopt'):
+        # Stockage adressé par contenu : renommage d'après l'empreinte (dédoublonnage)
+        storage_name = storage.adopt(path, session.storage_name)
+    else:
+        storage_name = session.storage_name
+        if storage.exists(storage_name):
+            storage_name = storage.get_available_name(storage_name)
+        os.replace(path, storage.path(storage_name))
+
+    setattr(instance, field_name, storage_name)
+    instance.save(update_fields=[field_name, 'updated_at'])
+
+    UploadSession.objects.filter(pk=session.pk).update(
+        status='complete',
+        storage_name=storage_name,
+        checksum=composite_checksum(session.chunk_digests),
+        updated_at=timezone.now()
+    )
+    session.refresh_from_db()
+    logger.info("Téléversement %s terminé: %s (%s octets)", session.pk, storage_name, session.total_size)
+    return session
+
+
+def abort_upload(session, storage=None):
+    """Abandonner un téléversement et supprimer son fichier partiel"""
+    if session.status == 'pending':
+        try:
+            os.remove(part_path(session, storage))
+        except FileNotFoundError:
+            pass
+    session.delete()
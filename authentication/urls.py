@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 app_name = 'authentication'
 
@@ -16,18 +16,27 @@ urlpatterns = [
     path('profile/', views.UserProfileView.as_view(), name='profile'),
     path('change-password/', views.ChangePasswordView.as_view(), name='change_password'),
     path('password-reset/', views.PasswordResetRequestView.as_view(), name='password_reset'),
-    path('check-auth/', views.check_auth_status, name='check_auth'),
+    path('check-auth/', async_views.check_auth_status, name='check_auth'),
     path('refresh-token/', views.refresh_token_view, name='refresh_token'),
     
-    # Carousel routes
+    # Carousel routes (liste publique asynchrone, avant les routes du routeur)
+    path('carousel/', async_views.carousel_list, name='carousel-list'),
     path('', include(router.urls)),
     
+    # Téléversements par morceaux (photos de drones, images de carrousel)
+    path('uploads/', views.start_chunked_upload, name='start_chunked_upload'),
+    path('uploads/<uuid:upload_id>/', views.chunked_upload, name='chunked_upload'),
+    
     # API pour la carte des aéroports
-    path('airports/map/', views.get_airports_for_map, name='get_airports_for_map'),
+    path('airports/map/', async_views.get_airports_for_map, name='get_airports_for_map'),
     path('airports/create/', views.create_airport, name='create_airport'),
     
     # API pour la carte des zones protégées
-    path('protected-areas/map/', views.get_protected_areas_for_map, name='get_protected_areas_for_map'),
+    path('protected-areas/map/', async_views.get_protected_areas_for_map, name='get_protected_areas_for_map'),
     path('protected-areas/reserves/create/', views.create_natural_reserve, name='create_natural_reserve'),
     path('protected-areas/parks/create/', views.create_national_park, name='create_national_park'),
+    
+    # Rapports nationaux des vols
+    path('reports/flights/', views.flight_report, name='flight_report'),
+    path('reports/flights/export/', views.flight_report_export, name='flight_report_export'),
 ]
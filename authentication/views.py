@@ -4,9 +4,12 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
+from django.conf import settings
 from django.contrib.auth import authenticate, login, logout
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import timedelta
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 import uuid
 from django.db import models
@@ -22,15 +25,22 @@ from .serializers import (
     UserDetailSerializer,
     ChangePasswordSerializer,
     PasswordResetRequestSerializer,
-    DroneSerializer, DroneCreateSerializer,
-    DroneFlightSerializer, DroneFlightCreateSerializer,
-    CarouselImageSerializer, CarouselImageListSerializer,
+    DroneSerializer, DroneListSerializer, DroneCreateSerializer, parse_fields_param,
+    DroneFlightSerializer, DroneFlightDetailSerializer, DroneFlightCreateSerializer,
+    CarouselImageSerializer, CarouselImageListSerializer, UploadSessionSerializer,
     AirportSerializer, AirportCreateSerializer,
     NaturalReserveSerializer, NaturalReserveCreateSerializer,
     NationalParkSerializer, NationalParkCreateSerializer
 )
-from .models import User, PasswordResetToken, Drone, DroneFlight, CarouselImage, Airport, NaturalReserve, NationalPark
+from .models import User, PasswordResetToken, Drone, DroneFlight, CarouselImage, Airport, NaturalReserve, NationalPark, UploadSession
 from .jwt_utils import JWTTokenManager, JWTCookieResponse
+from .snapshots import CAROUSEL_SNAPSHOT, build_carousel_snapshot, get_snapshot, snapshot_response
+from .metrics import (
+    PROMETHEUS_CONTENT_TYPE, collect_cache_metrics, collect_pool_metrics, collect_replica_metrics,
+    query_budget, registry
+)
+from .routers import replica_reads
+from .structured_logging import Payload
 
 class UserRegistrationView(generics.CreateAPIView):
     """
@@ -126,7 +136,7 @@ class UserLogoutView(generics.GenericAPIView):
                     token = RefreshToken(refresh_token)
                     token.blacklist()
                 except Exception as e:
-                    logger.warning(f"Impossible d'invalider le refresh token: {e}")
+                    logger.warning("Impossible d'invalider le refresh token: %s", e)
             
             # Créer la réponse
             response_data = {
@@ -142,7 +152,7 @@ class UserLogoutView(generics.GenericAPIView):
             return response
             
         except Exception as e:
-            logger.error(f"Erreur lors de la déconnexion: {e}")
+            logger.error("Erreur lors de la déconnexion: %s", e)
             return Response({
                 'message': 'Erreur lors de la déconnexion',
                 'error': str(e),
@@ -158,7 +168,10 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
+        if self.request.method in permissions.SAFE_METHODS:
+            return self.request.user
+        # Utilisateur du cache en lecture seule : relu en base avant modification
+        return User.objects.select_related('profile').get(pk=self.request.user.pk)
 
 
 class ChangePasswordView(generics.GenericAPIView):
@@ -171,7 +184,8 @@ class ChangePasswordView(generics.GenericAPIView):
     def post(self, request):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            user = request.user
+            # Utilisateur du cache en lecture seule : relu en base avant modification
+            user = User.objects.get(pk=request.user.pk)
             
             # Vérifier l'ancien mot de passe
             if not user.check_password(serializer.validated_data['old_password']):
@@ -247,19 +261,6 @@ class PasswordResetRequestView(generics.GenericAPIView):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
-@api_view(['GET'])
-@permission_classes([permissions.IsAuthenticated])
-def check_auth_status(request):
-    """
-    Vérifier le statut d'authentification de l'utilisateur
-    """
-    return Response({
-        'is_authenticated': True,
-        'user': UserDetailSerializer(request.user).data,
-        'success': True
-    }, status=status.HTTP_200_OK)
-
-
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def refresh_token_view(request):
@@ -301,7 +302,7 @@ def refresh_token_view(request):
         return response
         
     except Exception as e:
-        logger.error(f"Erreur lors du rafraîchissement du token: {e}")
+        logger.error("Erreur lors du rafraîchissement du token: %s", e)
         return Response({
             'message': 'Token de rafraîchissement invalide',
             'error': str(e),
@@ -318,45 +319,59 @@ class DroneViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Return only the drones of the connected user"""
         try:
-            return Drone.objects.filter(user=self.request.user)
+            queryset = Drone.objects.filter(user=self.request.user).with_maintenance_status()
+            # Le propriétaire (et son profil) n'est sérialisé qu'en détail
+            if self.action not in ['list', 'maintenance_due']:
+                queryset = queryset.select_related('user__profile')
+            return queryset
         except Exception as e:
-            logger.error(f"Erreur lors de la récupération des drones: {e}")
+            logger.error("Erreur lors de la récupération des drones: %s", e)
             return Drone.objects.none()
     
     def get_serializer_class(self):
         """Utilise le bon sérialiseur selon l'action"""
         if self.action in ['create', 'update', 'partial_update']:
             return DroneCreateSerializer
+        if self.action in ['list', 'maintenance_due']:
+            return DroneListSerializer
         return DroneSerializer
     
+    def get_serializer_context(self):
+        """Ajoute la sélection de champs ?fields=id,name,status"""
+        context = super().get_serializer_context()
+        context['fields'] = parse_fields_param(self.request.query_params.get('fields'))
+        return context
+    
     def create(self, request, *args, **kwargs):
         """Create a new drone with error handling"""
         try:
-            logger.info(f"Tentative de création de drone avec les données: {request.data}")
+            logger.info("Tentative de création de drone avec les données: %s", Payload(request.data))
             
             serializer = self.get_serializer(data=request.data)
             if serializer.is_valid():
                 drone = serializer.save(user=request.user)
-                logger.info(f"Drone créé avec succès: {drone.id}")
+                logger.info("Drone créé avec succès: %s", drone.id)
                 
                 return Response(
                     serializer.data, 
                     status=status.HTTP_201_CREATED
                 )
             else:
-                logger.error(f"Erreurs de validation: {serializer.errors}")
+                logger.error("Erreurs de validation: %s", Payload(serializer.errors))
                 return Response(
                     {'error': 'Données invalides', 'details': serializer.errors}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
                 
         except Exception as e:
-            logger.error(f"Erreur inattendue lors de la création du drone: {e}")
+            logger.error("Erreur inattendue lors de la création du drone: %s", e)
             return Response(
                 {'error': 'Erreur interne du serveur'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @replica_reads
+    @query_budget(2)
     def list(self, request, *args, **kwargs):
         """List drones with error handling"""
         try:
@@ -364,7 +379,7 @@ class DroneViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(queryset, many=True)
             return Response(serializer.data)
         except Exception as e:
-            logger.error(f"Erreur lors de la récupération de la liste des drones: {e}")
+            logger.error("Erreur lors de la récupération de la liste des drones: %s", e)
             return Response(
                 {'error': 'Erreur lors de la récupération des drones'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -374,10 +389,58 @@ class DroneViewSet(viewsets.ModelViewSet):
         """Assign automatically the connected user as owner"""
         serializer.save(user=self.request.user)
     
+    # Nombre maximal de drones modifiables en une requête groupée
+    MAX_BULK_IDS = 500
+    
+    def _conditional_update(self, ids, exclude, **values):
+        """
+        Exécuter un seul UPDATE ... WHERE id IN (...) AND user_id=... sur les
+        lignes qui changent réellement, et retourner le nombre de lignes modifiées
+        """
+        values['updated_at'] = timezone.now()
+        return Drone.objects.filter(
+            id__in=ids, user=self.request.user
+        ).exclude(**exclude).update(**values)
+    
+    def _parse_ids(self, raw_ids):
+        """Valider une liste d'identifiants de drones"""
+        if not isinstance(raw_ids, list) or not raw_ids:
+            raise ValueError('Liste d\'identifiants requise')
+        if len(raw_ids) > self.MAX_BULK_IDS:
+            raise ValueError(f'{self.MAX_BULK_IDS} drones maximum par requête')
+        try:
+            return {uuid.UUID(str(value)) for value in raw_ids}
+        except ValueError:
+            raise ValueError('Identifiant de drone invalide')
+    
+    def _parse_maintenance_date(self, value):
+        """Valider la date de maintenance (YYYY-MM-DD)"""
+        if not value:
+            raise ValueError('Date de maintenance requise')
+        try:
+            maintenance_date = parse_date(str(value))
+        except ValueError:
+            maintenance_date = None
+        if maintenance_date is None:
+            raise ValueError('Le format de date doit être YYYY-MM-DD')
+        return maintenance_date
+    
+    def _single_update_response(self, pk, changed, message):
+        """Réponse d'une transition unitaire : 404 si le drone n'appartient pas à l'utilisateur"""
+        if not changed and not Drone.objects.filter(id=pk, user=self.request.user).exists():
+            return Response(
+                {'error': 'Drone non trouvé'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({
+            'message': message,
+            'updated': changed,
+            'status': 'success'
+        })
+    
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
         """Mettre à jour le statut d'un drone"""
-        drone = self.get_object()
         new_status = request.data.get('status')
         
         if new_status not in dict(Drone.STATUS_CHOICES):
@@ -386,33 +449,132 @@ class DroneViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        drone.status = new_status
-        drone.save()
+        try:
+            drone_id = uuid.UUID(str(pk))
+        except ValueError:
+            return Response({'error': 'Drone non trouvé'}, status=status.HTTP_404_NOT_FOUND)
         
-        return Response({
-            'message': f'Statut du drone {drone.name} mis à jour vers {new_status}',
-            'status': 'success'
-        })
+        changed = self._conditional_update([drone_id], {'status': new_status}, status=new_status)
+        return self._single_update_response(
+            drone_id, changed, f'Statut du drone mis à jour vers {new_status}'
+        )
     
     @action(detail=True, methods=['post'])
     def schedule_maintenance(self, request, pk=None):
         """Programmer une maintenance pour un drone"""
-        drone = self.get_object()
-        maintenance_date = request.data.get('maintenance_date')
+        try:
+            maintenance_date = self._parse_maintenance_date(request.data.get('maintenance_date'))
+        except ValueError as e:
+            return Response(
+                {'error': str(e)}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        if not maintenance_date:
+        try:
+            drone_id = uuid.UUID(str(pk))
+        except ValueError:
+            return Response({'error': 'Drone non trouvé'}, status=status.HTTP_404_NOT_FOUND)
+        
+        changed = self._conditional_update(
+            [drone_id], {'next_maintenance': maintenance_date}, next_maintenance=maintenance_date
+        )
+        return self._single_update_response(
+            drone_id, changed, f'Maintenance programmée le {maintenance_date}'
+        )
+    
+    @action(detail=False, methods=['post'])
+    def bulk_update_status(self, request):
+        """Mettre à jour le statut de plusieurs drones en une seule requête SQL"""
+        new_status = request.data.get('status')
+        if new_status not in dict(Drone.STATUS_CHOICES):
             return Response(
-                {'error': 'Date de maintenance requise'}, 
+                {'error': 'Statut invalide'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        drone.next_maintenance = maintenance_date
-        drone.save()
+        try:
+            ids = self._parse_ids(request.data.get('ids'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
+        changed = self._conditional_update(ids, {'status': new_status}, status=new_status)
         return Response({
-            'message': f'Maintenance programmée pour {drone.name} le {maintenance_date}',
+            'message': f'{changed} drone(s) mis à jour vers {new_status}',
+            'requested': len(ids),
+            'updated': changed,
             'status': 'success'
         })
+    
+    @action(detail=False, methods=['post'])
+    def bulk_schedule_maintenance(self, request):
+        """Programmer une maintenance pour plusieurs drones en une seule requête SQL"""
+        try:
+            ids = self._parse_ids(request.data.get('ids'))
+            maintenance_date = self._parse_maintenance_date(request.data.get('maintenance_date'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        changed = self._conditional_update(
+            ids, {'next_maintenance': maintenance_date}, next_maintenance=maintenance_date
+        )
+        return Response({
+            'message': f'Maintenance programmée le {maintenance_date} pour {changed} drone(s)',
+            'requested': len(ids),
+            'updated': changed,
+            'status': 'success'
+        })
+    
+    @replica_reads
+    @query_budget(2)
+    @action(detail=False, methods=['get'])
+    def maintenance_due(self, request):
+        """Lister les drones de l'utilisateur dont la maintenance est due"""
+        try:
+            queryset = self.get_queryset().filter(is_maintenance_due=True)
+            serializer = self.get_serializer(queryset, many=True)
+            return Response({
+                'drones': serializer.data,
+                'count': len(serializer.data),
+                'status': 'success'
+            })
+        except Exception as e:
+            logger.error("Erreur lors de la récupération des maintenances dues: %s", e)
+            return Response(
+                {'error': 'Erreur lors de la récupération des maintenances dues'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+# Champs autorisés pour le tri des vols via ?ordering=
+FLIGHT_ORDERING_FIELDS = [
+    'flight_date', 'duration', 'distance_flown', 'max_altitude',
+    'max_distance_from_home', 'restricted_zone_time'
+]
+
+
+def flight_queryset(user, ordering=None, with_track=False):
+    """
+    Vols des drones de ``user`` (vues synchrones et asynchrones)
+    """
+    # Drones sérialisés avec leur propriétaire et leur statut de maintenance :
+    # une requête pour tous les drones de la page au lieu de plusieurs par vol
+    queryset = DroneFlight.objects.filter(
+        drone__user=user
+    ).select_related('pilot__profile').prefetch_related(
+        models.Prefetch(
+            'drone',
+            queryset=Drone.objects.with_maintenance_status().select_related('user__profile')
+        )
+    )
+    
+    # Les listes n'ont pas besoin de relire les traces GPS
+    if not with_track:
+        queryset = queryset.defer('track')
+    
+    if ordering and ordering.lstrip('-') in FLIGHT_ORDERING_FIELDS:
+        queryset = queryset.order_by(ordering)
+    
+    return queryset
 
 
 class DroneFlightViewSet(viewsets.ModelViewSet):
@@ -424,23 +586,27 @@ class DroneFlightViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Retourne les vols des drones de l'utilisateur connecté"""
         try:
-            return DroneFlight.objects.filter(
-                drone__user=self.request.user
-            ).select_related('drone', 'pilot')
+            return flight_queryset(
+                self.request.user,
+                ordering=self.request.query_params.get('ordering'),
+                with_track=self.action == 'retrieve'
+            )
         except Exception as e:
-            logger.error(f"Erreur lors de la récupération des vols: {e}")
+            logger.error("Erreur lors de la récupération des vols: %s", e)
             return DroneFlight.objects.none()
     
     def get_serializer_class(self):
         """Utilise le bon sérialiseur selon l'action"""
         if self.action in ['create', 'update', 'partial_update']:
             return DroneFlightCreateSerializer
+        if self.action == 'retrieve':
+            return DroneFlightDetailSerializer
         return DroneFlightSerializer
     
     def create(self, request, *args, **kwargs):
         """Créer un nouveau vol avec gestion d'erreurs améliorée"""
         try:
-            logger.info(f"Tentative de création de vol avec les données: {request.data}")
+            logger.info("Tentative de création de vol avec les données: %s", Payload(request.data))
             
             serializer = self.get_serializer(data=request.data)
             if serializer.is_valid():
@@ -455,7 +621,7 @@ class DroneFlightViewSet(viewsets.ModelViewSet):
                 try:
                     drone = get_object_or_404(Drone, id=drone_id.id, user=request.user)
                 except Exception as e:
-                    logger.error(f"Erreur lors de la récupération du drone {drone_id.id}: {e}")
+                    logger.error("Erreur lors de la récupération du drone %s: %s", drone_id.id, e)
                     return Response(
                         {'error': 'Drone non trouvé ou non autorisé'}, 
                         status=status.HTTP_404_NOT_FOUND
@@ -463,26 +629,28 @@ class DroneFlightViewSet(viewsets.ModelViewSet):
                 
                 # create the flight
                 flight = serializer.save(pilot=request.user)
-                logger.info(f"Vol créé avec succès: {flight.id}")
+                logger.info("Vol créé avec succès: %s", flight.id)
                 
                 return Response(
                     serializer.data, 
                     status=status.HTTP_201_CREATED
                 )
             else:
-                logger.error(f"Erreurs de validation: {serializer.errors}")
+                logger.error("Erreurs de validation: %s", Payload(serializer.errors))
                 return Response(
                     {'error': 'Données invalides', 'details': serializer.errors}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
                 
         except Exception as e:
-            logger.error(f"Erreur inattendue lors de la création du vol: {e}")
+            logger.error("Erreur inattendue lors de la création du vol: %s", e)
             return Response(
                 {'error': 'Erreur interne du serveur'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @replica_reads
+    @query_budget(3)
     def list(self, request, *args, **kwargs):
         """List flights with error handling"""
         try:
@@ -490,44 +658,60 @@ class DroneFlightViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(queryset, many=True)
             return Response(serializer.data)
         except Exception as e:
-            logger.error(f"Erreur lors de la récupération de la liste des vols: {e}")
+            logger.error("Erreur lors de la récupération de la liste des vols: %s", e)
             return Response(
                 {'error': 'Erreur lors de la récupération des vols'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @replica_reads
+    @query_budget(2)
     @action(detail=False, methods=['get'])
     def drone_stats(self, request):
         """Get the statistics of flights by drone"""
         try:
-            user_drones = Drone.objects.filter(user=request.user)
-            stats = []
+            # Une seule requête agrégée sur les métriques précalculées des vols
+            user_drones = Drone.objects.filter(user=request.user).annotate(
+                total_flights=models.Count('flights'),
+                total_duration=models.Sum('flights__duration'),
+                last_flight=models.Max('flights__flight_date'),
+                total_distance=models.Sum('flights__distance_flown'),
+                highest_altitude=models.Max('flights__max_altitude'),
+                farthest_from_home=models.Max('flights__max_distance_from_home'),
+                total_restricted_zone_time=models.Sum('flights__restricted_zone_time'),
+            )
             
-            for drone in user_drones:
-                flights = DroneFlight.objects.filter(drone=drone)
-                total_flights = flights.count()
-                total_duration = flights.aggregate(
-                    total=models.Sum('duration')
-                )['total'] or 0
-                
-                stats.append({
-                    'drone_name': drone.name,
-                    'total_flights': total_flights,
-                    'total_duration': total_duration,
-                    'last_flight': flights.order_by('-flight_date').first().flight_date if flights.exists() else None
-                })
+            stats = [
+                {
+                    'drone_name': drone['name'],
+                    'total_flights': drone['total_flights'],
+                    'total_duration': drone['total_duration'] or 0,
+                    'last_flight': drone['last_flight'],
+                    'total_distance': drone['total_distance'] or 0,
+                    'max_altitude': drone['highest_altitude'],
+                    'max_distance_from_home': drone['farthest_from_home'],
+                    'restricted_zone_time': drone['total_restricted_zone_time'] or 0,
+                }
+                for drone in user_drones.values(
+                    'name', 'total_flights', 'total_duration', 'last_flight',
+                    'total_distance', 'highest_altitude', 'farthest_from_home',
+                    'total_restricted_zone_time'
+                )
+            ]
             
             return Response({
                 'stats': stats,
                 'status': 'success'
             })
         except Exception as e:
-            logger.error(f"Erreur lors de la récupération des statistiques: {e}")
+            logger.error("Erreur lors de la récupération des statistiques: %s", e)
             return Response(
                 {'error': 'Erreur lors de la récupération des statistiques'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @replica_reads
+    @query_budget(3)
     @action(detail=False, methods=['get'])
     def recent_flights(self, request):
         """Get recent flights"""
@@ -540,7 +724,7 @@ class DroneFlightViewSet(viewsets.ModelViewSet):
                 'status': 'success'
             })
         except Exception as e:
-            logger.error(f"Erreur lors de la récupération des vols récents: {e}")
+            logger.error("Erreur lors de la récupération des vols récents: %s", e)
             return Response(
                 {'error': 'Erreur lors de la récupération des vols récents'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -560,18 +744,14 @@ class CarouselImageViewSet(viewsets.ModelViewSet):
             return CarouselImageListSerializer
         return CarouselImageSerializer
     
+    @query_budget(2)
     def list(self, request, *args, **kwargs):
-        """Liste publique des images de carrousel actives"""
+        """Liste publique des images de carrousel actives (instantané pré-encodé + ETag)"""
         try:
-            queryset = self.filter_queryset(self.get_queryset())
-            serializer = self.get_serializer(queryset, many=True)
-            return Response({
-                'images': serializer.data,
-                'count': queryset.count(),
-                'status': 'success'
-            })
+            snapshot = get_snapshot(CAROUSEL_SNAPSHOT, build_carousel_snapshot)
+            return snapshot_response(request, snapshot)
         except Exception as e:
-            logger.error(f"Erreur lors de la récupération des images de carrousel: {e}")
+            logger.error("Erreur lors de la récupération des images de carrousel: %s", e)
             return Response(
                 {'error': 'Erreur lors de la récupération des images'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -619,45 +799,90 @@ class CarouselImageViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def get_airports_for_map(request):
+def _upload_error_response(error):
+    """Réponse d'erreur d'un téléversement par morceaux"""
+    return Response({'error': str(error), **error.extra}, status=error.status_code)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def start_chunked_upload(request):
+    """
+    Ouvrir un téléversement par morceaux pour la photo d'un drone ou une image de carrousel
+    """
+    from .uploads import UploadError, max_chunk_size, start_upload
+    
+    serializer = UploadSessionSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'error': 'Données invalides',
+            'details': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        session = start_upload(request.user, **serializer.validated_data)
+    except UploadError as e:
+        return _upload_error_response(e)
+    except Exception as e:
+        logger.error("Erreur lors de l'ouverture du téléversement: %s", e)
+        return Response(
+            {'error': "Erreur lors de l'ouverture du téléversement"}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    
+    return Response({
+        'upload': UploadSessionSerializer(session).data,
+        'chunk_size': max_chunk_size(),
+        'status': 'success'
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET', 'PUT', 'DELETE'])
+@permission_classes([permissions.IsAuthenticated])
+def chunked_upload(request, upload_id):
     """
-    Récupère tous les aéroports et aérodromes approuvés pour l'affichage sur la carte
+    GET : état et position de reprise ; PUT : envoi d'un morceau
+    (Content-Range: bytes <début>-<fin>/<total>) ; DELETE : abandon
     """
+    from .uploads import UploadError, abort_upload, receive_chunk
+    
+    session = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+    
+    if request.method == 'GET':
+        return Response({'upload': UploadSessionSerializer(session).data, 'status': 'success'})
+    
+    if request.method == 'DELETE':
+        abort_upload(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    # Le corps est lu en flux : jamais via request.data, qui le chargerait en entier
     try:
-        # Récupérer seulement les aéroports approuvés
-        airports = Airport.objects.filter(is_active=True).order_by('airport_type', 'name')
-        
-        # Séparer par type
-        airports_data = []
-        aerodromes_data = []
-        
-        for airport in airports:
-            if airport.airport_type in ['international', 'domestic']:
-                airports_data.append(airport)
-            elif airport.airport_type == 'aerodrome':
-                aerodromes_data.append(airport)
-        
-        # Sérialiser les données
-        airports_serializer = AirportSerializer(airports_data, many=True)
-        aerodromes_serializer = AirportSerializer(aerodromes_data, many=True)
-        
-        response_data = {
-            'airports': airports_serializer.data,
-            'aerodromes': aerodromes_serializer.data,
-            'total_airports': len(airports_data),
-            'total_aerodromes': len(aerodromes_data),
-            'total_locations': len(airports)
-        }
-        
-        return Response(response_data, status=status.HTTP_200_OK)
-        
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0) or None
+    except ValueError:
+        content_length = None
+    
+    try:
+        session = receive_chunk(
+            session,
+            request.stream,
+            content_length,
+            request.headers.get('Content-Range'),
+            expected_digest=request.headers.get('X-Chunk-SHA256'),
+        )
+    except UploadError as e:
+        return _upload_error_response(e)
     except Exception as e:
-        return Response({
-            'error': 'Erreur lors de la récupération des données',
-            'detail': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        logger.error("Erreur lors de la réception d'un morceau du téléversement %s: %s", upload_id, e)
+        return Response(
+            {'error': "Erreur lors de la réception du morceau"}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    
+    return Response({
+        'upload': UploadSessionSerializer(session).data,
+        'message': 'Téléversement terminé' if session.status == 'complete' else 'Morceau reçu',
+        'status': 'success'
+    })
 
 
 @api_view(['POST'])
@@ -689,37 +914,6 @@ def create_airport(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def get_protected_areas_for_map(request):
-    """
-    Récupère toutes les zones protégées approuvées pour l'affichage sur la carte
-    """
-    try:
-        # Récupérer seulement les zones approuvées
-        natural_reserves = NaturalReserve.objects.filter(is_active=True).all().order_by('name')
-        national_parks = NationalPark.objects.filter(is_active=True).all().order_by('name')
-        
-        natural_reserves_serializer = NaturalReserveSerializer(natural_reserves, many=True)
-        national_parks_serializer = NationalParkSerializer(national_parks, many=True)
-        
-        response_data = {
-            'natural_reserves': natural_reserves_serializer.data,
-            'national_parks': national_parks_serializer.data,
-            'total_natural_reserves': len(natural_reserves),
-            'total_national_parks': len(national_parks),
-            'total_protected_areas': len(natural_reserves) + len(national_parks)
-        }
-        
-        return Response(response_data, status=status.HTTP_200_OK)
-        
-    except Exception as e:
-        return Response({
-            'error': 'Erreur lors de la récupération des zones protégées',
-            'detail': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def create_natural_reserve(request):
@@ -776,3 +970,106 @@ def create_national_park(request):
             'error': 'Erreur lors de la création du parc',
             'detail': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _flight_report_params(request):
+    """Lire et valider les paramètres communs des rapports de vols"""
+    from .reporting import GROUP_BY_FIELDS
+    
+    group_by = parse_fields_param(request.query_params.get('group_by', 'month')) or []
+    invalid = [name for name in group_by if name not in GROUP_BY_FIELDS]
+    if invalid:
+        raise ValueError(f"Regroupement invalide: {', '.join(invalid)} (valeurs possibles: {', '.join(GROUP_BY_FIELDS)})")
+    
+    params = {'group_by': group_by}
+    for name in ['start', 'end']:
+        value = request.query_params.get(name)
+        if value:
+            try:
+                params[name] = parse_date(value)
+            except ValueError:
+                params[name] = None
+            if params[name] is None:
+                raise ValueError(f"Le paramètre {name} doit être au format YYYY-MM-DD")
+    
+    params['drone_type'] = request.query_params.get('drone_type') or None
+    params['location'] = request.query_params.get('location') or None
+    return params
+
+
+@replica_reads
+@query_budget(2)
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def flight_report(request):
+    """
+    Rapport national des vols (regroupement par jour, mois, type de drone ou lieu)
+    calculé sur les agrégats quotidiens
+    """
+    from .reporting import flight_report as build_flight_report
+    
+    try:
+        params = _flight_report_params(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        rows = build_flight_report(**params)
+        return Response({
+            'group_by': params['group_by'],
+            'results': rows,
+            'total_flights': sum(row['flight_count'] for row in rows),
+            'total_hours': round(sum(row['total_minutes'] for row in rows) / 60, 2),
+            'status': 'success'
+        })
+    except Exception as e:
+        logger.error("Erreur lors de la génération du rapport de vols: %s", e)
+        return Response(
+            {'error': 'Erreur lors de la génération du rapport'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@replica_reads
+@query_budget(2)
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def flight_report_export(request):
+    """
+    Export CSV du rapport national des vols
+    """
+    import csv
+    from .reporting import flight_report as build_flight_report
+    
+    try:
+        params = _flight_report_params(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    rows = build_flight_report(**params)
+    columns = params['group_by'] + ['flight_count', 'total_minutes', 'total_hours']
+    
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="rapport_vols.csv"'
+    writer = csv.DictWriter(response, fieldnames=columns)
+    writer.writeheader()
+    writer.writerows(rows)
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def metrics_view(request):
+    """
+    Métriques au format Prometheus (jeton ``METRICS_TOKEN`` ou compte administrateur)
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    authorized = request.user.is_staff or (
+        token and request.headers.get('Authorization') == f'Bearer {token}'
+    )
+    if not authorized:
+        return HttpResponse('Accès non autorisé', status=403, content_type='text/plain; charset=utf-8')
+    collect_pool_metrics()
+    collect_replica_metrics()
+    collect_cache_metrics()
+    return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,58 @@
+"""
+Profil de production ASGI : gunicorn gère les processus, uvicorn sert les requêtes
+
+    gunicorn AnacBackend.asgi:application -c config/gunicorn.conf.py
+
+Chaque worker est une boucle d'événements uvicorn. Les lectures les plus
+fréquentes (cartes, carrousel, vérification de session, listes de vols) sont
+des vues asynchrones (``authentication/async_views.py``) : une requête SQL
+ou un appel au cache en attente n'immobilise qu'une coroutine, jamais le
+worker. Les vues DRF synchrones s'exécutent dans un thread dédié à la
+requête (asgiref), sans bloquer la boucle.
+
+Les clients lents sont absorbés par nginx (``config/nginx-api.conf`` :
+tampons des requêtes et des réponses) ; uvicorn ne reçoit que des requêtes
+complètes et rend ses réponses sans attendre le client.
+
+Sous ASGI, les connexions persistantes de Django (``CONN_MAX_AGE``) restent
+désactivées : chaque worker a son pool de connexions psycopg
+(``DB_POOL_MIN_SIZE``/``DB_POOL_MAX_SIZE``, voir ``config/production.py``),
+soit au plus ``workers × DB_POOL_MAX_SIZE`` connexions à PostgreSQL.
+
+Variables d'environnement :
+    GUNICORN_BIND       adresse d'écoute (défaut : 127.0.0.1:8000)
+    GUNICORN_WORKERS    nombre de workers (défaut : nombre de processeurs)
+    GUNICORN_TIMEOUT    délai avant redémarrage d'un worker bloqué, en s (défaut : 30)
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+
+# Une boucle d'événements par processeur suffit : la concurrence vient de
+# l'asynchrone, pas du nombre de processus
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'uvicorn_worker.UvicornWorker'
+
+# Un worker dont la boucle reste bloquée (code synchrone dans une vue
+# asynchrone) est redémarré
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = 30
+
+# Connexions persistantes avec nginx
+keepalive = 5
+
+# Recyclage périodique des workers (fragmentation mémoire)
+max_requests = 5000
+max_requests_jitter = 500
+
+# Pas de préchargement : chaque worker ouvre ses propres connexions (base, cache)
+preload_app = False
+
+# En-têtes X-Forwarded-* acceptés depuis nginx uniquement
+forwarded_allow_ips = '127.0.0.1'
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
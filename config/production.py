@@ -44,6 +44,25 @@ ALLOWED_HOSTS = [
     'api.votre-domaine.com',
 ]
 
+# Pool de connexions psycopg 3 (un pool par worker gunicorn) : les requêtes
+# réutilisent des connexions ouvertes au lieu de payer à chaque fois la
+# poignée de main TLS et le fork d'un processus PostgreSQL. Connexions au
+# total : workers × DB_POOL_MAX_SIZE, à garder sous max_connections.
+# DB_POOL=0 revient à une connexion par requête (comparaison en test de charge).
+DB_POOL_ENABLED = os.environ.get('DB_POOL', '1') != '0'
+
+DB_POOL_OPTIONS = {
+    'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+    # Attente maximale d'une connexion libre avant erreur (s)
+    'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+    # Fermeture des connexions inutilisées au-delà de min_size (s)
+    'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', '300')),
+    # Renouvellement périodique des connexions (s)
+    'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', '1800')),
+    'name': 'anac-default',
+}
+
 # Configuration de la base de données (exemple PostgreSQL)
 DATABASES = {
     'default': {
@@ -53,12 +72,47 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', ''),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        # Le pool remplace les connexions persistantes (incompatibles)
+        'CONN_MAX_AGE': 0 if DB_POOL_ENABLED else int(os.environ.get('DB_CONN_MAX_AGE', '0')),
+        # Connexion vérifiée avant usage. Avec le pool, Django transmet
+        # ConnectionPool.check_connection à psycopg_pool (contrôle à chaque sortie
+        # du pool) : ne pas ajouter 'check' à DB_POOL_OPTIONS, l'argument serait
+        # passé deux fois. Sans pool, vérification avant réutilisation (CONN_MAX_AGE).
+        'CONN_HEALTH_CHECKS': True,
         'OPTIONS': {
             'sslmode': 'require',
+            # Détection des connexions coupées côté réseau
+            'keepalives': 1,
+            'keepalives_idle': 30,
+            'keepalives_interval': 10,
+            'keepalives_count': 3,
+            'connect_timeout': 5,
+            **({'pool': DB_POOL_OPTIONS} if DB_POOL_ENABLED else {}),
         },
     }
 }
 
+# Réplicas en lecture seule (DB_REPLICA_HOSTS=hote1,hote2) : même base et mêmes
+# identifiants, un pool par réplica. Seules les vues désignées y lisent
+# (authentication/routers.py), jamais un client qui vient d'écrire.
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'OPTIONS': {
+            **DATABASES['default']['OPTIONS'],
+            **({'pool': {**DB_POOL_OPTIONS, 'name': f'anac-{alias}'}} if DB_POOL_ENABLED else {}),
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+# Retard toléré (s) et durée des lectures sur le primaire après une écriture (s)
+REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', '5'))
+REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', '10'))
+
 # Configuration du cache Redis
 CACHES = {
     'default': {
@@ -74,14 +128,20 @@ CACHES = {
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
 
-# Configuration du logging
+# Journalisation : JSON sur disque, écrite par un thread d'arrière-plan
+# (authentication/structured_logging.py) ; les requêtes ne bloquent jamais
+# sur le disque. WatchedFileHandler rouvre le fichier après logrotate.
+LOGGING_CONFIG = 'authentication.structured_logging.configure_logging'
+
+# Taille maximale (caractères) des données de requête journalisées
+LOG_PAYLOAD_MAX_CHARS = int(os.environ.get('LOG_PAYLOAD_MAX_CHARS', '2048'))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
-            'style': '{',
+        'json': {
+            '()': 'authentication.structured_logging.JSONFormatter',
         },
         'simple': {
             'format': '{levelname} {message}',
@@ -91,9 +151,9 @@ LOGGING = {
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'logging.handlers.WatchedFileHandler',
             'filename': '/var/log/django/anac.log',
-            'formatter': 'verbose',
+            'formatter': 'json',
         },
         'console': {
             'level': 'INFO',
@@ -117,12 +177,26 @@ LOGGING = {
             'propagate': False,
         },
     },
+    # Gestionnaires placés derrière la file d'écriture, taille de la file et
+    # part conservée des messages fréquents sous le niveau ERROR (jetons
+    # expirés à chaque requête d'un client déconnecté)
+    'queue': {
+        'handlers': ['console', 'file'],
+        'maxsize': 10000,
+        'sampling': {
+            'authentication.authentication': 0.1,
+            'authentication.async_views': 0.1,
+        },
+    },
 }
 
 # Configuration des fichiers statiques
 STATIC_ROOT = '/var/www/static/'
 MEDIA_ROOT = '/var/www/media/'
 
+# Envoi des médias délégué à nginx (voir config/nginx-media.conf)
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
 # Configuration de sécurité supplémentaire
 SECURE_REFERRER_POLICY = 'strict-origin-when-cross-origin'
 SECURE_CROSS_ORIGIN_OPENER_POLICY = 'same-origin'